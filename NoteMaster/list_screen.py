@@ -0,0 +1,138 @@
+"""
+File: list_screen.py
+Desc: A scrolling, full-screen listing of a category's notes for NoteMaster, built on the TerminalSystem.
+      Only the notes on screen (plus a page ahead) are ever loaded.
+"""
+import time
+
+import color
+import terminal_objects as TObj
+from note_pager import NotePager
+
+
+class ListScreen:
+    """A screen with a scrolling list of a category's notes."""
+
+    screen_name = "list"
+
+    # How far each key scrolls, in lines or in whole screens.
+    line_keys = {"up": -1, "down": 1}
+    page_keys = {"page up": -1, "page down": 1}
+
+    def __init__(self, terminal, pager: NotePager, frame_time: float = 0.01) -> None:
+        """Initialize the ListScreen object and add its screen to the terminal.
+
+        Args:
+            terminal (TerminalManager):
+                The terminal to show the screen on.
+            pager (NotePager):
+                The listing to show.
+            frame_time (float, optional):
+                How long to wait between checking for input, in seconds.
+                Defaults to 0.01.
+        """
+        self.terminal = terminal
+        self.window_manager = terminal.window_manager
+        self.pager = pager
+        self.frame_time = frame_time
+
+        height, width = self.window_manager.screen_size
+
+        if self.window_manager.get_screen(self.screen_name) is None:
+            self.window_manager.add_screen(self.screen_name)
+        self.screen = self.window_manager.get_screen(self.screen_name)
+        # The screen is reused between categories, so drop the last one's objects.
+        for screen_object in self.screen.get_objects():
+            self.screen.remove_object(screen_object.get_name())
+
+        self.title_box = TObj.Box(
+            "list_title", None, None, coordinates=(0, 0), size=(3, width - 2), title=pager.category,
+            border_color=[color.BLUE], padding=(0, 1), text=self.status_text())
+        self.title_box.set_layout(lambda size: ((0, 0), (3, size[1] - 2)))
+        self.viewport = TObj.Viewport(
+            "list_notes", None, pager.line_provider, coordinates=(3, 1), size=(height - 4, width - 3),
+            line_count=pager.count(), mods=[color.GREEN])
+        self.viewport.set_layout(lambda size: ((3, 1), (size[0] - 4, size[1] - 3)))
+        self.screen.add_object(self.title_box)
+        self.screen.add_object(self.viewport)
+
+        # The rows the listing scrolls in, registered with the display while the screen is shown.
+        self.scroll_region: tuple[int, int, int, int] | None = None
+
+    def status_text(self, scroll_offset: int = 0) -> str:
+        """Return the line showing where in the listing the user is.
+
+        Args:
+            scroll_offset (int, optional):
+                The index of the first visible note.
+                Defaults to 0.
+
+        Returns:
+            str: The status line.
+        """
+        count = self.pager.count()
+        if count == 0:
+            return "There's nothing here yet."
+        return f"{scroll_offset + 1} of {count}. Arrows/Page Up/Page Down to scroll, Esc to go back."
+
+    def run(self) -> None:
+        """Show the screen and scroll it until the user presses enter or escape."""
+        keyboard = self.terminal.kb
+        self.window_manager.set_current_screen(self.screen_name)
+        self.update_scroll_region()
+        self.window_manager.refresh_screen()
+        keyboard.start_typing()
+
+        try:
+            while True:
+                self.terminal.check_resize()
+
+                keys = keyboard.get_typed_keys()
+                if "esc" in keys or "enter" in keys:
+                    break
+
+                lines = sum(self.line_keys.get(key, 0) for key in keys)
+                lines += sum(self.page_keys.get(key, 0) for key in keys) * self.viewport.size[0]
+                if lines:
+                    self.scroll_by(lines)
+
+                time.sleep(self.frame_time)
+        finally:
+            keyboard.stop_typing()
+            # Other screens use these rows differently.
+            if self.scroll_region is not None:
+                self.window_manager.display.remove_scroll_region(*self.scroll_region[:2])
+                self.scroll_region = None
+
+    def update_scroll_region(self) -> None:
+        """Register the listing's rows as a scroll region with the display, moving it if the viewport has moved."""
+        (top, left), (height, width) = self.viewport.get_coordinates(), self.viewport.get_size()
+        region = (top, top + height - 1, left, left + width - 1)
+        if region == self.scroll_region:
+            return
+
+        display = self.window_manager.display
+        if self.scroll_region is not None:
+            display.remove_scroll_region(*self.scroll_region[:2])
+        display.add_scroll_region(*region)
+        self.scroll_region = region
+
+    def scroll_by(self, lines: int) -> None:
+        """Scroll the listing and repaint only what changed.
+
+        Args:
+            lines (int):
+                The number of lines to scroll, positive to move further down the listing.
+        """
+        offset = self.viewport.get_scroll_offset()
+        self.viewport.scroll_by(lines)
+        if self.viewport.get_scroll_offset() == offset:
+            return
+
+        # The compositor spots the shift inside the registered region and has the terminal scroll it,
+        # so only the newly exposed lines are printed.
+        self.update_scroll_region()
+        self.title_box.set_text(self.status_text(self.viewport.get_scroll_offset()))
+        self.screen.update_object("list_title")
+        self.screen.update_object("list_notes")
+        self.window_manager.refresh_screen()
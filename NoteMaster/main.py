@@ -23,6 +23,7 @@ Desc: A general note-taking app designed for DND.
 # creating and renaming the utilities files for every program or have to deal with learning the "correct" methods.
 import sys
 import os
+import json
 
 import_directory = os.path.dirname(os.path.realpath(__file__))
 
@@ -40,11 +41,23 @@ sys.path.append(import_directory)
 import audio
 from terminal_manager import TerminalManager as terminal
 from personal_functions import *
+from workspace import Workspace
+from note_transfer import import_notes, export_notes
+from note_history import to_state
+from note_pager import NotePager
+from list_screen import ListScreen
+from search_screen import SearchScreen
 
 
 class NoteMaster:
 
     file_path = "notes.txt"
+    # Every campaign is a file in the workspace directory; notes.db is the "notes" campaign.
+    workspace_directory = "."
+    campaign_extension = ".db"
+    default_campaign = "notes"
+    # Roughly how much memory the campaigns kept open for quick switching may use, in bytes.
+    campaign_memory_cap = 64 * 1024 * 1024
 
     # Data Format: {
     #     "Characters": {
@@ -60,22 +73,357 @@ class NoteMaster:
 
     data = {}
 
-    options = [
-        ["1. View Notes", view_notes],
-        ["2. Add Note", add_note],
-        ["3. Edit Note", edit_note],
-        ["4. Delete Note", delete_note],
-        ["5. Exit", shut_down],
-    ]
+    record_fields = ["Date Met", "Name/Title", "Last Seen Time", "Last Seen Location", "Race", "Description"]
+
+    # How many notes are listed at once when picking one.
+    page_size = 20
 
     def __init__(self) -> None:
         """Initialize the NoteMaster object."""
         text("Greetings! Welcome to NoteMaster!", mods=[color.BOLD, color.GREEN])
+        self.running = True
+
+        # Notes live in the store, so saving or looking up one note never touches the rest of the campaign.
+        # Only the active campaign is open; the others just keep a small header in memory.
+        self.workspace = Workspace(self.workspace_directory, self.campaign_extension, self.campaign_memory_cap)
+        self.open_campaign(self.workspace.last_campaign or self.default_campaign)
+        if self.store.count() == 0 and self.campaign.name == self.default_campaign:
+            self.import_legacy_notes()
+
+        # The full-screen terminal interface is only set up the first time it's needed.
+        self.terminal = None
+
+    def open_campaign(self, name: str) -> None:
+        """Make a campaign the active one.
+
+        Args:
+            name (str):
+                The name of the campaign.
+        """
+        self.campaign = self.workspace.switch(name)
+        self.store = self.campaign.store
+
+    def import_legacy_notes(self) -> None:
+        """Move the notes from the old flat notes file into the store, if there is one."""
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, "r", encoding="UTF-8") as file:
+                legacy_data = json.load(file)
+        except ValueError:
+            error(f"{self.file_path} isn't in a format I can read, so it was left alone.")
+            return
+        text(f"Imported {self.store.import_data(legacy_data)} notes from {self.file_path}.", mods=[color.SUCCESS])
+
+    # Helpers
+
+    def choose(self, prompt: str, choices: list[str]) -> int | None:
+        """Ask the user to pick one of a list of choices.
+
+        Args:
+            prompt (str):
+                The question to ask.
+            choices (list[str]):
+                The choices to number and list.
+
+        Returns:
+            int | None: The index of the chosen item, or None if there was nothing to choose from or the user backed out.
+        """
+        if not choices:
+            text("There's nothing here yet.", mods=[color.FAIL])
+            return None
+        text(prompt, mods=[color.BOLD, color.BLUE])
+        for i, choice in enumerate(choices):
+            text(f"{i + 1}. {choice}", mods=[color.GREEN])
+        text("0. Back", mods=[color.GREEN])
+        index = intput("Choice:", minimum=-1, maximum=len(choices) + 1, mods=[color.PROMPT])
+        return None if index == 0 else index - 1
+
+    def choose_category(self) -> str | None:
+        """Ask the user to pick a category.
+
+        Returns:
+            str | None: The category, or None if the user backed out.
+        """
+        categories = self.store.list_categories()
+        index = self.choose("Which category?", categories)
+        return None if index is None else categories[index]
+
+    def choose_paged(self, pager: NotePager) -> tuple[int, str] | None:
+        """Ask the user to pick a note from a listing, one page at a time.
+
+        Args:
+            pager (NotePager):
+                The listing to pick from.
+
+        Returns:
+            tuple[int, str] | None: The (id, name) of the note, or None if the user backed out.
+        """
+        page_number = 0
+        while True:
+            page = pager.get_page(page_number)
+            if not page:
+                text("There's nothing here yet.", mods=[color.FAIL])
+                return None
+
+            text(f"{pager.category} (page {page_number + 1} of {pager.page_count()})", mods=[color.BOLD, color.BLUE])
+            # Only this page is loaded and printed, so big categories open instantly.
+            for i, row in enumerate(page):
+                text(f"{i + 1}. {pager.format_row(*row)}", letter_time=0, mods=[color.GREEN])
+            text("N. Next page, P. Previous page, 0. Back", mods=[color.GREEN])
+
+            answer = intext("Choice:", mods=[color.PROMPT]).strip().lower()
+            if answer == "n" and page_number + 1 < pager.page_count():
+                page_number += 1
+            elif answer == "p" and page_number > 0:
+                page_number -= 1
+            elif answer == "0":
+                return None
+            elif answer.isdigit() and 0 < int(answer) <= len(page):
+                note_id, name, _ = page[int(answer) - 1]
+                return note_id, name
+            else:
+                error("That's not one of the choices.")
+
+    def choose_note(self) -> tuple[str, str, int, dict] | None:
+        """Ask the user to pick a note by category, then from a paged list of the category's notes.
+
+        Returns:
+            tuple[str, str, int, dict] | None: The (category, name, id, record) of the note, or None if the user backed out.
+        """
+        category = self.choose_category()
+        if category is None:
+            return None
+
+        chosen = self.choose_paged(NotePager(self.store, category, self.page_size))
+        if chosen is None:
+            return None
+        note_id, name = chosen
+        note = self.store.get_note(note_id)
+        if note is None:
+            return None
+        return category, name, note_id, note[2]
+
+    def show_note(self, name: str, record: dict) -> None:
+        """Print a single note.
+
+        Args:
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note.
+        """
+        text(name, mods=[color.BOLD, color.YELLOW])
+        for field in self.record_fields:
+            text(f"{field}: {record.get(field, '')}")
+        for note in record.get("Notes", []):
+            text(f"  - {note}")
+
+    # Options
+
+    def view_notes(self) -> None:
+        """Let the user pick a note and show it."""
+        chosen = self.choose_note()
+        if chosen is None:
+            return
+        _, name, _, record = chosen
+        self.show_note(name, record)
+
+    def browse_notes(self) -> None:
+        """Open a full-screen, scrolling list of a category's notes."""
+        category = self.choose_category()
+        if category is None:
+            return
+        if self.terminal is None:
+            self.terminal = terminal((12, 40))
+        ListScreen(self.terminal, NotePager(self.store, category, self.page_size)).run()
+
+        self.terminal.cursor.clear_screen()
+        self.terminal.cursor.show()
+
+    def search_notes(self) -> None:
+        """Ask the user for a search and show the best matching notes."""
+        query = intext('Search (use "quotes" for phrases):', mods=[color.PROMPT])
+        results = self.campaign.get_search_index().search(query, prefix_last=False)
+        if not results:
+            text("Nothing matched.", mods=[color.FAIL])
+            return
+
+        for note_id, _ in results:
+            note = self.store.get_note(note_id)
+            if note is not None:
+                category, name, record = note
+                text(f"[{category}]", end=" ", mods=[color.BRIGHT_BLACK])
+                self.show_note(name, record)
+
+    def live_search(self) -> None:
+        """Open the full-screen search, which updates the results as the user types."""
+        if self.terminal is None:
+            self.terminal = terminal((12, 40))
+        SearchScreen(self.terminal, self.campaign.get_search_index(), self.store).run()
+
+        self.terminal.cursor.clear_screen()
+        self.terminal.cursor.show()
+
+    def add_note(self) -> None:
+        """Ask the user for a new note and save it."""
+        category = intext("Category (blank for Characters):", mods=[color.PROMPT]).strip() or "Characters"
+        name = intext("Name:", mods=[color.PROMPT]).strip()
+        if not name:
+            error("A note needs a name.")
+            return
+
+        record = {field: intext(f"{field}:", mods=[color.PROMPT]).strip() for field in self.record_fields}
+        notes = intext("Notes (separated by ;):", mods=[color.PROMPT])
+        record["Notes"] = [note.strip() for note in notes.split(";") if note.strip()]
+
+        note_id = self.store.add_note(category, name, record)
+        self.campaign.index_note(note_id, name, record)
+        self.campaign.history.record_add(note_id, category, name, record)
+        text("Saved!", mods=[color.SUCCESS])
+
+    def edit_note(self) -> None:
+        """Let the user pick a note and change its fields. Blank answers keep the current value."""
+        chosen = self.choose_note()
+        if chosen is None:
+            return
+        category, name, note_id, record = chosen
+        # Taken before the record changes, so the fields that stay the same are shared with the undo history.
+        before = to_state(category, name, record)
+
+        for field in self.record_fields:
+            new_value = intext(f"{field} ({record.get(field, '')}):", mods=[color.PROMPT]).strip()
+            if new_value:
+                record[field] = new_value
+        new_note = intext("Add a note (blank for none):", mods=[color.PROMPT]).strip()
+        if new_note:
+            record.setdefault("Notes", []).append(new_note)
+
+        self.store.update_note(note_id, record)
+        self.campaign.index_note(note_id, name, record)
+        self.campaign.history.record_edit(note_id, before, category, name, record)
+        text("Saved!", mods=[color.SUCCESS])
+
+    def delete_note(self) -> None:
+        """Let the user pick a note and delete it."""
+        chosen = self.choose_note()
+        if chosen is None:
+            return
+        category, name, note_id, record = chosen
+        if boolput(f"Are you sure you want to delete {name}?", mods=[color.ERROR]):
+            self.store.delete_note(note_id)
+            self.campaign.unindex_note(note_id)
+            self.campaign.history.record_delete(note_id, category, name, record)
+            text("Deleted.", mods=[color.SUCCESS])
+
+    def undo(self) -> None:
+        """Undo the last add, edit or delete."""
+        change = self.campaign.history.undo(self.store)
+        if change is None:
+            text("There's nothing to undo.", mods=[color.FAIL])
+            return
+        self.reindex(change.note_id)
+        text(f"Undid the {change.describe()}.", mods=[color.SUCCESS])
+
+    def redo(self) -> None:
+        """Redo the last undone change."""
+        change = self.campaign.history.redo(self.store)
+        if change is None:
+            text("There's nothing to redo.", mods=[color.FAIL])
+            return
+        self.reindex(change.note_id)
+        text(f"Redid the {change.describe()}.", mods=[color.SUCCESS])
+
+    def reindex(self, note_id: int) -> None:
+        """Bring a note's search entry in line with the store after it was changed behind the index's back.
+
+        Args:
+            note_id (int):
+                The id of the note.
+        """
+        note = self.store.get_note(note_id)
+        if note is None:
+            self.campaign.unindex_note(note_id)
+        else:
+            self.campaign.index_note(note_id, note[1], note[2])
+
+    def import_file(self) -> None:
+        """Ask the user for a JSON Lines or CSV file and add its notes to the campaign."""
+        file_path = intext("File to import (.jsonl or .csv):", mods=[color.PROMPT]).strip()
+        try:
+            added, errors = import_notes(
+                self.store, file_path,
+                on_batch=lambda ids, notes: [self.campaign.index_note(note_id, name, record)
+                                             for note_id, (_, name, record) in zip(ids, notes)])
+        except (OSError, UnicodeDecodeError) as exception:
+            error(f"Couldn't read {file_path}: {exception}")
+            return
+
+        for message in errors:
+            error(message, letter_time=0)
+        text(f"Imported {added} notes.", mods=[color.SUCCESS])
+
+    def export_file(self) -> None:
+        """Write the campaign's notes to a JSON Lines or CSV file."""
+        file_path = intext("File to export to (.jsonl or .csv):", mods=[color.PROMPT]).strip()
+        try:
+            count = export_notes(self.store, file_path)
+        except OSError as exception:
+            error(f"Couldn't write {file_path}: {exception}")
+            return
+        text(f"Exported {count} notes.", mods=[color.SUCCESS])
+
+    def switch_campaign(self) -> None:
+        """Let the user pick a campaign, or start a new one, and make it the active one."""
+        names = self.workspace.list_campaigns()
+        choices = []
+        for name in names:
+            note_count = self.workspace.get_header(name)["note_count"]
+            active = " (active)" if name == self.campaign.name else ""
+            choices.append(f"{name} - {'?' if note_count is None else note_count} notes{active}")
+        index = self.choose("Which campaign?", choices + ["New campaign"])
+        if index is None:
+            return
+
+        if index == len(names):
+            name = intext("Campaign name:", mods=[color.PROMPT]).strip()
+            if not name or os.sep in name or (os.altsep and os.altsep in name):
+                error("That can't be used as a campaign name.")
+                return
+        else:
+            name = names[index]
+        self.open_campaign(name)
+        text(f"Now using {name}.", mods=[color.SUCCESS])
+
+    def shut_down(self) -> None:
+        """Close the campaigns and stop the main loop."""
+        self.workspace.close()
+        self.running = False
+        text("Goodbye!", mods=[color.BOLD, color.GREEN])
+
+    options = [
+        ["1. View Notes", view_notes],
+        ["2. Browse Notes", browse_notes],
+        ["3. Search Notes", search_notes],
+        ["4. Live Search", live_search],
+        ["5. Add Note", add_note],
+        ["6. Edit Note", edit_note],
+        ["7. Delete Note", delete_note],
+        ["8. Undo", undo],
+        ["9. Redo", redo],
+        ["10. Import Notes", import_file],
+        ["11. Export Notes", export_file],
+        ["12. Switch Campaign", switch_campaign],
+        ["13. Exit", shut_down],
+    ]
 
     def main_loop(self) -> None:
         """Main"""
-        text("What would you like to do?", mods=[color.BOLD, color.BLUE])
-        text(self.options, mods=[color.BOLD, color.GREEN])
+        while self.running:
+            text("What would you like to do?", mods=[color.BOLD, color.BLUE])
+            self.print_options()
+            choice = intput("Choice:", minimum=0, maximum=len(self.options) + 1, mods=[color.PROMPT])
+            self.options[choice - 1][1](self)
 
     def print_options(self) -> None:
         """Print the options."""
@@ -0,0 +1,255 @@
+"""
+File: note_history.py
+Desc: Undo and redo for NoteMaster's note changes. Only the notes a change touched are kept, as compact records,
+      and fields that didn't change are shared between the before and after versions instead of copied.
+"""
+import sys
+from collections import deque
+
+from note_records import CharacterRecord
+
+
+# A note as it was at one point: (category, name, record), or None if it didn't exist.
+NoteState = tuple[str, str, CharacterRecord] | None
+
+
+class Change:
+    """One change to one note, with the note as it was before and after."""
+
+    __slots__ = ("note_id", "before", "after", "size")
+
+    def __init__(self, note_id: int, before: NoteState, after: NoteState) -> None:
+        """Initialize the Change object.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            before (NoteState):
+                The note before the change, or None if the change added it.
+            after (NoteState):
+                The note after the change, or None if the change deleted it.
+        """
+        self.note_id = note_id
+        self.before = before
+        self.after = after
+        self.size = self._measure()
+
+    def _measure(self) -> int:
+        """Return roughly how many bytes the change keeps alive, counting shared values only once."""
+        size = sys.getsizeof(self)
+        seen = set()
+        for state in (self.before, self.after):
+            if state is None:
+                continue
+            size += sys.getsizeof(state) + sys.getsizeof(state[2])
+            for value in (state[1], *(getattr(state[2], attribute) for attribute in CharacterRecord.__slots__)):
+                if id(value) not in seen:
+                    seen.add(id(value))
+                    size += sys.getsizeof(value)
+        return size
+
+    def describe(self) -> str:
+        """Return a short description of the change, such as "edit of Bob".
+
+        Returns:
+            str: The description.
+        """
+        if self.before is None:
+            return f"add of {self.after[1]}"
+        if self.after is None:
+            return f"delete of {self.before[1]}"
+        return f"edit of {self.after[1]}"
+
+
+def to_state(category: str, name: str, record: dict, previous: NoteState = None) -> NoteState:
+    """Turn a note into a compact state, reusing the previous state's record if the note didn't change.
+
+    Args:
+        category (str):
+            The category of the note.
+        name (str):
+            The name the note is filed under.
+        record (dict):
+            The note.
+        previous (NoteState, optional):
+            A recent state of the same note to share with.
+            Defaults to None.
+
+    Returns:
+        NoteState: The state.
+    """
+    compact = CharacterRecord.from_dict(record)
+    if previous is not None and previous[2] == compact:
+        compact = previous[2]
+    return category, name, compact
+
+
+class NoteHistory:
+    """An undo and redo stack of note changes, kept under a memory budget."""
+
+    def __init__(self, memory_budget: int = 4 * 1024 * 1024) -> None:
+        """Initialize the NoteHistory object.
+
+        Args:
+            memory_budget (int, optional):
+                Roughly how many bytes the history may use. The oldest changes are forgotten past this.
+                Defaults to 4 MiB.
+        """
+        self.memory_budget = memory_budget
+        self.undo_stack: deque[Change] = deque()
+        self.redo_stack: list[Change] = []
+        # Counts the changes on both stacks.
+        self.memory_used = 0
+
+    # Recording
+
+    def record_add(self, note_id: int, category: str, name: str, record: dict) -> None:
+        """Remember that a note was added.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            category (str):
+                The category of the note.
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note.
+        """
+        self._push(Change(note_id, None, to_state(category, name, record)))
+
+    def record_edit(self, note_id: int, before: NoteState, category: str, name: str, record: dict) -> None:
+        """Remember that a note was edited.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            before (NoteState):
+                The note before the edit, from to_state(). Make it before changing the record dict,
+                so the fields that stay the same are shared rather than copied.
+            category (str):
+                The category of the note after the edit.
+            name (str):
+                The name of the note after the edit.
+            record (dict):
+                The note after the edit.
+        """
+        self._push(Change(note_id, before, to_state(category, name, record, before)))
+
+    def record_delete(self, note_id: int, category: str, name: str, record: dict) -> None:
+        """Remember that a note was deleted.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            category (str):
+                The category of the note.
+            name (str):
+                The name the note was filed under.
+            record (dict):
+                The note.
+        """
+        self._push(Change(note_id, to_state(category, name, record, self._latest_state(note_id)), None))
+
+    def _latest_state(self, note_id: int) -> NoteState:
+        """Return the state the newest change left a note in, if that change was to the same note."""
+        if self.undo_stack and self.undo_stack[-1].note_id == note_id:
+            return self.undo_stack[-1].after
+        return None
+
+    def _push(self, change: Change) -> None:
+        """Add a change, forgetting anything that could be redone and the oldest changes over the budget."""
+        # Consecutive changes to one note share the record in between.
+        latest = self._latest_state(change.note_id)
+        if latest is not None and change.before is not None and latest[2] == change.before[2]:
+            change.before = (change.before[0], change.before[1], latest[2])
+            change.size = change._measure()
+
+        self.memory_used -= sum(redo_change.size for redo_change in self.redo_stack)
+        self.redo_stack.clear()
+        self.undo_stack.append(change)
+        self.memory_used += change.size
+        self._trim()
+
+    def _trim(self) -> None:
+        """Forget the oldest changes, then the furthest redos, until the history fits its budget.
+        The newest change is always kept, so it can be undone."""
+        while self.memory_used > self.memory_budget:
+            if len(self.undo_stack) > 1:
+                self.memory_used -= self.undo_stack.popleft().size
+            elif self.redo_stack:
+                self.memory_used -= self.redo_stack.pop(0).size
+            else:
+                break
+
+    # Undoing
+
+    def can_undo(self) -> bool:
+        """Check whether there is a change to undo.
+
+        Returns:
+            bool: True if there is.
+        """
+        return bool(self.undo_stack)
+
+    def can_redo(self) -> bool:
+        """Check whether there is an undone change to redo.
+
+        Returns:
+            bool: True if there is.
+        """
+        return bool(self.redo_stack)
+
+    def undo(self, store) -> Change | None:
+        """Undo the newest change.
+
+        Args:
+            store (NoteStore | JournaledNoteStore):
+                The store the change was made to.
+
+        Returns:
+            Change | None: The change that was undone, or None if there was nothing to undo.
+        """
+        if not self.undo_stack:
+            return None
+        change = self.undo_stack.pop()
+        self._apply(store, change.note_id, change.before)
+        # Stays counted in memory_used while it waits to be redone.
+        self.redo_stack.append(change)
+        self._trim()
+        return change
+
+    def redo(self, store) -> Change | None:
+        """Redo the newest undone change.
+
+        Args:
+            store (NoteStore | JournaledNoteStore):
+                The store the change was made to.
+
+        Returns:
+            Change | None: The change that was redone, or None if there was nothing to redo.
+        """
+        if not self.redo_stack:
+            return None
+        change = self.redo_stack.pop()
+        self._apply(store, change.note_id, change.after)
+        self.undo_stack.append(change)
+        return change
+
+    @staticmethod
+    def _apply(store, note_id: int, state: NoteState) -> None:
+        """Put a note into a state: deleted, restored, or replaced."""
+        if state is None:
+            store.delete_note(note_id)
+            return
+        category, name, record = state
+        if store.get_note(note_id) is None:
+            store.restore_note(note_id, category, name, record.to_dict())
+        else:
+            store.update_note(note_id, record.to_dict(), category, name)
+
+    def clear(self) -> None:
+        """Forget every change."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.memory_used = 0
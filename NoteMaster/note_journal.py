@@ -0,0 +1,651 @@
+"""
+File: note_journal.py
+Desc: A plain-file note store. Every change is appended to a write-ahead journal, with fsyncs batched
+      (group commit), and the journal is compacted into a snapshot in the background.
+      Writes wait for their fsync before returning, so a saved note survives a crash. Opened with durable=False,
+      they return straight away instead and a crash can lose up to commit_interval seconds of changes.
+"""
+import json
+import os
+import shutil
+import sys
+import threading
+from bisect import bisect_left
+from itertools import islice
+from typing import Iterator
+
+from note_records import CharacterRecord
+
+
+class JournaledNoteStore:
+    """A note store kept in memory and made durable by a journal plus a snapshot. Same interface as NoteStore."""
+
+    def __init__(self, file_path: str = "notes.txt", commit_interval: float = 0.05, batch_size: int = 64,
+                 compact_after: int = 10_000, durable: bool = True) -> None:
+        """Open the store, recovering it from the snapshot and journal if they exist.
+
+        Args:
+            file_path (str, optional):
+                The path to the snapshot. The journal is kept next to it.
+                Defaults to "notes.txt".
+            commit_interval (float, optional):
+                The longest time, in seconds, a change waits before being fsynced. Changes made within this window
+                share a single fsync.
+                Defaults to 0.05.
+            batch_size (int, optional):
+                The number of waiting changes that triggers an fsync straight away.
+                Defaults to 64.
+            compact_after (int, optional):
+                The number of journal entries that triggers a background compaction into the snapshot.
+                Defaults to 10_000.
+            durable (bool, optional):
+                Whether writes wait for their changes to be fsynced before returning. Writes from several threads
+                at once still share fsyncs. If False, a crash can lose changes from the last commit_interval.
+                Defaults to True.
+        """
+        self.file_path = file_path
+        self.journal_path = file_path + ".journal"
+        self.compacting_path = file_path + ".journal.compacting"
+        self.commit_interval = commit_interval
+        self.batch_size = batch_size
+        self.compact_after = compact_after
+        self.durable = durable
+
+        # id -> (category, name, record), plus an index of ids by category and name.
+        # Records are kept as compact CharacterRecords and only turned back into dicts when read.
+        self.notes: dict[int, tuple[str, str, CharacterRecord]] = {}
+        self.names: dict[str, dict[str, list[int]]] = {}
+        # category -> its names, sorted. Dropped whenever a name is added to or removed from the category.
+        self.sorted_names: dict[str, list[str]] = {}
+        self.next_id = 1
+
+        self.lock = threading.RLock()
+        self.commit_condition = threading.Condition(self.lock)
+        self.synced_condition = threading.Condition(self.lock)
+        self.pending = 0
+        # Entries logged so far, and how many of them have been fsynced.
+        self.logged = 0
+        self.synced = 0
+        self.journal_entries = 0
+        self.compaction: threading.Thread | None = None
+        # Why the last background compaction failed, until compact() or close() reports it.
+        self.compaction_error: Exception | None = None
+
+        self._recover()
+        journal_mode = "a"
+        # Finish a compaction a crash interrupted before the next one could overwrite its journal.
+        if os.path.exists(self.compacting_path):
+            self._write_snapshot(list(self.notes.items()), self.next_id)
+            # The new snapshot also holds everything in the live journal, so that starts over too.
+            journal_mode = "w"
+            self.journal_entries = 0
+        self.journal = open(self.journal_path, journal_mode, encoding="UTF-8")
+
+        self.running = True
+        self.committer = threading.Thread(target=self._commit_loop, daemon=True)
+        self.committer.start()
+
+    # Recovery
+
+    def _recover(self) -> None:
+        """Load the snapshot, then replay any journals written after it."""
+        if os.path.exists(self.file_path):
+            with open(self.file_path, "r", encoding="UTF-8") as file:
+                snapshot = json.load(file)
+            if "notes" not in snapshot:
+                # An old flat notes file in the nested data format, {category: {name: [record, ...]}}.
+                snapshot = {"notes": [[0, category, name, record]
+                                      for category, names in snapshot.items()
+                                      for name, records in names.items()
+                                      for record in records]}
+                for note_id, note in enumerate(snapshot["notes"], 1):
+                    note[0] = note_id
+            self.next_id = snapshot.get("next_id", 1)
+            for note_id, category, name, record in snapshot["notes"]:
+                self._apply({"op": "add", "id": note_id, "category": category, "name": name, "record": record})
+
+        # A crash during compaction can leave the old journal behind, whose entries the snapshot may already
+        # contain. Every entry has an explicit id and _apply() skips changes to notes that don't exist,
+        # so replaying them ends in the same state as the snapshot.
+        for path in (self.compacting_path, self.journal_path):
+            if os.path.exists(path):
+                self.journal_entries += self._replay(path)
+
+    def _replay(self, path: str) -> int:
+        """Apply every complete entry of a journal file.
+
+        Args:
+            path (str):
+                The path to the journal.
+
+        Returns:
+            int: The number of entries applied.
+        """
+        count = 0
+        with open(path, "r", encoding="UTF-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn write at the end of the journal from a crash; everything before it is intact.
+                    break
+                self._apply(entry)
+                count += 1
+        return count
+
+    def _apply(self, entry: dict) -> None:
+        """Apply one journal entry to the notes in memory."""
+        note_id = entry["id"]
+        old = self.notes.get(note_id)
+        if old is None and entry["op"] != "add":
+            # Replaying an old journal over a snapshot where the note has since been deleted.
+            return
+        if old is not None:
+            ids = self.names[old[0]][old[1]]
+            ids.remove(note_id)
+            if not ids:
+                del self.names[old[0]][old[1]]
+                self.sorted_names.pop(old[0], None)
+                if not self.names[old[0]]:
+                    del self.names[old[0]]
+
+        if entry["op"] == "delete":
+            self.notes.pop(note_id, None)
+            return
+
+        category = sys.intern(entry.get("category") or old[0])
+        name = entry.get("name") or old[1]
+        self.notes[note_id] = (category, name, CharacterRecord.from_dict(entry["record"]))
+        names = self.names.setdefault(category, {})
+        if name not in names:
+            self.sorted_names.pop(category, None)
+        ids = names.setdefault(name, [])
+        ids.append(note_id)
+        ids.sort()
+        self.next_id = max(self.next_id, note_id + 1)
+
+    # Journal
+
+    def _log(self, entry: dict) -> int:
+        """Apply an entry and append it to the journal. It becomes durable at the next group commit.
+
+        Returns:
+            int: The entry's number, to pass to _wait_for_commit().
+        """
+        with self.lock:
+            self._apply(entry)
+            self.journal.write(json.dumps(entry) + "\n")
+            self.pending += 1
+            self.logged += 1
+            sequence = self.logged
+            self.journal_entries += 1
+            if self.pending >= self.batch_size:
+                self.commit_condition.notify()
+            if self.journal_entries >= self.compact_after:
+                # Automatic, so a failure is kept for the next compact() or close() rather than raised from a save.
+                self._start_compaction()
+            return sequence
+
+    def _wait_for_commit(self, sequence: int) -> None:
+        """Wait until an entry from _log() has been fsynced, if the store is durable."""
+        if not self.durable:
+            return
+        with self.lock:
+            if self.synced >= sequence:
+                return
+            if not self.running:
+                self._fsync_journal()
+                return
+            # Wake the committer now rather than after commit_interval. Anything logged by other threads
+            # in the meantime goes into the same fsync.
+            self.commit_condition.notify()
+            while self.synced < sequence:
+                self.synced_condition.wait()
+
+    def _commit_loop(self) -> None:
+        """fsync the journal whenever changes have waited long enough or enough of them have piled up."""
+        with self.lock:
+            while self.running:
+                self.commit_condition.wait(self.commit_interval)
+                if self.pending:
+                    self._fsync_journal()
+
+    def _fsync_journal(self) -> None:
+        """Write out and fsync everything appended so far. Must be called with the lock held."""
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.pending = 0
+        self.synced = self.logged
+        self.synced_condition.notify_all()
+
+    def sync(self) -> None:
+        """Make every change so far durable right away, instead of waiting for the next group commit."""
+        with self.lock:
+            if self.pending:
+                self._fsync_journal()
+
+    # Compaction
+
+    def compact(self, wait: bool = False) -> None:
+        """Fold the journal into a new snapshot in the background. Saving keeps working while it runs.
+
+        Args:
+            wait (bool, optional):
+                Wait for the compaction to finish.
+                Defaults to False.
+
+        Raises:
+            RuntimeError: If an earlier compaction failed, or this one did while waiting for it. No changes are
+                lost: they stay in the journal and are folded in by this compaction or the next.
+        """
+        with self.lock:
+            error, self.compaction_error = self.compaction_error, None
+            compaction = self._start_compaction()
+
+        if wait:
+            compaction.join()
+            with self.lock:
+                error, self.compaction_error = self.compaction_error or error, None
+        if error is not None:
+            raise RuntimeError(f"Compacting {self.file_path} failed: {error}") from error
+
+    def _start_compaction(self) -> threading.Thread:
+        """Start a compaction unless one is already running. Must be called with the lock held.
+
+        Returns:
+            threading.Thread: The running compaction.
+        """
+        if self.compaction is not None and self.compaction.is_alive():
+            return self.compaction
+
+        # Start a fresh journal, so the old one only holds changes the snapshot will contain.
+        self._fsync_journal()
+        self.journal.close()
+        if os.path.exists(self.compacting_path):
+            # An earlier compaction failed before folding its journal in. Its changes may be nowhere else,
+            # so add this journal to the end of it rather than replacing it.
+            with open(self.journal_path, "r", encoding="UTF-8") as journal, \
+                    open(self.compacting_path, "a", encoding="UTF-8") as compacting:
+                shutil.copyfileobj(journal, compacting)
+                compacting.flush()
+                os.fsync(compacting.fileno())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.compacting_path)
+        self.journal = open(self.journal_path, "a", encoding="UTF-8")
+        self.journal_entries = 0
+
+        # Records are never changed in place, only replaced, so a shallow copy is a consistent snapshot.
+        notes = list(self.notes.items())
+        self.compaction = threading.Thread(target=self._compact_in_background, args=(notes, self.next_id),
+                                           daemon=True)
+        self.compaction.start()
+        return self.compaction
+
+    def _compact_in_background(self, notes: list[tuple[int, tuple[str, str, CharacterRecord]]],
+                               next_id: int) -> None:
+        """Write a snapshot, keeping any error for compact() or close() to report."""
+        try:
+            self._write_snapshot(notes, next_id)
+        except Exception as exception:  # pylint: disable=broad-except
+            # The folded journal is left in place, so nothing is lost; the next compaction adds to it.
+            with self.lock:
+                self.compaction_error = exception
+
+    def _write_snapshot(self, notes: list[tuple[int, tuple[str, str, CharacterRecord]]], next_id: int) -> None:
+        """Write a snapshot next to the old one, then swap it in atomically and drop the folded journal."""
+        temporary_path = self.file_path + ".tmp"
+        notes = [[note_id, category, name, record.to_dict()] for note_id, (category, name, record) in notes]
+        with open(temporary_path, "w", encoding="UTF-8") as file:
+            json.dump({"next_id": next_id, "notes": notes}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.file_path)
+
+        # Make the rename itself durable where the platform allows it.
+        if hasattr(os, "O_DIRECTORY"):
+            directory = os.open(os.path.dirname(os.path.abspath(self.file_path)), os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        os.remove(self.compacting_path)
+
+    # Writing
+
+    def add_note(self, category: str, name: str, record: dict) -> int:
+        """Add a note.
+
+        Args:
+            category (str):
+                The category of the note, such as "Characters".
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note itself.
+
+        Returns:
+            int: The id of the new note.
+        """
+        with self.lock:
+            note_id = self.next_id
+            sequence = self._log({"op": "add", "id": note_id, "category": category, "name": name, "record": record})
+        self._wait_for_commit(sequence)
+        return note_id
+
+    def add_notes(self, notes: list[tuple[str, str, dict]]) -> list[int]:
+        """Add several notes.
+
+        Args:
+            notes (list[tuple[str, str, dict]]):
+                The (category, name, record) of each note.
+
+        Returns:
+            list[int]: The ids of the new notes, in order.
+        """
+        note_ids = []
+        sequence = 0
+        with self.lock:
+            # Logged together and waited on once, so the whole batch shares an fsync.
+            for category, name, record in notes:
+                note_ids.append(self.next_id)
+                sequence = self._log({"op": "add", "id": self.next_id, "category": category, "name": name,
+                                      "record": record})
+        self._wait_for_commit(sequence)
+        return note_ids
+
+    def restore_note(self, note_id: int, category: str, name: str, record: dict) -> bool:
+        """Put back a deleted note under its old id, such as when undoing a delete.
+
+        Args:
+            note_id (int):
+                The id the note had.
+            category (str):
+                The category of the note.
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note itself.
+
+        Returns:
+            bool: True if the note was put back, False if the id is already in use.
+        """
+        with self.lock:
+            if note_id in self.notes:
+                return False
+            sequence = self._log({"op": "add", "id": note_id, "category": category, "name": name, "record": record})
+        self._wait_for_commit(sequence)
+        return True
+
+    def update_note(self, note_id: int, record: dict, category: str | None = None, name: str | None = None) -> bool:
+        """Replace a note.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            record (dict):
+                The new contents of the note.
+            category (str | None, optional):
+                The new category of the note.
+                Defaults to None, unchanged.
+            name (str | None, optional):
+                The new name of the note.
+                Defaults to None, unchanged.
+
+        Returns:
+            bool: True if the note existed.
+        """
+        with self.lock:
+            if note_id not in self.notes:
+                return False
+            sequence = self._log({"op": "update", "id": note_id, "category": category, "name": name,
+                                  "record": record})
+        self._wait_for_commit(sequence)
+        return True
+
+    def delete_note(self, note_id: int) -> bool:
+        """Delete a note.
+
+        Args:
+            note_id (int):
+                The id of the note.
+
+        Returns:
+            bool: True if the note existed.
+        """
+        with self.lock:
+            if note_id not in self.notes:
+                return False
+            sequence = self._log({"op": "delete", "id": note_id})
+        self._wait_for_commit(sequence)
+        return True
+
+    # Reading
+
+    def get_note(self, note_id: int) -> tuple[str, str, dict] | None:
+        """Return a note by its id.
+
+        Args:
+            note_id (int):
+                The id of the note.
+
+        Returns:
+            tuple[str, str, dict] | None: The (category, name, record) of the note, or None if it doesn't exist.
+        """
+        note = self.notes.get(note_id)
+        if note is None:
+            return None
+        return note[0], note[1], note[2].to_dict()
+
+    def get_notes(self, category: str, name: str) -> list[tuple[int, dict]]:
+        """Return every note filed under a category and name, oldest first.
+
+        Args:
+            category (str):
+                The category of the notes.
+            name (str):
+                The name the notes are filed under.
+
+        Returns:
+            list[tuple[int, dict]]: The (id, record) of each note.
+        """
+        with self.lock:
+            return [(note_id, self.notes[note_id][2].to_dict())
+                    for note_id in self.names.get(category, {}).get(name, [])]
+
+    def list_categories(self) -> list[str]:
+        """Return every category that has notes.
+
+        Returns:
+            list[str]: The categories, sorted.
+        """
+        return sorted(self.names)
+
+    def list_names(self, category: str) -> list[str]:
+        """Return every name in a category.
+
+        Args:
+            category (str):
+                The category.
+
+        Returns:
+            list[str]: The names, sorted.
+        """
+        return list(self._sorted_names(category))
+
+    def _sorted_names(self, category: str) -> list[str]:
+        """Return the names of a category, sorted, sorting them again only if they've changed."""
+        with self.lock:
+            names = self.sorted_names.get(category)
+            if names is None:
+                names = self.sorted_names[category] = sorted(self.names.get(category, {}))
+            return names
+
+    def count(self, category: str | None = None) -> int:
+        """Return the number of notes.
+
+        Args:
+            category (str | None, optional):
+                Only count the notes in this category.
+                Defaults to None, every note.
+
+        Returns:
+            int: The number of notes.
+        """
+        if category is None:
+            return len(self.notes)
+        return sum(len(ids) for ids in self.names.get(category, {}).values())
+
+    def iter_notes(self, category: str | None = None) -> Iterator[tuple[int, str, str, dict]]:
+        """Go through the notes one at a time.
+
+        Args:
+            category (str | None, optional):
+                Only go through the notes in this category.
+                Defaults to None, every note.
+
+        Yields:
+            tuple[int, str, str, dict]: The (id, category, name, record) of each note.
+        """
+        for note_id, note_category, name, record in self.iter_records(category):
+            yield note_id, note_category, name, record.to_dict()
+
+    def iter_records(self, category: str | None = None) -> Iterator[tuple[int, str, str, CharacterRecord]]:
+        """Same as iter_notes(), but gives the compact records as they are kept, without converting them to dicts.
+
+        Args:
+            category (str | None, optional):
+                Only go through the notes in this category.
+                Defaults to None, every note.
+
+        Yields:
+            tuple[int, str, str, CharacterRecord]: The (id, category, name, record) of each note.
+        """
+        if category is None:
+            for note_id in sorted(self.notes):
+                note = self.notes.get(note_id)
+                if note is not None:
+                    yield note_id, *note
+            return
+        for name in self.list_names(category):
+            with self.lock:
+                note_ids = list(self.names.get(category, {}).get(name, []))
+            for note_id in note_ids:
+                note = self.notes.get(note_id)
+                if note is not None:
+                    yield note_id, category, name, note[2]
+
+    def page_records(self, category: str, after: tuple[str, int] | None = None,
+                     limit: int = 50) -> list[tuple[int, str, CharacterRecord]]:
+        """Return one page of a category's notes, ordered by name then id.
+        Pages are found by the last note of the page before rather than by offset, so they stay put when
+        notes before them are added or deleted.
+
+        Args:
+            category (str):
+                The category.
+            after (tuple[str, int] | None, optional):
+                The (name, id) of the last note of the previous page.
+                Defaults to None, the first page.
+            limit (int, optional):
+                The most notes to return.
+                Defaults to 50.
+
+        Returns:
+            list[tuple[int, str, CharacterRecord]]: The (id, name, record) of each note.
+        """
+        page = []
+        with self.lock:
+            names = self._sorted_names(category)
+            category_names = self.names.get(category, {})
+            start = 0 if after is None else bisect_left(names, after[0])
+            for i in range(start, len(names)):
+                name = names[i]
+                for note_id in category_names[name]:
+                    if after is not None and name == after[0] and note_id <= after[1]:
+                        continue
+                    page.append((note_id, name, self.notes[note_id][2]))
+                    if len(page) >= limit:
+                        return page
+        return page
+
+    # Converting
+
+    def to_data(self) -> dict:
+        """Return every note in NoteMaster's nested data format, {category: {name: [record, ...]}}.
+
+        Returns:
+            dict: The notes.
+        """
+        data = {}
+        for _, category, name, record in self.iter_notes():
+            data.setdefault(category, {}).setdefault(name, []).append(record)
+        return data
+
+    def import_data(self, data: dict) -> int:
+        """Add every note from NoteMaster's nested data format.
+
+        Args:
+            data (dict):
+                The notes, {category: {name: [record, ...]}}.
+
+        Returns:
+            int: The number of notes added.
+        """
+        notes = [(category, name, record)
+                 for category, names in data.items()
+                 for name, records in names.items()
+                 for record in records]
+        return len(self.add_notes(notes))
+
+    def estimated_memory(self, sample_size: int = 64) -> int:
+        """Return roughly how many bytes the notes take up in memory, measured on a sample of them.
+
+        Args:
+            sample_size (int, optional):
+                How many notes to measure.
+                Defaults to 64.
+
+        Returns:
+            int: The estimate, in bytes.
+        """
+        with self.lock:
+            sample = list(islice(self.notes.values(), sample_size))
+            count = len(self.notes)
+        if not sample:
+            return 0
+
+        total = 0
+        for _, name, record in sample:
+            # Races and locations are shared between notes, so they aren't counted per note.
+            total += sys.getsizeof(name) + sys.getsizeof(record) + sys.getsizeof(record.notes)
+            total += sum(sys.getsizeof(value) for value in (record.date_met, record.name_title, record.last_seen_time,
+                                                            record.description, *record.notes))
+        # Plus the tuple holding each note and its entries in the lookup dicts.
+        return (total // len(sample) + 200) * count
+
+    def close(self) -> None:
+        """Make every change durable, finish any compaction and close the journal.
+
+        Raises:
+            RuntimeError: If a background compaction failed. The store is still closed, and its changes are
+                kept in the journal.
+        """
+        with self.lock:
+            self.running = False
+            self.commit_condition.notify()
+        self.committer.join()
+        if self.compaction is not None:
+            self.compaction.join()
+        with self.lock:
+            self._fsync_journal()
+            self.journal.close()
+            error, self.compaction_error = self.compaction_error, None
+        if error is not None:
+            raise RuntimeError(f"Compacting {self.file_path} failed: {error}") from error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
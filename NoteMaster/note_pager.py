@@ -0,0 +1,167 @@
+"""
+File: note_pager.py
+Desc: Pages through a category of notes a page at a time, so listing a huge category only ever loads what is
+      on screen plus a little ahead, instead of every note in it.
+"""
+from collections import OrderedDict
+
+from note_records import CharacterRecord
+
+
+class NotePager:
+    """A paged, lazily loaded listing of one category's notes, ordered by name then id."""
+
+    def __init__(self, store, category: str, page_size: int = 20, prefetch: int = 1, max_pages: int = 16) -> None:
+        """Initialize the NotePager object. Nothing is loaded until a page is asked for.
+
+        Args:
+            store (NoteStore | JournaledNoteStore):
+                The store the notes are in.
+            category (str):
+                The category to list.
+            page_size (int, optional):
+                The number of notes per page.
+                Defaults to 20.
+            prefetch (int, optional):
+                The number of pages after the one asked for to load along with it, so paging forward doesn't
+                wait on the store.
+                Defaults to 1.
+            max_pages (int, optional):
+                The most pages kept loaded at once.
+                Defaults to 16.
+        """
+        self.store = store
+        self.category = category
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.max_pages = max_pages
+
+        # page number -> the (name, id) of the note just before it. Pages are loaded from these cursors
+        # rather than offsets, so a page stays valid when notes before it are added or deleted.
+        self.cursors: list[tuple[str, int] | None] = [None]
+        self.pages: OrderedDict[int, list[tuple[int, str, CharacterRecord]]] = OrderedDict()
+        self.note_count: int | None = None
+
+    def count(self) -> int:
+        """Return the number of notes in the category.
+
+        Returns:
+            int: The number of notes.
+        """
+        if self.note_count is None:
+            self.note_count = self.store.count(self.category)
+        return self.note_count
+
+    def page_count(self) -> int:
+        """Return the number of pages.
+
+        Returns:
+            int: The number of pages, at least 1.
+        """
+        return max((self.count() + self.page_size - 1) // self.page_size, 1)
+
+    def get_page(self, page_number: int) -> list[tuple[int, str, CharacterRecord]]:
+        """Return a page of notes, loading it (and the pages after it) if needed.
+
+        Args:
+            page_number (int):
+                The page, starting from 0.
+
+        Returns:
+            list[tuple[int, str, CharacterRecord]]: The (id, name, record) of each note on the page.
+                Empty past the last page.
+        """
+        page = self.pages.get(page_number)
+        if page is not None:
+            self.pages.move_to_end(page_number)
+            return page
+
+        # Pages can only be found from the cursor of the page before, so walk forward from the nearest known one.
+        known = len(self.cursors) - 1
+        while known < page_number:
+            self._load(known)
+            if len(self.cursors) - 1 <= known:
+                # The category ended before the page asked for.
+                return []
+            known = len(self.cursors) - 1
+        if page_number not in self.pages:
+            self._load(page_number)
+        return self.pages.get(page_number, [])
+
+    def _load(self, page_number: int) -> None:
+        """Load a page and the prefetched pages after it with a single store query."""
+        notes = self.store.page_records(self.category, self.cursors[page_number],
+                                        self.page_size * (self.prefetch + 1))
+        for i in range(0, max(len(notes), 1), self.page_size):
+            page = notes[i:i + self.page_size]
+            number = page_number + i // self.page_size
+            self.pages[number] = page
+            self.pages.move_to_end(number)
+
+            cursor = (page[-1][1], page[-1][0]) if len(page) == self.page_size else None
+            if number + 1 < len(self.cursors) and self.cursors[number + 1] == cursor:
+                continue
+            # Where the next page starts has moved (or the category ends here), so the pages after it are stale.
+            del self.cursors[number + 1:]
+            for stale in [stale for stale in self.pages if stale > number]:
+                del self.pages[stale]
+            if cursor is not None:
+                self.cursors.append(cursor)
+        self.pages.move_to_end(page_number)
+
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+
+    def get_row(self, index: int) -> tuple[int, str, CharacterRecord] | None:
+        """Return a single note by its position in the listing.
+
+        Args:
+            index (int):
+                The position of the note, starting from 0.
+
+        Returns:
+            tuple[int, str, CharacterRecord] | None: The (id, name, record) of the note, or None past the end.
+        """
+        page = self.get_page(index // self.page_size)
+        offset = index % self.page_size
+        return page[offset] if offset < len(page) else None
+
+    def line_provider(self, index: int) -> str | None:
+        """Return a note as a line of text, for use as a Viewport's line provider.
+
+        Args:
+            index (int):
+                The position of the note, starting from 0.
+
+        Returns:
+            str | None: The line, or None past the end.
+        """
+        row = self.get_row(index)
+        if row is None:
+            return None
+        return self.format_row(*row)
+
+    @staticmethod
+    def format_row(note_id: int, name: str, record: CharacterRecord) -> str:
+        """Return a short one-line summary of a note.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            name (str):
+                The name the note is filed under.
+            record (CharacterRecord):
+                The note.
+
+        Returns:
+            str: The summary.
+        """
+        details = ", ".join(value for value in (record.race, record.last_seen_location) if value)
+        return f"{name} - {details}" if details else name
+
+    def invalidate(self) -> None:
+        """Forget the loaded pages after notes have been changed.
+        Known cursors are kept, so the page being looked at stays where it is instead of jumping.
+        """
+        self.pages.clear()
+        self.note_count = None
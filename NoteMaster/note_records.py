@@ -0,0 +1,133 @@
+"""
+File: note_records.py
+Desc: Compact record types for NoteMaster's notes. Each record keeps its fields in __slots__ instead of a dict,
+      and values that repeat across a campaign (races, locations) share one interned string.
+"""
+import sys
+
+
+# The dict key of each field, and the attribute it is kept in.
+FIELDS = {
+    "Date Met": "date_met",
+    "Name/Title": "name_title",
+    "Last Seen Time": "last_seen_time",
+    "Last Seen Location": "last_seen_location",
+    "Race": "race",
+    "Description": "description",
+}
+
+# Fields whose values mostly come from a small set, so every record can share the same string.
+INTERNED_FIELDS = ("last_seen_location", "race")
+
+
+def intern_value(value: str) -> str:
+    """Return the shared copy of a repeated string, such as a race or location.
+
+    Args:
+        value (str):
+            The string.
+
+    Returns:
+        str: An equal string shared with every other record that uses it.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class CharacterRecord:
+    """A single note about a character, with the same fields as NoteMaster's record dicts."""
+
+    __slots__ = (*FIELDS.values(), "notes", "extra")
+
+    def __init__(self, date_met: str = "", name_title: str = "", last_seen_time: str = "",
+                 last_seen_location: str = "", race: str = "", description: str = "",
+                 notes: tuple[str, ...] = (), extra: dict | None = None) -> None:
+        """Initialize the CharacterRecord object.
+
+        Args:
+            date_met (str, optional):
+                When the character was met.
+                Defaults to "".
+            name_title (str, optional):
+                The character's full name or title.
+                Defaults to "".
+            last_seen_time (str, optional):
+                When the character was last seen.
+                Defaults to "".
+            last_seen_location (str, optional):
+                Where the character was last seen.
+                Defaults to "".
+            race (str, optional):
+                The character's race.
+                Defaults to "".
+            description (str, optional):
+                A description of the character.
+                Defaults to "".
+            notes (tuple[str, ...], optional):
+                Any extra notes.
+                Defaults to ().
+            extra (dict | None, optional):
+                Any fields the record has that aren't listed above, kept so nothing is lost when converting.
+                Defaults to None.
+        """
+        self.date_met = date_met
+        self.name_title = name_title
+        self.last_seen_time = last_seen_time
+        self.last_seen_location = intern_value(last_seen_location)
+        self.race = intern_value(race)
+        self.description = description
+        self.notes = tuple(notes)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, record: dict) -> "CharacterRecord":
+        """Make a record from NoteMaster's record dict format.
+
+        Args:
+            record (dict):
+                The record, such as {"Date Met": "01-01-1970", "Race": "Human", "Notes": [], ...}.
+
+        Returns:
+            CharacterRecord: The record.
+        """
+        extra = {key: value for key, value in record.items() if key not in FIELDS and key != "Notes"}
+        return cls(*(record.get(key, "") for key in FIELDS), notes=record.get("Notes", ()), extra=extra)
+
+    def to_dict(self) -> dict:
+        """Convert the record back into NoteMaster's record dict format.
+
+        Returns:
+            dict: The record, as a new dict.
+        """
+        record = {key: getattr(self, attribute) for key, attribute in FIELDS.items()}
+        record["Notes"] = list(self.notes)
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    def get(self, key: str, default=None):
+        """Look up a field by its dict key, so a record can be read like the dict it came from.
+
+        Args:
+            key (str):
+                The dict key of the field, such as "Race".
+            default (optional):
+                What to return if the record doesn't have the field.
+                Defaults to None.
+
+        Returns:
+            The value of the field.
+        """
+        attribute = FIELDS.get(key)
+        if attribute is not None:
+            return getattr(self, attribute)
+        if key == "Notes":
+            return list(self.notes)
+        return self.extra.get(key, default) if self.extra else default
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CharacterRecord):
+            return NotImplemented
+        return all(getattr(self, attribute) == getattr(other, attribute) for attribute in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"CharacterRecord({self.name_title!r}, race={self.race!r}, location={self.last_seen_location!r})"
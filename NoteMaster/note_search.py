@@ -0,0 +1,476 @@
+"""
+File: note_search.py
+Desc: An in-memory inverted index over NoteMaster's notes, kept up to date as notes are added, edited and deleted.
+      Supports prefix and phrase queries and ranks results with BM25.
+"""
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Iterable, Iterator
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(string: str) -> list[str]:
+    """Split a string into lowercase search terms.
+
+    Args:
+        string (str):
+            The string to split.
+
+    Returns:
+        list[str]: The terms, in order.
+    """
+    return TOKEN_PATTERN.findall(string.lower())
+
+
+class NoteSearchIndex:
+    """A full-text index of notes, looked up by note id."""
+
+    # The fields that are indexed, and how much a match in each one counts for.
+    field_weights = {
+        "Name": 3.0,
+        "Name/Title": 3.0,
+        "Race": 1.5,
+        "Last Seen Location": 1.5,
+        "Description": 1.0,
+        "Notes": 1.0,
+    }
+
+    # BM25 tuning.
+    k1 = 1.2
+    b = 0.75
+
+    # How far the average note length can move before it is updated, which re-sorts every term's notes.
+    average_drift = 0.1
+
+    # How many phrases' matching notes are remembered between searches, such as while typing after a phrase.
+    phrase_cache_size = 64
+
+    def __init__(self) -> None:
+        """Initialize the NoteSearchIndex object."""
+        # term -> {note id -> (field-weighted frequency, positions)}
+        # Only tuples, so the garbage collector stops tracking them and doesn't go through millions of postings.
+        self.postings: dict[str, dict[int, tuple[float, tuple[int, ...]]]] = {}
+        # Every term in the index, sorted, for prefix lookups.
+        self.terms: list[str] = []
+        # note id -> the terms it contains and its length, for removing and ranking.
+        self.note_terms: dict[int, tuple[str, ...]] = {}
+        self.note_lengths: dict[int, int] = {}
+        self.total_length = 0
+        # The average note length used for ranking. Only updated once it has drifted by average_drift.
+        self.average_length = 1.0
+        # term -> the ids of the notes containing it, best match first, so searches can stop after the top few.
+        self.impact_orders: dict[str, list[int]] = {}
+        # phrase -> the ids of the notes containing it. Forgotten whenever a note changes.
+        self.phrase_matches: dict[tuple[str, ...], set[int]] = {}
+
+    # Updating
+
+    def build(self, notes: Iterable[tuple[int, str, str, dict]]) -> None:
+        """Index many notes at once, such as all of NoteStore.iter_notes().
+
+        Args:
+            notes (Iterable[tuple[int, str, str, dict]]):
+                The (id, category, name, record) of each note.
+        """
+        for note_id, _, name, record in notes:
+            self.add(note_id, name, record)
+        # Sort every term's notes now, so the first searches don't have to.
+        for term in self.postings:
+            self._impact_order(term)
+
+    def add(self, note_id: int, name: str, record: dict) -> None:
+        """Index a note. If the note is already indexed, it is replaced.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note.
+        """
+        if note_id in self.note_terms:
+            self.remove(note_id)
+
+        fields = dict(record, Name=name)
+        positions: dict[str, list[int]] = {}
+        frequencies: dict[str, float] = {}
+        length = 0
+        start = 0
+        for field, weight in self.field_weights.items():
+            value = fields.get(field, "")
+            if isinstance(value, list):
+                value = "\n".join(str(item) for item in value)
+            terms = tokenize(str(value))
+            length += len(terms)
+            for position, term in enumerate(terms, start):
+                positions.setdefault(term, []).append(position)
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+            # Leave a gap of one position after each field, so a phrase can never match across two fields.
+            start += len(terms) + 1
+
+        for term, term_positions in positions.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                insort(self.terms, term)
+            postings[note_id] = (frequencies[term], tuple(term_positions))
+
+        self.phrase_matches.clear()
+        self.note_terms[note_id] = tuple(positions)
+        self.note_lengths[note_id] = length
+        self.total_length += length
+        self._update_average()
+
+        for term in positions:
+            order = self.impact_orders.get(term)
+            if order is not None:
+                insort(order, note_id, key=self._order_key(term))
+
+    def update(self, note_id: int, name: str, record: dict) -> None:
+        """Re-index a note that has been edited. Same as add().
+
+        Args:
+            note_id (int):
+                The id of the note.
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note.
+        """
+        self.add(note_id, name, record)
+
+    def remove(self, note_id: int) -> None:
+        """Remove a note from the index. Does nothing if it isn't indexed.
+
+        Args:
+            note_id (int):
+                The id of the note.
+        """
+        terms = self.note_terms.pop(note_id, None)
+        if terms is None:
+            return
+        self.phrase_matches.clear()
+
+        for term in terms:
+            order = self.impact_orders.get(term)
+            if order is not None:
+                # The note's place in the order depends on its postings, so find it before they're gone.
+                key = self._order_key(term)
+                del order[bisect_left(order, key(note_id), key=key)]
+
+            postings = self.postings[term]
+            del postings[note_id]
+            if not postings:
+                del self.postings[term]
+                self.impact_orders.pop(term, None)
+                del self.terms[bisect_left(self.terms, term)]
+
+        self.total_length -= self.note_lengths.pop(note_id)
+        self._update_average()
+
+    def _update_average(self) -> None:
+        """Update the average note length if it has drifted too far, and forget the orders that depended on it."""
+        average = max(self.total_length / len(self.note_terms), 1.0) if self.note_terms else 1.0
+        if abs(average - self.average_length) > self.average_drift * self.average_length:
+            self.average_length = average
+            self.impact_orders.clear()
+
+    # Searching
+
+    def expand_prefix(self, prefix: str, limit: int | None = None) -> list[str]:
+        """Return the indexed terms starting with a prefix.
+
+        Args:
+            prefix (str):
+                The start of the terms.
+            limit (int | None, optional):
+                The most terms to return.
+                Defaults to None, every matching term.
+
+        Returns:
+            list[str]: The matching terms, alphabetically.
+        """
+        matches = []
+        for i in range(bisect_left(self.terms, prefix), len(self.terms)):
+            if not self.terms[i].startswith(prefix) or (limit is not None and len(matches) >= limit):
+                break
+            matches.append(self.terms[i])
+        return matches
+
+    @staticmethod
+    def parse_query(query: str, prefix_last: bool) -> tuple[list[list[str]], list[str]]:
+        """Split a query into phrases and (possibly prefix) terms.
+
+        Args:
+            query (str):
+                The query. Quoted parts are phrases, and words ending with * are prefixes.
+            prefix_last (bool):
+                Treat the last word as a prefix too, for searching as the user types.
+
+        Returns:
+            tuple[list[list[str]], list[str]]: The phrases, and the single terms (prefixes end with *).
+        """
+        phrases = [tokenize(phrase) for phrase in re.findall(r'"([^"]*)"', query)]
+        phrases = [phrase for phrase in phrases if phrase]
+
+        rest = re.sub(r'"[^"]*"?', " ", query)
+        words = [(term + "*" if word.endswith("*") else term)
+                 for word in rest.split() for term in tokenize(word)]
+        if prefix_last and words and not query.endswith((" ", '"')) and not words[-1].endswith("*"):
+            words[-1] += "*"
+        return phrases, words
+
+    def search(self, query: str, limit: int = 20, prefix_last: bool = True,
+               should_cancel: callable = None) -> list[tuple[int, float]] | None:
+        """Find the notes matching every term and phrase of a query, best matches first.
+
+        Walks each term's notes from the best match down and stops once nothing further down could make the
+        top results (Fagin's threshold algorithm), so common terms and short prefixes cost about as much as rare
+        ones. Queries whose terms are common but rarely appear together fall back to intersecting every match.
+
+        Args:
+            query (str):
+                The query. Quoted parts are phrases, and words ending with * are prefixes.
+            limit (int, optional):
+                The most results to return.
+                Defaults to 20.
+            prefix_last (bool, optional):
+                Treat the last word as a prefix, for searching as the user types.
+                Defaults to True.
+            should_cancel (callable, optional):
+                Checked between steps; if it returns True the search stops early.
+                Defaults to None.
+
+        Returns:
+            list[tuple[int, float]] | None: The (id, score) of the best matches, or None if the search was cancelled.
+                A note matching several terms of a prefix is ranked on the best of them.
+        """
+        phrases, words = self.parse_query(query, prefix_last)
+        if not phrases and not words:
+            return []
+
+        # Each requirement is a group of terms, any of which satisfies it.
+        groups = []
+        for word in words:
+            groups.append(self.expand_prefix(word[:-1]) if word.endswith("*") else [word])
+        for phrase in phrases:
+            groups.extend([term] for term in phrase)
+
+        # The idf of each term of each group, rarest group first.
+        weights = [{term: self._idf(term) for term in group if term in self.postings} for group in groups]
+        if not all(weights):
+            return []
+        weights.sort(key=self._group_size)
+
+        # Single words in quotes are already groups; longer phrases narrow the notes down further.
+        phrase_notes = None
+        for phrase in phrases:
+            if len(phrase) < 2:
+                continue
+            if should_cancel is not None and should_cancel():
+                return None
+            matches = self._phrase_notes(phrase)
+            phrase_notes = matches if phrase_notes is None else phrase_notes & matches
+            if not phrase_notes:
+                return []
+
+        streams = [self._group_stream(group) for group in weights]
+        bounds = [0.0] * len(streams)
+        best: list[tuple[float, int]] = []
+        seen = set()
+        # Past this many notes, intersecting the groups' notes is cheaper than carrying on.
+        budget = self._group_size(weights[0]) if phrase_notes is None else len(phrase_notes)
+        rounds = 0
+        while True:
+            rounds += 1
+            if rounds % 64 == 0 and should_cancel is not None and should_cancel():
+                return None
+
+            for i, stream in enumerate(streams):
+                item = next(stream, None)
+                if item is None:
+                    # Every note with this group's terms has been looked at, so every match has been found.
+                    return [(note_id, score) for score, note_id in sorted(best, reverse=True)]
+                bounds[i], note_id = item
+                if note_id in seen:
+                    continue
+                seen.add(note_id)
+                if phrase_notes is not None and note_id not in phrase_notes:
+                    continue
+                score = self._note_score(note_id, weights)
+                if score is None:
+                    continue
+                if len(best) < limit:
+                    heapq.heappush(best, (score, note_id))
+                elif (score, note_id) > best[0]:
+                    heapq.heapreplace(best, (score, note_id))
+
+            # No note that hasn't been seen can score more than the sum of where each group has got to.
+            if len(best) >= limit and best[0][0] > sum(bounds):
+                return [(note_id, score) for score, note_id in sorted(best, reverse=True)]
+            if len(seen) > budget:
+                break
+
+        return self._search_all(weights, phrase_notes, limit, should_cancel)
+
+    def _search_all(self, weights: list[dict[str, float]], phrase_notes: set[int] | None, limit: int,
+                    should_cancel: callable) -> list[tuple[int, float]] | None:
+        """Find the best matches by intersecting the notes of every group and scoring all of them."""
+        if phrase_notes is not None:
+            # The notes with the phrases are usually far fewer than any group's, so they are just checked one by one.
+            candidates = phrase_notes
+        else:
+            candidates = None
+            for group in weights:
+                if should_cancel is not None and should_cancel():
+                    return None
+                if candidates is not None and len(candidates) < self._group_size(group):
+                    # Few notes are left, so checking their terms is cheaper than gathering the group's notes.
+                    matches = {note_id for note_id in candidates
+                               if not group.keys().isdisjoint(self.note_terms[note_id])}
+                else:
+                    matches = self._group_notes(group)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+
+        if should_cancel is not None and should_cancel():
+            return None
+        scores = ((self._note_score(note_id, weights), note_id) for note_id in candidates)
+        best = heapq.nlargest(limit, (item for item in scores if item[0] is not None))
+        return [(note_id, score) for score, note_id in best]
+
+    def _group_size(self, group: Iterable[str]) -> int:
+        """Return the number of postings of a group of terms."""
+        return sum(len(self.postings.get(term, ())) for term in group)
+
+    def _group_notes(self, group: Iterable[str]) -> set[int]:
+        """Return the ids of the notes containing any term of a group."""
+        notes = set()
+        for term in group:
+            notes.update(self.postings.get(term, ()))
+        return notes
+
+    def _idf(self, term: str) -> float:
+        """Return how rare a term is, scaled for BM25."""
+        count = len(self.postings[term])
+        return math.log(1 + (len(self.note_terms) - count + 0.5) / (count + 0.5)) * (self.k1 + 1)
+
+    def _impact(self, term: str, note_id: int) -> float:
+        """Return how strongly a note matches a term, before the term's idf is applied."""
+        frequency = self.postings[term][note_id][0]
+        length = self.note_lengths[note_id] / self.average_length
+        return frequency / (frequency + self.k1 * (1 - self.b + self.b * length))
+
+    def _order_key(self, term: str) -> callable:
+        """Return the sort key of a term's impact order: best match first, then by id."""
+        return lambda note_id: (-self._impact(term, note_id), note_id)
+
+    def _impact_order(self, term: str) -> list[int]:
+        """Return the ids of the notes containing a term, best match first."""
+        order = self.impact_orders.get(term)
+        if order is None:
+            order = self.impact_orders[term] = sorted(self.postings[term], key=self._order_key(term))
+        return order
+
+    def _group_stream(self, group: dict[str, float]) -> Iterator[tuple[float, int]]:
+        """Yield the (score, id) of the notes containing the terms of a group, best first.
+
+        A note containing several of the terms comes up once for each, first with its best score.
+        """
+        impact = self._impact
+        heap = []
+        for term, idf in group.items():
+            order = self._impact_order(term)
+            heap.append((-idf * impact(term, order[0]), order[0], term, 0))
+        heapq.heapify(heap)
+
+        while heap:
+            negative_score, note_id, term, index = heap[0]
+            yield -negative_score, note_id
+            order = self.impact_orders[term]
+            index += 1
+            if index < len(order):
+                heapq.heapreplace(heap, (-group[term] * impact(term, order[index]), order[index], term, index))
+            else:
+                heapq.heappop(heap)
+
+    def _note_score(self, note_id: int, weights: list[dict[str, float]]) -> float | None:
+        """Return a note's BM25 score for a query, or None if it doesn't match every group."""
+        terms = self.note_terms[note_id]
+        length_part = self.k1 * (1 - self.b + self.b * self.note_lengths[note_id] / self.average_length)
+        total = 0.0
+        for group in weights:
+            # Find the group's best term in the note, looking up whichever is shorter: the group's terms, or the note's.
+            # A note matching several terms of a prefix only counts its best one.
+            best = None
+            if len(group) <= len(terms):
+                for term, idf in group.items():
+                    posting = self.postings[term].get(note_id)
+                    if posting is not None:
+                        score = idf * posting[0] / (posting[0] + length_part)
+                        if best is None or score > best:
+                            best = score
+            else:
+                for term in terms:
+                    idf = group.get(term)
+                    if idf is not None:
+                        frequency = self.postings[term][note_id][0]
+                        score = idf * frequency / (frequency + length_part)
+                        if best is None or score > best:
+                            best = score
+            if best is None:
+                return None
+            total += best
+        return total
+
+    def _phrase_notes(self, phrase: list[str]) -> set[int]:
+        """Return the ids of the notes containing a phrase, remembering them for the next search."""
+        key = tuple(phrase)
+        matches = self.phrase_matches.get(key)
+        if matches is None:
+            matches = self._find_phrase(phrase)
+            if len(self.phrase_matches) >= self.phrase_cache_size:
+                del self.phrase_matches[next(iter(self.phrase_matches))]
+            self.phrase_matches[key] = matches
+        return matches
+
+    def _find_phrase(self, phrase: list[str]) -> set[int]:
+        """Return the ids of the notes containing a phrase, checking only the notes with its rarest term."""
+        anchor = min(range(len(phrase)), key=lambda i: len(self.postings[phrase[i]]))
+        # The other terms' postings, and how far each one comes after the rarest term.
+        others = [(self.postings[term], i - anchor) for i, term in enumerate(phrase) if i != anchor]
+
+        matches = set()
+        for note_id, (_, starts) in self.postings[phrase[anchor]].items():
+            for postings, offset in others:
+                posting = postings.get(note_id)
+                if posting is None:
+                    break
+                positions = posting[1]
+                starts = [start for start in starts if start + offset in positions]
+                if not starts:
+                    break
+            else:
+                matches.add(note_id)
+        return matches
+
+    def estimated_memory(self) -> int:
+        """Return roughly how many bytes the index takes up in memory.
+
+        Returns:
+            int: The estimate, in bytes.
+        """
+        posting_count = sum(len(postings) for postings in self.postings.values())
+        ordered_count = sum(len(order) for order in self.impact_orders.values())
+        # Each posting is a dict entry holding a tuple and a list of positions, plus a slot in the term's order;
+        # each term and note adds a few more.
+        return posting_count * 200 + ordered_count * 8 + len(self.terms) * 150 + len(self.note_terms) * 250
+
+    def __len__(self) -> int:
+        return len(self.note_terms)
@@ -0,0 +1,348 @@
+"""
+File: note_store.py
+Desc: Keeps NoteMaster's notes in an indexed SQLite file, so a single note can be saved or looked up
+      without reading or rewriting the rest of the campaign.
+"""
+import json
+import sqlite3
+from typing import Iterator
+
+from note_records import CharacterRecord
+
+
+class NoteStore:
+    """An on-disk store of notes, keyed by category and name."""
+
+    def __init__(self, file_path: str = "notes.db") -> None:
+        """Open the store, creating the file if it doesn't exist yet.
+
+        Args:
+            file_path (str, optional):
+                The path to the database file.
+                Defaults to "notes.db".
+        """
+        self.file_path = file_path
+        self.connection = sqlite3.connect(file_path)
+
+        # WAL lets a single note be committed with one small append instead of rewriting pages in place.
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS notes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                category TEXT NOT NULL,
+                name TEXT NOT NULL,
+                record TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS notes_by_name ON notes (category, name, id);
+        """)
+        self.connection.commit()
+
+    # Writing
+
+    def add_note(self, category: str, name: str, record: dict) -> int:
+        """Add a note and save it immediately.
+
+        Args:
+            category (str):
+                The category of the note, such as "Characters".
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note itself.
+
+        Returns:
+            int: The id of the new note.
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO notes (category, name, record) VALUES (?, ?, ?)",
+                (category, name, json.dumps(record)))
+        return cursor.lastrowid
+
+    def add_notes(self, notes: list[tuple[str, str, dict]]) -> list[int]:
+        """Add several notes in one transaction.
+
+        Args:
+            notes (list[tuple[str, str, dict]]):
+                The (category, name, record) of each note.
+
+        Returns:
+            list[int]: The ids of the new notes, in order.
+        """
+        if not notes:
+            return []
+        with self.connection:
+            # One executemany call instead of a call per note, which matters most when other threads are busy,
+            # since each call has to win the GIL back.
+            self.connection.executemany(
+                "INSERT INTO notes (category, name, record) VALUES (?, ?, ?)",
+                [(category, name, json.dumps(record)) for category, name, record in notes])
+            # AUTOINCREMENT ids within a single transaction are consecutive.
+            last_id = self.connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'notes'").fetchone()[0]
+        return list(range(last_id - len(notes) + 1, last_id + 1))
+
+    def restore_note(self, note_id: int, category: str, name: str, record: dict) -> bool:
+        """Put back a deleted note under its old id, such as when undoing a delete.
+
+        Args:
+            note_id (int):
+                The id the note had.
+            category (str):
+                The category of the note.
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note itself.
+
+        Returns:
+            bool: True if the note was put back, False if the id is already in use.
+        """
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO notes (id, category, name, record) VALUES (?, ?, ?, ?)",
+                    (note_id, category, name, json.dumps(record)))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update_note(self, note_id: int, record: dict, category: str | None = None, name: str | None = None) -> bool:
+        """Replace a note and save it immediately. Only that note is written.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            record (dict):
+                The new contents of the note.
+            category (str | None, optional):
+                The new category of the note.
+                Defaults to None, unchanged.
+            name (str | None, optional):
+                The new name of the note.
+                Defaults to None, unchanged.
+
+        Returns:
+            bool: True if the note existed.
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE notes SET record = ?, category = COALESCE(?, category), name = COALESCE(?, name) "
+                "WHERE id = ?",
+                (json.dumps(record), category, name, note_id))
+        return cursor.rowcount > 0
+
+    def delete_note(self, note_id: int) -> bool:
+        """Delete a note.
+
+        Args:
+            note_id (int):
+                The id of the note.
+
+        Returns:
+            bool: True if the note existed.
+        """
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+        return cursor.rowcount > 0
+
+    # Reading
+
+    def get_note(self, note_id: int) -> tuple[str, str, dict] | None:
+        """Return a note by its id.
+
+        Args:
+            note_id (int):
+                The id of the note.
+
+        Returns:
+            tuple[str, str, dict] | None: The (category, name, record) of the note, or None if it doesn't exist.
+        """
+        row = self.connection.execute(
+            "SELECT category, name, record FROM notes WHERE id = ?", (note_id,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def get_notes(self, category: str, name: str) -> list[tuple[int, dict]]:
+        """Return every note filed under a category and name, oldest first.
+
+        Args:
+            category (str):
+                The category of the notes.
+            name (str):
+                The name the notes are filed under.
+
+        Returns:
+            list[tuple[int, dict]]: The (id, record) of each note.
+        """
+        rows = self.connection.execute(
+            "SELECT id, record FROM notes WHERE category = ? AND name = ? ORDER BY id", (category, name))
+        return [(note_id, json.loads(record)) for note_id, record in rows]
+
+    def list_categories(self) -> list[str]:
+        """Return every category that has notes.
+
+        Returns:
+            list[str]: The categories, sorted.
+        """
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT category FROM notes ORDER BY category")]
+
+    def list_names(self, category: str) -> list[str]:
+        """Return every name in a category.
+
+        Args:
+            category (str):
+                The category.
+
+        Returns:
+            list[str]: The names, sorted.
+        """
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT name FROM notes WHERE category = ? ORDER BY name", (category,))]
+
+    def count(self, category: str | None = None) -> int:
+        """Return the number of notes.
+
+        Args:
+            category (str | None, optional):
+                Only count the notes in this category.
+                Defaults to None, every note.
+
+        Returns:
+            int: The number of notes.
+        """
+        if category is None:
+            return self.connection.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+        return self.connection.execute("SELECT COUNT(*) FROM notes WHERE category = ?", (category,)).fetchone()[0]
+
+    def iter_notes(self, category: str | None = None) -> Iterator[tuple[int, str, str, dict]]:
+        """Go through the notes one at a time, without loading them all.
+
+        Args:
+            category (str | None, optional):
+                Only go through the notes in this category.
+                Defaults to None, every note.
+
+        Yields:
+            tuple[int, str, str, dict]: The (id, category, name, record) of each note.
+        """
+        if category is None:
+            rows = self.connection.execute("SELECT id, category, name, record FROM notes ORDER BY id")
+        else:
+            rows = self.connection.execute(
+                "SELECT id, category, name, record FROM notes WHERE category = ? ORDER BY name, id", (category,))
+        for note_id, note_category, name, record in rows:
+            yield note_id, note_category, name, json.loads(record)
+
+    def iter_records(self, category: str | None = None) -> Iterator[tuple[int, str, str, CharacterRecord]]:
+        """Same as iter_notes(), but gives compact records instead of dicts, for listing many notes.
+
+        Args:
+            category (str | None, optional):
+                Only go through the notes in this category.
+                Defaults to None, every note.
+
+        Yields:
+            tuple[int, str, str, CharacterRecord]: The (id, category, name, record) of each note.
+        """
+        for note_id, note_category, name, record in self.iter_notes(category):
+            yield note_id, note_category, name, CharacterRecord.from_dict(record)
+
+    def page_records(self, category: str, after: tuple[str, int] | None = None,
+                     limit: int = 50) -> list[tuple[int, str, CharacterRecord]]:
+        """Return one page of a category's notes, ordered by name then id.
+        Pages are found by the last note of the page before rather than by offset, so they stay put when
+        notes before them are added or deleted, and a page deep into a big category is as quick as the first.
+
+        Args:
+            category (str):
+                The category.
+            after (tuple[str, int] | None, optional):
+                The (name, id) of the last note of the previous page.
+                Defaults to None, the first page.
+            limit (int, optional):
+                The most notes to return.
+                Defaults to 50.
+
+        Returns:
+            list[tuple[int, str, CharacterRecord]]: The (id, name, record) of each note.
+        """
+        if after is None:
+            rows = self.connection.execute(
+                "SELECT id, name, record FROM notes WHERE category = ? ORDER BY name, id LIMIT ?", (category, limit))
+        else:
+            rows = self.connection.execute(
+                "SELECT id, name, record FROM notes WHERE category = ? AND (name, id) > (?, ?) "
+                "ORDER BY name, id LIMIT ?", (category, after[0], after[1], limit))
+        return [(note_id, name, CharacterRecord.from_dict(json.loads(record))) for note_id, name, record in rows]
+
+    # Converting
+
+    def to_data(self) -> dict:
+        """Return every note in NoteMaster's nested data format, {category: {name: [record, ...]}}.
+
+        Returns:
+            dict: The notes.
+        """
+        data = {}
+        for _, category, name, record in self.iter_notes():
+            data.setdefault(category, {}).setdefault(name, []).append(record)
+        return data
+
+    def import_data(self, data: dict) -> int:
+        """Add every note from NoteMaster's nested data format in one transaction.
+
+        Args:
+            data (dict):
+                The notes, {category: {name: [record, ...]}}.
+
+        Returns:
+            int: The number of notes added.
+        """
+        notes = [(category, name, record)
+                 for category, names in data.items()
+                 for name, records in names.items()
+                 for record in records]
+        return len(self.add_notes(notes))
+
+    def estimated_memory(self) -> int:
+        """Return roughly how many bytes the store keeps in memory, which is at most SQLite's page cache.
+
+        Returns:
+            int: The estimate, in bytes.
+        """
+        page_size = self.connection.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self.connection.execute("PRAGMA page_count").fetchone()[0]
+        cache_size = self.connection.execute("PRAGMA cache_size").fetchone()[0]
+        # A negative cache size is in KiB rather than pages.
+        cache_bytes = -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+        return min(cache_bytes, page_count * page_size)
+
+    def close(self) -> None:
+        """Close the store."""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_store(file_path: str):
+    """Open the right kind of store for a file: SQLite for .db files, a journaled plain-file store otherwise.
+
+    Args:
+        file_path (str):
+            The path to the store.
+
+    Returns:
+        NoteStore | JournaledNoteStore: The opened store.
+    """
+    if file_path.endswith(".db"):
+        return NoteStore(file_path)
+
+    from note_journal import JournaledNoteStore
+    return JournaledNoteStore(file_path)
@@ -0,0 +1,313 @@
+"""
+File: note_transfer.py
+Desc: Streams notes into and out of a note store as JSON Lines or CSV. Imports only hold a few batches in memory
+      at a time, and reading, checking and saving them run side by side on separate threads.
+"""
+import csv
+import json
+import os
+import queue
+import threading
+from typing import Iterator
+
+from file_manager import iter_lines
+
+
+# The record fields written as their own CSV columns, after Category and Name. Notes go next, as a JSON list.
+CSV_FIELDS = ["Date Met", "Name/Title", "Last Seen Time", "Last Seen Location", "Race", "Description"]
+# The last CSV column: any other fields a note has, as a JSON object, so they aren't lost.
+OTHER_FIELDS = "Other Fields"
+# Separates the notes of a hand-written Notes cell that isn't a JSON list.
+NOTE_SEPARATOR = ";"
+
+# Marks the end of the batches on a queue.
+_DONE = object()
+
+
+def guess_format(file_path: str) -> str:
+    """Guess whether a file is JSON Lines or CSV from its extension.
+
+    Args:
+        file_path (str):
+            The path to the file.
+
+    Returns:
+        str: "csv" for .csv files, otherwise "jsonl".
+    """
+    return "csv" if file_path.lower().endswith(".csv") else "jsonl"
+
+
+# Reading
+
+
+def read_jsonl(file_path: str) -> Iterator[tuple[int, object]]:
+    """Read a JSON Lines file one note at a time.
+    Each line is {"category": ..., "name": ..., "record": {...}}.
+
+    Args:
+        file_path (str):
+            The path to the file.
+
+    Yields:
+        tuple[int, object]: The line number and the parsed line, or the error message if it isn't valid JSON.
+    """
+    for line_number, line in enumerate(iter_lines(file_path, strip=True), 1):
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as exception:
+            yield line_number, f"isn't valid JSON ({exception})"
+
+
+def read_csv(file_path: str) -> Iterator[tuple[int, object]]:
+    """Read a CSV file one note at a time. The header row names the columns; Category and Name are required.
+
+    Args:
+        file_path (str):
+            The path to the file.
+
+    Yields:
+        tuple[int, object]: The line number and the note as {"category", "name", "record"},
+            or the error message if its Other Fields cell isn't a JSON object.
+    """
+    with open(file_path, "r", encoding="UTF-8", newline="") as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            record = {field: value for field, value in row.items()
+                      if field not in ("Category", "Name", OTHER_FIELDS, None) and value is not None}
+            if "Notes" in record:
+                record["Notes"] = parse_notes_cell(record["Notes"])
+
+            other_fields = row.get(OTHER_FIELDS) or ""
+            if other_fields.strip():
+                try:
+                    other_fields = json.loads(other_fields)
+                except ValueError:
+                    other_fields = None
+                if not isinstance(other_fields, dict):
+                    yield reader.line_num, f"has an {OTHER_FIELDS} cell that isn't a JSON object"
+                    continue
+                for field, value in other_fields.items():
+                    record.setdefault(field, value)
+
+            yield reader.line_num, {"category": row.get("Category"), "name": row.get("Name"), "record": record}
+
+
+def parse_notes_cell(cell: str) -> list[str]:
+    """Turn a CSV Notes cell back into a list of notes.
+
+    Args:
+        cell (str):
+            The cell. Exports write a JSON list; anything else is split on NOTE_SEPARATOR,
+            for files written by hand or by a spreadsheet.
+
+    Returns:
+        list[str]: The notes.
+    """
+    if cell.lstrip().startswith("["):
+        try:
+            notes = json.loads(cell)
+        except ValueError:
+            notes = None
+        if isinstance(notes, list):
+            return [str(note) for note in notes]
+    return [note.strip() for note in cell.split(NOTE_SEPARATOR) if note.strip()]
+
+
+def validate_note(note: object) -> str | None:
+    """Check that a parsed note can be stored.
+
+    Args:
+        note (object):
+            The parsed note, which should be {"category": str, "name": str, "record": dict}.
+
+    Returns:
+        str | None: What is wrong with the note, or None if it's fine.
+    """
+    if isinstance(note, str):
+        return note
+    if not isinstance(note, dict):
+        return "isn't an object"
+    for key in ("category", "name"):
+        if not isinstance(note.get(key), str) or not note[key].strip():
+            return f"needs a {key}"
+    record = note.get("record")
+    if not isinstance(record, dict):
+        return "needs a record object"
+    for field, value in record.items():
+        if field == "Notes":
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                return "has Notes that aren't a list of text"
+        elif not isinstance(value, str):
+            return f"has a {field} that isn't text"
+    return None
+
+
+# Importing
+
+
+def import_notes(store, file_path: str, file_format: str | None = None, batch_size: int = 500,
+                 queue_size: int = 4, max_errors: int = 100, on_batch: callable = None) -> tuple[int, list[str]]:
+    """Add every note in a JSON Lines or CSV file to a store, without reading the whole file at once.
+    One thread reads the file and another checks the notes while the calling thread saves them.
+    Notes that fail the checks are skipped and reported; the rest are still added.
+
+    Args:
+        store (NoteStore | JournaledNoteStore):
+            The store to add the notes to.
+        file_path (str):
+            The path to the file.
+        file_format (str | None, optional):
+            "jsonl" or "csv".
+            Defaults to None, guessed from the extension.
+        batch_size (int, optional):
+            The number of notes checked and saved together.
+            Defaults to 500.
+        queue_size (int, optional):
+            The most batches waiting between two stages. Bounds the memory used no matter how big the file is.
+            Defaults to 4.
+        max_errors (int, optional):
+            The most error messages to keep.
+            Defaults to 100.
+        on_batch (callable, optional):
+            Called with the ids and the (category, name, record) of each saved batch, such as to index them.
+            Defaults to None.
+
+    Returns:
+        tuple[int, list[str]]: The number of notes added, and a message for each skipped note (up to max_errors).
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    reader = read_csv if (file_format or guess_format(file_path)) == "csv" else read_jsonl
+
+    parsed = queue.Queue(queue_size)
+    checked = queue.Queue(queue_size)
+    errors = []
+    stop = threading.Event()
+
+    def put(target: queue.Queue, item: object) -> bool:
+        """Put an item on a queue, giving up if the import has been stopped."""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(source: queue.Queue) -> object:
+        """Take an item off a queue, or _DONE if the import has been stopped."""
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def parse_stage() -> None:
+        try:
+            batch = []
+            for item in reader(file_path):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not put(parsed, batch):
+                        return
+                    batch = []
+            if batch:
+                put(parsed, batch)
+        except Exception as exception:  # pylint: disable=broad-except
+            put(parsed, exception)
+        put(parsed, _DONE)
+
+    def validate_stage() -> None:
+        while True:
+            batch = get(parsed)
+            if batch is _DONE or isinstance(batch, Exception):
+                put(checked, batch)
+                return
+            valid = []
+            for line_number, note in batch:
+                problem = validate_note(note)
+                if problem is None:
+                    valid.append((note["category"].strip(), note["name"].strip(), note["record"]))
+                elif len(errors) < max_errors:
+                    errors.append(f"Line {line_number} {problem}.")
+            if valid and not put(checked, valid):
+                return
+
+    threads = [threading.Thread(target=parse_stage, daemon=True), threading.Thread(target=validate_stage, daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    added = 0
+    try:
+        while True:
+            batch = checked.get()
+            if batch is _DONE:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            ids = store.add_notes(batch)
+            added += len(ids)
+            if on_batch is not None:
+                on_batch(ids, batch)
+    finally:
+        # Stops the other stages if saving failed part way.
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return added, errors
+
+
+# Exporting
+
+
+def export_notes(store, file_path: str, file_format: str | None = None, category: str | None = None) -> int:
+    """Write notes from a store to a JSON Lines or CSV file, one at a time.
+    The file is only replaced once it has been written in full, and nothing is left behind if writing fails.
+
+    Args:
+        store (NoteStore | JournaledNoteStore):
+            The store to read the notes from.
+        file_path (str):
+            The path to the file.
+        file_format (str | None, optional):
+            "jsonl" or "csv".
+            Defaults to None, guessed from the extension.
+        category (str | None, optional):
+            Only export the notes in this category.
+            Defaults to None, every note.
+
+    Returns:
+        int: The number of notes written.
+    """
+    file_format = file_format or guess_format(file_path)
+    temporary_path = file_path + ".tmp"
+    count = 0
+
+    try:
+        with open(temporary_path, "w", encoding="UTF-8", newline="") as file:
+            if file_format == "csv":
+                writer = csv.writer(file)
+                writer.writerow(["Category", "Name", *CSV_FIELDS, "Notes", OTHER_FIELDS])
+                for _, note_category, name, record in store.iter_notes(category):
+                    other_fields = {field: value for field, value in record.items()
+                                    if field not in CSV_FIELDS and field != "Notes"}
+                    writer.writerow([note_category, name, *(record.get(field, "") for field in CSV_FIELDS),
+                                     json.dumps(record.get("Notes", []), ensure_ascii=False),
+                                     json.dumps(other_fields, ensure_ascii=False) if other_fields else ""])
+                    count += 1
+            else:
+                for _, note_category, name, record in store.iter_notes(category):
+                    file.write(json.dumps({"category": note_category, "name": name, "record": record}) + "\n")
+                    count += 1
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return count
@@ -0,0 +1,248 @@
+"""
+File: search_screen.py
+Desc: An interactive search screen for NoteMaster that searches as the user types, built on the TerminalSystem.
+"""
+import threading
+import time
+
+import color
+import terminal_objects as TObj
+from note_search import NoteSearchIndex
+from note_store import NoteStore
+
+
+class SearchWorker:
+    """Runs searches on a background thread, always working on the newest query and abandoning older ones."""
+
+    def __init__(self, search_index: NoteSearchIndex, limit: int) -> None:
+        """Initialize the SearchWorker object and start its thread.
+
+        Args:
+            search_index (NoteSearchIndex):
+                The index to search.
+            limit (int):
+                The most results per search.
+        """
+        self.search_index = search_index
+        self.limit = limit
+
+        # Each query gets a generation number; a search gives up as soon as a newer one has been submitted.
+        self.generation = 0
+        self.query = None
+        self.results: tuple[int, str, list[tuple[int, float]]] | None = None
+        self.running = True
+
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    def submit(self, query: str) -> None:
+        """Search for a query, cancelling any search still running.
+
+        Args:
+            query (str):
+                The query.
+        """
+        with self.condition:
+            self.generation += 1
+            self.query = query
+            self.condition.notify()
+
+    def take_results(self) -> tuple[str, list[tuple[int, float]]] | None:
+        """Return the results of the newest query, if they are ready and haven't been taken yet.
+
+        Returns:
+            tuple[str, list[tuple[int, float]]] | None: The query and its (id, score) results, or None.
+        """
+        with self.condition:
+            results = self.results
+            self.results = None
+        if results is None or results[0] != self.generation:
+            return None
+        return results[1], results[2]
+
+    def wait_for_results(self, timeout: float) -> None:
+        """Wait until the newest query's results are ready, or the timeout runs out.
+
+        Args:
+            timeout (float):
+                The longest to wait, in seconds.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.results is not None and self.results[0] == self.generation, timeout)
+
+    def stop(self) -> None:
+        """Stop the thread."""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def _work(self) -> None:
+        """Wait for queries and search them, dropping any that are replaced before finishing."""
+        while True:
+            with self.condition:
+                while self.running and self.query is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                generation, query = self.generation, self.query
+                self.query = None
+
+            results = self.search_index.search(query, self.limit,
+                                               should_cancel=lambda: self.generation != generation)
+            if results is not None:
+                with self.condition:
+                    if generation == self.generation:
+                        self.results = (generation, query, results)
+                        self.condition.notify_all()
+
+
+class SearchScreen:
+    """A screen with a query box and a results box, where the results follow what the user types."""
+
+    screen_name = "search"
+
+    def __init__(self, terminal, search_index: NoteSearchIndex, store: NoteStore,
+                 debounce: float = 0.03, search_wait: float = 0.008, frame_time: float = 0.005) -> None:
+        """Initialize the SearchScreen object and add its screen to the terminal.
+
+        Args:
+            terminal (TerminalManager):
+                The terminal to show the screen on.
+            search_index (NoteSearchIndex):
+                The index to search.
+            store (NoteStore):
+                The store the results are read from.
+            debounce (float, optional):
+                Keys typed less than this many seconds apart, such as a paste, are searched once typing pauses.
+                A key typed after a pause is searched straight away.
+                Defaults to 0.03.
+            search_wait (float, optional):
+                How long a keystroke waits for its search, in seconds, so the results are drawn in the same frame.
+                Slower searches leave the last results up and are drawn when they finish.
+                Defaults to 0.008, which with drawing the results keeps a keystroke under 16 ms.
+            frame_time (float, optional):
+                How long to wait between checking for input, in seconds.
+                Defaults to 0.005.
+        """
+        self.terminal = terminal
+        self.window_manager = terminal.window_manager
+        self.store = store
+        self.debounce = debounce
+        self.search_wait = search_wait
+        self.frame_time = frame_time
+
+        height, width = self.window_manager.screen_size
+        self.result_limit = max(height - 6, 1)
+        self.worker = SearchWorker(search_index, self.result_limit)
+
+        if self.window_manager.get_screen(self.screen_name) is None:
+            self.window_manager.add_screen(self.screen_name)
+        self.screen = self.window_manager.get_screen(self.screen_name)
+        # The screen is reused between searches, so drop the last one's objects.
+        for screen_object in self.screen.get_objects():
+            self.screen.remove_object(screen_object.get_name())
+
+        self.query_box = TObj.Box(
+            "search_query", None, None, coordinates=(0, 0), size=(3, width - 2), title="Search",
+            border_color=[color.BLUE], padding=(0, 1), text="")
+        self.query_box.set_layout(lambda size: ((0, 0), (3, size[1] - 2)))
+        self.results_box = TObj.Box(
+            "search_results", None, None, coordinates=(3, 0), size=(height - 5, width - 2), title="Results",
+            border_color=[color.GREEN], padding=(0, 1), text="Start typing to search.")
+        self.results_box.set_layout(lambda size: ((3, 0), (size[0] - 5, size[1] - 2)))
+        self.screen.add_object(self.query_box)
+        self.screen.add_object(self.results_box)
+
+        self.query = ""
+
+    def run(self) -> None:
+        """Show the screen and handle typing until the user presses enter or escape."""
+        keyboard = self.terminal.kb
+        self.window_manager.set_current_screen(self.screen_name)
+        keyboard.start_typing()
+
+        last_keystroke = 0.0
+        pending = False
+        try:
+            while True:
+                if self.terminal.check_resize():
+                    self.result_limit = max(self.window_manager.screen_size[0] - 6, 1)
+                    self.worker.limit = self.result_limit
+
+                keys = keyboard.get_typed_keys()
+                if "esc" in keys or "enter" in keys:
+                    break
+                if self.apply_keys(keys):
+                    self.query_box.set_text(self.query)
+                    self.screen.update_object("search_query")
+                    self.window_manager.refresh_screen()
+                    now = time.monotonic()
+                    # A key after a pause is searched straight away. Keys coming faster than that wait until
+                    # typing pauses, so a burst of keys costs one search instead of one each.
+                    if now - last_keystroke >= self.debounce:
+                        self.worker.submit(self.query)
+                        self.worker.wait_for_results(self.search_wait)
+                        pending = False
+                    else:
+                        pending = True
+                    last_keystroke = now
+
+                if pending and time.monotonic() - last_keystroke >= self.debounce:
+                    self.worker.submit(self.query)
+                    pending = False
+
+                results = self.worker.take_results()
+                if results is not None:
+                    self.show_results(*results)
+
+                time.sleep(self.frame_time)
+        finally:
+            keyboard.stop_typing()
+            self.worker.stop()
+
+    def apply_keys(self, keys: list[str]) -> bool:
+        """Edit the query with typed keys.
+
+        Args:
+            keys (list[str]):
+                The names of the keys, oldest first.
+
+        Returns:
+            bool: True if the query changed.
+        """
+        query = self.query
+        for key in keys:
+            if key == "backspace":
+                query = query[:-1]
+            elif key == "space":
+                query += " "
+            elif len(key) == 1:
+                query += key
+        changed = query != self.query
+        self.query = query
+        return changed
+
+    def show_results(self, query: str, results: list[tuple[int, float]]) -> None:
+        """Put results in the results box, repainting only that box.
+
+        Args:
+            query (str):
+                The query the results are for.
+            results (list[tuple[int, float]]):
+                The (id, score) of each result.
+        """
+        lines = []
+        for note_id, _ in results:
+            note = self.store.get_note(note_id)
+            if note is None:
+                continue
+            category, name, record = note
+            lines.append(f"{name} ({category}) - {record.get('Race', '')}, {record.get('Last Seen Location', '')}")
+        if not lines:
+            lines = ["Nothing matched." if query.strip() else "Start typing to search."]
+
+        self.results_box.set_text("\n".join(lines))
+        self.screen.update_object("search_results")
+        self.window_manager.refresh_screen()
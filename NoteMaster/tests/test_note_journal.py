@@ -0,0 +1,110 @@
+"""
+File: test_note_journal.py
+Desc: Recovery tests for the journaled note store.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from note_journal import JournaledNoteStore  # pylint: disable=wrong-import-position
+
+
+RECORD = {"Name/Title": "Bob", "Notes": ["Owes us money"]}
+
+
+class RecoveryTest(unittest.TestCase):
+    """Opening a store after a crash at awkward points."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "notes.txt")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write_journal(self, path: str, entries: list[dict]) -> None:
+        with open(path, "w", encoding="UTF-8") as file:
+            for entry in entries:
+                file.write(json.dumps(entry) + "\n")
+
+    def test_replays_changes_to_notes_missing_from_snapshot(self) -> None:
+        # The snapshot was swapped in after note 2 was updated and deleted, but the old journal was left behind.
+        with open(self.file_path, "w", encoding="UTF-8") as file:
+            json.dump({"next_id": 3, "notes": [[1, "Characters", "Bob", RECORD]]}, file)
+        self.write_journal(self.file_path + ".journal.compacting", [
+            {"op": "update", "id": 2, "category": None, "name": None, "record": RECORD},
+            {"op": "delete", "id": 2},
+        ])
+
+        with JournaledNoteStore(self.file_path) as store:
+            self.assertEqual(store.count(), 1)
+            self.assertIsNone(store.get_note(2))
+            self.assertEqual(store.get_note(1)[1], "Bob")
+
+        self.assertFalse(os.path.exists(self.file_path + ".journal.compacting"))
+
+    def test_finished_compaction_starts_live_journal_over(self) -> None:
+        with open(self.file_path, "w", encoding="UTF-8") as file:
+            json.dump({"next_id": 2, "notes": [[1, "Characters", "Bob", RECORD]]}, file)
+        self.write_journal(self.file_path + ".journal.compacting", [])
+        self.write_journal(self.file_path + ".journal", [{"op": "delete", "id": 1}])
+
+        with JournaledNoteStore(self.file_path) as store:
+            self.assertEqual(store.count(), 0)
+        self.assertEqual(os.path.getsize(self.file_path + ".journal"), 0)
+
+        # Opening again replays nothing stale.
+        with JournaledNoteStore(self.file_path) as store:
+            self.assertEqual(store.count(), 0)
+
+    def test_saved_notes_are_durable_when_the_call_returns(self) -> None:
+        store = JournaledNoteStore(self.file_path, commit_interval=60)
+        note_id = store.add_note("Characters", "Bob", RECORD)
+        # Read the journal without closing the store, as a crash would leave it.
+        with open(self.file_path + ".journal", "r", encoding="UTF-8") as file:
+            self.assertEqual(json.loads(file.readline())["id"], note_id)
+        store.close()
+
+    def test_failed_compaction_keeps_its_journal(self) -> None:
+        store = JournaledNoteStore(self.file_path)
+        first = store.add_note("Characters", "Bob", RECORD)
+
+        def fail(*_):
+            raise OSError("No space left on device")
+        store._write_snapshot = fail  # pylint: disable=protected-access
+        with self.assertRaises(RuntimeError):
+            store.compact(wait=True)
+
+        # Compacting again, still failing, must add to the left-over journal instead of overwriting it.
+        second = store.add_note("Characters", "Alice", RECORD)
+        with self.assertRaises(RuntimeError):
+            store.compact(wait=True)
+
+        # Reopen without closing, as if the process had crashed before any snapshot landed.
+        with JournaledNoteStore(self.file_path) as recovered:
+            self.assertEqual(recovered.get_note(first)[1], "Bob")
+            self.assertEqual(recovered.get_note(second)[1], "Alice")
+        self.assertFalse(os.path.exists(self.file_path + ".journal.compacting"))
+        store.running = False
+        store.committer.join()
+
+    def test_compaction_error_is_reported_by_close(self) -> None:
+        store = JournaledNoteStore(self.file_path)
+        store.add_note("Characters", "Bob", RECORD)
+
+        def fail(*_):
+            raise OSError("No space left on device")
+        store._write_snapshot = fail  # pylint: disable=protected-access
+        store.compact()
+        with self.assertRaises(RuntimeError):
+            store.close()
+
+        with JournaledNoteStore(self.file_path) as recovered:
+            self.assertEqual(recovered.count(), 1)
+
+if __name__ == "__main__":
+    unittest.main()
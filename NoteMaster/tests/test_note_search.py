@@ -0,0 +1,62 @@
+"""
+File: test_note_search.py
+Desc: Ranking tests for the note search index.
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from note_search import NoteSearchIndex  # pylint: disable=wrong-import-position
+
+
+class RankingTest(unittest.TestCase):
+    """Stopping early must give the same results as scoring every match."""
+
+    def setUp(self) -> None:
+        words = ["dwarf", "dwarves", "dwell", "elf", "elves", "king", "kin", "tavern", "the", "a", "sword", "orc"]
+        chooser = random.Random(3)
+
+        def text(count: int) -> str:
+            return " ".join(chooser.choices(words, k=count))
+
+        self.index = NoteSearchIndex()
+        self.index.build((note_id, "Characters", text(2), {"Description": text(chooser.randint(0, 15))})
+                         for note_id in range(1000))
+        # Edits after the index is built keep each term's notes in order.
+        for note_id in range(0, 1000, 7):
+            self.index.remove(note_id)
+        for note_id in range(0, 1000, 11):
+            self.index.add(note_id, text(3), {"Notes": [text(chooser.randint(0, 30))]})
+
+    def all_matches(self, query: str, limit: int) -> list[tuple[int, float]]:
+        phrases, words = self.index.parse_query(query, True)
+        groups = [self.index.expand_prefix(word[:-1]) if word.endswith("*") else [word] for word in words]
+        groups += [[term] for phrase in phrases for term in phrase]
+        weights = [{term: self.index._idf(term) for term in group} for group in groups]
+        weights.sort(key=self.index._group_size)
+        scores = []
+        for note_id in self.index.note_terms:
+            score = self.index._note_score(note_id, weights)
+            if score is not None and all(note_id in self.index._find_phrase(phrase) for phrase in phrases):
+                scores.append((note_id, score))
+        return sorted(scores, key=lambda item: (-item[1], -item[0]))[:limit]
+
+    def test_matches_scoring_every_note(self) -> None:
+        for query in ["d", "dw", "dwarf", "k", "dwarf k", "elf t", '"the tavern"', '"dwarf king" s', "the a"]:
+            with self.subTest(query=query):
+                self.assertEqual(self.index.search(query, limit=10), self.all_matches(query, 10))
+
+    def test_ranks_every_term_of_a_long_prefix(self) -> None:
+        index = NoteSearchIndex()
+        index.build((number, "Characters", f"Guard {number}", {"Description": f"goblin{number:03}"})
+                    for number in range(200))
+        index.add(500, "Zed", {"Description": "goblin999 goblin999 goblin999"})
+        # "goblin" has over 200 terms, and the best match has the last of them alphabetically.
+        self.assertEqual(index.search("goblin", limit=1)[0][0], 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+File: test_note_transfer.py
+Desc: Round trip and failure tests for note import and export.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                "utilities"))
+
+# pylint: disable=wrong-import-position
+from note_store import NoteStore
+from note_transfer import export_notes, import_notes
+
+
+RECORD = {"Date Met": "Day 3", "Name/Title": "Bob", "Last Seen Time": "Day 9", "Last Seen Location": "Waterdeep",
+          "Race": "Dwarf", "Description": "Short", "Notes": ["Owes us money", "Hates; semicolons"], "Alignment": "CN"}
+
+
+class ExportTest(unittest.TestCase):
+    """Exporting notes and reading them back."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = NoteStore(os.path.join(self.directory.name, "notes.db"))
+        self.store.add_note("Characters", "Bob", RECORD)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_csv_keeps_other_fields(self) -> None:
+        file_path = os.path.join(self.directory.name, "notes.csv")
+        self.assertEqual(export_notes(self.store, file_path), 1)
+
+        with NoteStore(os.path.join(self.directory.name, "copy.db")) as copy:
+            self.assertEqual(import_notes(copy, file_path), (1, []))
+            self.assertEqual(copy.get_notes("Characters", "Bob")[0][1], RECORD)
+
+    def test_failed_export_leaves_no_temporary_file(self) -> None:
+        file_path = os.path.join(self.directory.name, "notes.jsonl")
+
+        def broken_notes(category=None):
+            yield from NoteStore.iter_notes(self.store, category)
+            raise OSError("The disk is full.")
+
+        self.store.iter_notes = broken_notes
+        with self.assertRaises(OSError):
+            export_notes(self.store, file_path)
+        self.assertFalse(os.path.exists(file_path + ".tmp"))
+        self.assertFalse(os.path.exists(file_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+"""
+File: workspace.py
+Desc: Keeps track of many campaigns' note files. Only a small header of each campaign is kept in memory,
+      while the most recently used campaigns stay open up to a memory cap, so switching back to one is instant.
+"""
+import gc
+import json
+import os
+from collections import OrderedDict
+
+from note_history import NoteHistory
+from note_search import NoteSearchIndex
+from note_store import open_store
+
+
+class Campaign:
+    """An open campaign: its store, its undo history, and a search index that is only built the first time it is needed."""
+
+    def __init__(self, name: str, file_path: str) -> None:
+        """Initialize the Campaign object and open its store.
+
+        Args:
+            name (str):
+                The name of the campaign.
+            file_path (str):
+                The path to the campaign's notes.
+        """
+        self.name = name
+        self.file_path = file_path
+        self.store = open_store(file_path)
+        self.search_index: NoteSearchIndex | None = None
+        self.history = NoteHistory()
+
+    def get_search_index(self) -> NoteSearchIndex:
+        """Return the campaign's search index, building it if this is the first search.
+
+        Returns:
+            NoteSearchIndex: The index.
+        """
+        if self.search_index is None:
+            self.search_index = NoteSearchIndex()
+            self.search_index.build(self.store.iter_notes())
+            # The index is millions of objects that live until the campaign closes. Without this, every full
+            # garbage collection walks through all of them, stalling whatever triggered it for ~100 ms at 100k notes.
+            gc.freeze()
+        return self.search_index
+
+    def index_note(self, note_id: int, name: str, record: dict) -> None:
+        """Add or update a note in the search index, if it has been built.
+
+        Args:
+            note_id (int):
+                The id of the note.
+            name (str):
+                The name the note is filed under.
+            record (dict):
+                The note.
+        """
+        if self.search_index is not None:
+            self.search_index.add(note_id, name, record)
+
+    def unindex_note(self, note_id: int) -> None:
+        """Remove a note from the search index, if it has been built.
+
+        Args:
+            note_id (int):
+                The id of the note.
+        """
+        if self.search_index is not None:
+            self.search_index.remove(note_id)
+
+    def get_header(self) -> dict:
+        """Return the small summary of the campaign kept while it isn't open.
+
+        Returns:
+            dict: The number of notes, the categories and when the file was last changed.
+        """
+        return {
+            "note_count": self.store.count(),
+            "categories": self.store.list_categories(),
+            "modified": _modified_time(self.file_path),
+        }
+
+    def estimated_memory(self) -> int:
+        """Return roughly how many bytes the open campaign takes up in memory.
+
+        Returns:
+            int: The estimate, in bytes.
+        """
+        memory = self.store.estimated_memory() + self.history.memory_used
+        if self.search_index is not None:
+            memory += self.search_index.estimated_memory()
+        return memory
+
+    def close(self) -> None:
+        """Close the campaign's store and drop its search index."""
+        self.store.close()
+        self.search_index = None
+        self.history.clear()
+
+
+def _modified_time(file_path: str) -> int | None:
+    """Return when a file was last changed, in nanoseconds, or None if it doesn't exist."""
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class Workspace:
+    """A directory of campaigns, at most a few of which are open at once."""
+
+    index_name = "workspace.json"
+
+    def __init__(self, directory: str = ".", extension: str = ".db", memory_cap: int = 64 * 1024 * 1024) -> None:
+        """Initialize the Workspace object, reading the headers of the campaigns without opening any of them.
+
+        Args:
+            directory (str, optional):
+                The directory the campaign files are in.
+                Defaults to ".".
+            extension (str, optional):
+                The extension of campaign files. ".db" campaigns use SQLite, anything else a journaled plain file.
+                Defaults to ".db".
+            memory_cap (int, optional):
+                Roughly how many bytes the open campaigns may take up before the least recently used ones
+                (other than the active one) are closed.
+                Defaults to 64 MiB.
+        """
+        self.directory = directory
+        self.extension = extension
+        self.memory_cap = memory_cap
+        self.index_path = os.path.join(directory, self.index_name)
+
+        # name -> header, for every campaign, open or not.
+        self.headers: dict[str, dict] = {}
+        self.last_campaign: str | None = None
+        # name -> the open campaign, least recently used first. The last one is the active campaign.
+        self.open_campaigns: OrderedDict[str, Campaign] = OrderedDict()
+
+        self._load_index()
+
+    # Index
+
+    def _load_index(self) -> None:
+        """Read the saved headers, and find any campaign files that appeared since they were saved."""
+        try:
+            with open(self.index_path, "r", encoding="UTF-8") as file:
+                index = json.load(file)
+        except (FileNotFoundError, ValueError):
+            index = {}
+        self.last_campaign = index.get("last_campaign")
+        saved_headers = index.get("campaigns", {})
+
+        os.makedirs(self.directory, exist_ok=True)
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.extension) or not entry.is_file():
+                    continue
+                name = entry.name[:len(entry.name) - len(self.extension)]
+                # Campaigns changed since their header was saved are re-read when first opened.
+                header = saved_headers.get(name)
+                if header is None or header.get("modified") != entry.stat().st_mtime_ns:
+                    header = {"note_count": None, "categories": [], "modified": None}
+                self.headers[name] = header
+
+    def save_index(self) -> None:
+        """Save the headers of every campaign, so the next start doesn't need to open them."""
+        for name, campaign in self.open_campaigns.items():
+            self.headers[name] = campaign.get_header()
+        index = {"last_campaign": self.last_campaign, "campaigns": self.headers}
+
+        temporary_path = self.index_path + ".tmp"
+        with open(temporary_path, "w", encoding="UTF-8") as file:
+            json.dump(index, file)
+        os.replace(temporary_path, self.index_path)
+
+    # Campaigns
+
+    def list_campaigns(self) -> list[str]:
+        """Return the name of every campaign.
+
+        Returns:
+            list[str]: The names, sorted.
+        """
+        return sorted(self.headers)
+
+    def get_header(self, name: str) -> dict | None:
+        """Return the header of a campaign, without opening it.
+
+        Args:
+            name (str):
+                The name of the campaign.
+
+        Returns:
+            dict | None: The header, or None if there is no such campaign. Its note_count is None if unknown.
+        """
+        campaign = self.open_campaigns.get(name)
+        if campaign is not None:
+            return campaign.get_header()
+        return self.headers.get(name)
+
+    def get_active(self) -> Campaign | None:
+        """Return the active campaign.
+
+        Returns:
+            Campaign | None: The campaign, or None if none has been opened.
+        """
+        if not self.open_campaigns:
+            return None
+        return next(reversed(self.open_campaigns.values()))
+
+    def switch(self, name: str) -> Campaign:
+        """Make a campaign the active one, opening (or creating) it if it isn't open already.
+
+        Args:
+            name (str):
+                The name of the campaign.
+
+        Returns:
+            Campaign: The campaign.
+        """
+        campaign = self.open_campaigns.get(name)
+        if campaign is None:
+            campaign = Campaign(name, os.path.join(self.directory, name + self.extension))
+            self.open_campaigns[name] = campaign
+            self.headers[name] = campaign.get_header()
+        self.open_campaigns.move_to_end(name)
+        self.last_campaign = name
+
+        self.evict()
+        return campaign
+
+    def estimated_memory(self) -> int:
+        """Return roughly how many bytes the open campaigns take up in memory.
+
+        Returns:
+            int: The estimate, in bytes.
+        """
+        return sum(campaign.estimated_memory() for campaign in self.open_campaigns.values())
+
+    def evict(self) -> None:
+        """Close the least recently used campaigns until the open ones fit under the memory cap.
+        The active campaign is never closed.
+        """
+        while len(self.open_campaigns) > 1 and self.estimated_memory() > self.memory_cap:
+            self._close_campaign(*self.open_campaigns.popitem(last=False))
+
+    def _close_campaign(self, name: str, campaign: Campaign) -> None:
+        """Close a campaign, keeping only its header."""
+        header = campaign.get_header()
+        campaign.close()
+        # Closing can still write to the file, so it's checked afterwards.
+        header["modified"] = _modified_time(campaign.file_path)
+        self.headers[name] = header
+
+    def close(self) -> None:
+        """Close every open campaign and save the headers."""
+        while self.open_campaigns:
+            self._close_campaign(*self.open_campaigns.popitem(last=False))
+        self.save_index()
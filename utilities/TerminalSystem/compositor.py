@@ -0,0 +1,237 @@
+"""Stacks screens into cached frames and switches between them by printing only what changed."""
+from collections import OrderedDict
+
+from display import Display
+from screen_class import Screen
+import color
+from terminal_tools import render_rows, assemble_diff_string
+
+
+class Frame:
+    """A composited screen stack, kept both as a display array and as rendered rows."""
+
+    def __init__(self, key: tuple, cells: list[list[list[str | list[str]]]], previous=None) -> None:
+        """Initialize the Frame object.
+
+        Args:
+            key (tuple):
+                The stack key the frame was built from (see Compositor.stack_key()).
+            cells (list[list[list[str | list[str]]]]):
+                The composited display array. Must not be modified afterwards.
+            previous (Frame, optional):
+                An earlier frame whose rendered rows can be reused where the cells are unchanged.
+                Defaults to None.
+        """
+        self.key = key
+        self.cells = cells
+        if previous is None:
+            self.rows = render_rows(cells)
+        else:
+            self.rows = render_rows(cells, previous.cells, previous.rows)
+
+    def get_size(self) -> tuple[int, int]:
+        """Return the size of the frame.
+
+        Returns:
+            tuple[int, int]: The size of the frame (y, x).
+        """
+        return len(self.rows), len(self.rows[0]) if self.rows else 0
+
+
+class Compositor:
+    """Composite a base screen with any number of overlay screens and present the result on a Display."""
+
+    def __init__(self, display: Display, max_frames: int = 16, max_transitions: int = 32,
+                 hot_pair_threshold: int = 2) -> None:
+        """Initialize the Compositor object.
+
+        Args:
+            display (Display):
+                The display to present frames on.
+            max_frames (int, optional):
+                The number of composited frames to keep cached.
+                Defaults to 16.
+            max_transitions (int, optional):
+                The number of diff strings between frames to keep cached.
+                Defaults to 32.
+            hot_pair_threshold (int, optional):
+                How many times a pair of frames has to be switched between before the way back is precomputed too.
+                Defaults to 2.
+        """
+        self.display = display
+        self.max_frames = max_frames
+        self.max_transitions = max_transitions
+        self.hot_pair_threshold = hot_pair_threshold
+
+        self.frames: OrderedDict[tuple, Frame] = OrderedDict()
+        self.transitions: OrderedDict[tuple[tuple, tuple], str] = OrderedDict()
+        self.toggle_counts: dict[frozenset, int] = {}
+        self.current_frame: Frame | None = None
+
+    @staticmethod
+    def stack_key(base: Screen, overlays: list[Screen] | tuple[Screen, ...] = ()) -> tuple:
+        """Return the key identifying a stack of screens in its current state.
+
+        Args:
+            base (Screen):
+                The bottom screen.
+            overlays (list[Screen] | tuple[Screen, ...], optional):
+                The screens drawn on top of the base, lowest first.
+                Defaults to ().
+
+        Returns:
+            tuple: The key, made of each screen's name and version.
+        """
+        return tuple((screen.get_name(), screen.version) for screen in (base, *overlays))
+
+    def get_frame(self, base: Screen, overlays: list[Screen] | tuple[Screen, ...] = ()) -> Frame:
+        """Return the frame for a stack of screens, building it only if it isn't cached.
+
+        Args:
+            base (Screen):
+                The bottom screen.
+            overlays (list[Screen] | tuple[Screen, ...], optional):
+                The screens drawn on top of the base, lowest first.
+                Defaults to ().
+
+        Returns:
+            Frame: The composited frame.
+        """
+        for screen in (base, *overlays):
+            if screen.needs_update():
+                screen.update_display()
+
+        key = self.stack_key(base, overlays)
+        frame = self.frames.get(key)
+        if frame is not None:
+            self.frames.move_to_end(key)
+            return frame
+
+        frame = Frame(key, self.composite(base, overlays), self.current_frame)
+        self.frames[key] = frame
+        if len(self.frames) > self.max_frames:
+            self.frames.popitem(last=False)
+        return frame
+
+    @staticmethod
+    def composite(base: Screen, overlays: list[Screen] | tuple[Screen, ...] = ()) -> list[list[list[str | list[str]]]]:
+        """Build the display array of a stack of screens.
+        Overlays only cover the cells their visible objects occupy, so the base shows through everywhere else.
+
+        Args:
+            base (Screen):
+                The bottom screen.
+            overlays (list[Screen] | tuple[Screen, ...], optional):
+                The screens drawn on top of the base, lowest first.
+                Defaults to ().
+
+        Returns:
+            list[list[list[str | list[str]]]]: The composited display array.
+        """
+        # Only the rows are copied; the cells themselves are never modified in place.
+        cells = [row[:] for row in base.get_display()]
+        height = len(cells)
+        width = len(cells[0]) if height else 0
+
+        for overlay in overlays:
+            for screen_object in overlay.get_objects():
+                if not screen_object.visible:
+                    continue
+                top, left = screen_object.get_coordinates()
+                for y, row in enumerate(screen_object.get_contents()):
+                    if not 0 <= y + top < height:
+                        continue
+                    target = cells[y + top]
+                    for x, column in enumerate(row):
+                        if column[0] != "" and 0 <= x + left < width:
+                            target[x + left] = column
+        return cells
+
+    def precompute(self, from_stack: tuple[Screen, list[Screen]], to_stack: tuple[Screen, list[Screen]]) -> None:
+        """Build and cache the diffs in both directions between two stacks of screens.
+        Useful for screens that are known to be toggled between often, such as tabs.
+
+        Args:
+            from_stack (tuple[Screen, list[Screen]]):
+                The first (base, overlays) pair.
+            to_stack (tuple[Screen, list[Screen]]):
+                The second (base, overlays) pair.
+        """
+        first = self.get_frame(*from_stack)
+        second = self.get_frame(*to_stack)
+        self.get_transition(first, second)
+        self.get_transition(second, first)
+
+    def get_transition(self, old: Frame, new: Frame) -> str:
+        """Return the string that turns one frame into another, using the cache if possible.
+
+        Args:
+            old (Frame):
+                The frame currently on the terminal.
+            new (Frame):
+                The frame that should be on the terminal.
+
+        Returns:
+            str: The diff string.
+        """
+        pair = (old.key, new.key)
+        diff = self.transitions.get(pair)
+        if diff is not None:
+            self.transitions.move_to_end(pair)
+            return diff
+
+        diff = assemble_diff_string(old.rows, new.rows)
+        self.transitions[pair] = diff
+        if len(self.transitions) > self.max_transitions:
+            self.transitions.popitem(last=False)
+        return diff
+
+    def show(self, base: Screen, overlays: list[Screen] | tuple[Screen, ...] = ()) -> str:
+        """Present a stack of screens on the display, printing only the cells that differ from what is shown.
+
+        Args:
+            base (Screen):
+                The bottom screen.
+            overlays (list[Screen] | tuple[Screen, ...], optional):
+                The screens drawn on top of the base, lowest first.
+                Defaults to ().
+
+        Returns:
+            str: The diff string that was printed.
+        """
+        new = self.get_frame(base, overlays)
+        old = self.current_frame
+
+        # If something else drew on the display since the last frame, diff against what it actually shows instead.
+        if old is None or self.display.previous_display_array is not old.cells:
+            diff = assemble_diff_string(render_rows(self.display.previous_display_array), new.rows)
+        elif old.get_size() != new.get_size():
+            diff = assemble_diff_string((), new.rows)
+        elif self.display.scroll_regions and old.key != new.key and old.key[0][0] == new.key[0][0]:
+            # The same screen changed, so its scroll regions may have moved. These diffs aren't worth caching.
+            width = new.get_size()[1]
+            scroll_string, scrolled = self.display.plan_scroll_regions(
+                old.rows, new.rows, lambda: (" " + color.END,) * width)
+            diff = scroll_string + assemble_diff_string(scrolled, new.rows)
+        else:
+            diff = self.get_transition(old, new)
+
+            # Precompute the way back for pairs that keep being switched between.
+            if old.key != new.key:
+                if len(self.toggle_counts) > self.max_transitions:
+                    self.toggle_counts.clear()
+                pair = frozenset((old.key, new.key))
+                self.toggle_counts[pair] = self.toggle_counts.get(pair, 0) + 1
+                if self.toggle_counts[pair] >= self.hot_pair_threshold:
+                    self.get_transition(new, old)
+
+        self.display.present_frame(new.cells, diff)
+        self.current_frame = new
+        return diff
+
+    def invalidate(self) -> None:
+        """Forget every cached frame and diff. Needed whenever the display size changes."""
+        self.frames.clear()
+        self.transitions.clear()
+        self.toggle_counts.clear()
+        self.current_frame = None
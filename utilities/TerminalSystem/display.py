@@ -37,7 +37,7 @@ from copy import deepcopy
 
 import color
 import cursor
-from terminal_tools import assemble_display_string
+from terminal_tools import assemble_display_string, render_rows, assemble_diff_string, find_vertical_shift
 
 
 class Display:
@@ -67,6 +67,9 @@ class Display:
         ]  # display_array[y][x][0 | 1], [row][column]["char", [mods]]
         self.display_string = ""
 
+        # Regions whose contents scroll vertically, (top, bottom, left, right) inclusive.
+        self.scroll_regions: list[tuple[int, int, int, int]] = []
+
     def set_display_size(self, size: tuple[int, int]) -> None:
         """Set the display size.
 
@@ -78,6 +81,24 @@ class Display:
 
         self.antiflash_refresh_display()
 
+    def resize(self, size: tuple[int, int]) -> None:
+        """Change the display size, keeping whatever fits of the current display array.
+        The terminal contents are unknown after a resize, so the next refresh repaints every cell in place.
+
+        Args:
+            size (tuple[int, int]):
+                The new display size (y, x).
+        """
+        old_array = self.display_array
+        self.display_size = size
+        self.display_array = [
+            [
+                old_array[y][x] if y < len(old_array) and x < len(old_array[y]) else [" ", [color.BACKGROUND_BLACK]]
+                for x in range(size[1])
+            ] for y in range(size[0])
+        ]
+        self.previous_display_array = []
+
     # Getters and setters.
 
     def get_display_size(self) -> tuple[int, int]:
@@ -146,17 +167,150 @@ class Display:
         #     self.previous_display_array.append(item[:])
         self.previous_display_array = deepcopy(self.display_array)
 
+    # Scroll regions.
+
+    def add_scroll_region(self, top: int, bottom: int, left: int = 0, right: int | None = None) -> None:
+        """Mark a region whose contents scroll vertically, such as a log or a long list.
+        When its contents shift, the terminal scrolls them and only the newly exposed lines are printed.
+        The terminal can only scroll whole lines, so the closer the region is to the full width, the more it saves.
+
+        Args:
+            top (int):
+                The first row of the region.
+            bottom (int):
+                The last row of the region.
+            left (int, optional):
+                The first column of the region.
+                Defaults to 0.
+            right (int | None, optional):
+                The last column of the region.
+                Defaults to None, the last column of the display.
+        """
+        if right is None:
+            right = self.display_size[1] - 1
+        self.scroll_regions.append((top, bottom, left, right))
+
+    def remove_scroll_region(self, top: int, bottom: int) -> None:
+        """Stop treating a region as scrolling.
+
+        Args:
+            top (int):
+                The first row of the region.
+            bottom (int):
+                The last row of the region.
+        """
+        self.scroll_regions = [region for region in self.scroll_regions if region[:2] != (top, bottom)]
+
+    def scroll(self, top: int, bottom: int, amount: int) -> None:
+        """Scroll the rows from top to bottom on the terminal and in the record of what it shows.
+
+        Args:
+            top (int):
+                The first row to scroll.
+            bottom (int):
+                The last row to scroll.
+            amount (int):
+                The number of lines to scroll, positive to move the contents up.
+        """
+        print(self.scroll_string(top, bottom, amount), end="", flush=True)
+        self.cursor.set_pos(0, 0)
+        self.previous_display_array = self._scroll_rows(
+            self.previous_display_array, top, bottom, amount,
+            lambda: [[" ", []] for _ in range(self.display_size[1])])
+
+    def plan_scroll_regions(self, previous_rows: list | tuple, new_rows: list | tuple,
+                            blank_row: callable) -> tuple[str, list | tuple]:
+        """Work out which registered regions have had their contents shifted vertically, and how to scroll them.
+        A region is only scrolled if that leaves fewer cells to repaint than not scrolling it.
+
+        Args:
+            previous_rows (list | tuple):
+                The rows currently on the terminal, either cells or rendered rows.
+            new_rows (list | tuple):
+                The rows that should be on the terminal, in the same format.
+            blank_row (callable):
+                Returns a row in the same format, as the terminal shows a newly exposed line.
+
+        Returns:
+            tuple[str, list | tuple]: The string that scrolls the terminal, and the rows it shows afterwards
+                (previous_rows itself if nothing scrolled).
+        """
+        scroll_string = ""
+        for top, bottom, left, right in self.scroll_regions:
+            bottom = min(bottom, len(new_rows) - 1, len(previous_rows) - 1)
+            if bottom <= top:
+                continue
+            shift = find_vertical_shift([row[left:right+1] for row in previous_rows[top:bottom+1]],
+                                        [row[left:right+1] for row in new_rows[top:bottom+1]])
+            if shift == 0:
+                continue
+
+            scrolled = self._scroll_rows(previous_rows, top, bottom, shift, blank_row)
+            if (self._count_changes(scrolled[top:bottom+1], new_rows[top:bottom+1]) <
+                    self._count_changes(previous_rows[top:bottom+1], new_rows[top:bottom+1])):
+                scroll_string += self.scroll_string(top, bottom, shift)
+                previous_rows = scrolled
+        return scroll_string, previous_rows
+
+    @staticmethod
+    def scroll_string(top: int, bottom: int, amount: int) -> str:
+        """Return the escape codes that scroll the rows from top to bottom, leaving the rest of the screen alone.
+        Same as the scroll region functions of Cursor, but as a string so it can be sent along with a diff.
+
+        Args:
+            top (int):
+                The first row to scroll.
+            bottom (int):
+                The last row to scroll.
+            amount (int):
+                The number of lines to scroll, positive to move the contents up.
+
+        Returns:
+            str: The escape codes.
+        """
+        direction = "S" if amount > 0 else "T"
+        return f"\033[{top+1};{bottom+1}r\033[{abs(amount)}{direction}\033[r"
+
+    @staticmethod
+    def _count_changes(previous_rows: list | tuple, new_rows: list | tuple) -> int:
+        """Count the cells that differ between two sets of rows."""
+        changes = 0
+        for old_row, new_row in zip(previous_rows, new_rows):
+            if old_row != new_row:
+                changes += sum(1 for old, new in zip(old_row, new_row) if old != new)
+        return changes
+
+    @staticmethod
+    def _scroll_rows(rows: list | tuple, top: int, bottom: int, amount: int, blank_row: callable) -> list:
+        """Return a copy of the rows with the band from top to bottom scrolled like the terminal would."""
+        rows = list(rows)
+        band = rows[top:bottom+1]
+        height = len(band)
+        if amount > 0:
+            band = band[amount:] + [blank_row() for _ in range(min(amount, height))]
+        else:
+            band = [blank_row() for _ in range(min(-amount, height))] + band[:amount]
+        rows[top:bottom+1] = band[:height]
+        return rows
+
     def antiflash_refresh_display(self) -> None:
         """Refresh the display with the most recent display string, only updating the parts that are different."""
         # Skip if there have been no changes.
         if self.display_array == self.previous_display_array:
             print("No change.")
             return
-        # If the previous display array is shorter than the current one, print the whole thing.
+        # If the previous display array is a different size than the current one, print the whole thing.
         # Usually should only occur when changing display sizes.
-        elif len(self.previous_display_array) < len(self.display_array):
-            self.refresh_display()
+        elif (len(self.previous_display_array) != len(self.display_array) or
+              len(self.previous_display_array[0]) != len(self.display_array[0])):
+            self.redraw_in_place()
             return
+        # Let the terminal move any scrolled regions, so only the lines it exposes still differ.
+        if self.scroll_regions:
+            scroll_string, self.previous_display_array = self.plan_scroll_regions(
+                self.previous_display_array, self.display_array,
+                lambda: [[" ", []] for _ in range(self.display_size[1])])
+            print(scroll_string, end="")
         # Cycle through the display array and print the characters that have changed.
         for row in range(len(self.display_array)):
             for column in range(len(self.display_array[0])):
@@ -171,6 +325,31 @@ class Display:
         #     self.previous_display_array.append(item[:])
         self.previous_display_array = deepcopy(self.display_array)
 
+    def redraw_in_place(self) -> None:
+        """Repaint every cell of the display without clearing the screen first, so there is no blank flash."""
+        print(assemble_diff_string((), render_rows(self.display_array)), end="", flush=True)
+        self.cursor.set_pos(0, 0)
+
+        self.previous_display_array = deepcopy(self.display_array)
+
+    def present_frame(self, frame: list[list[list[str | list[str]]]], diff_string: str) -> None:
+        """Print a precomputed diff and record the frame it leads to as the current display.
+        Used by the Compositor, which already knows what changed, so nothing is compared or copied here.
+
+        Args:
+            frame (list[list[list[str | list[str]]]]):
+                The display array the diff string turns the terminal into. Must not be modified afterwards.
+            diff_string (str):
+                The string to print (see terminal_tools.assemble_diff_string()).
+        """
+        if diff_string:
+            print(diff_string, end="", flush=True)
+            self.cursor.set_pos(0, 0)
+
+        self.display_size = (len(frame), len(frame[0]) if frame else 0)
+        self.display_array = frame
+        self.previous_display_array = frame
+
 
 if __name__ == "__main__":
     display = Display()
@@ -0,0 +1,80 @@
+"""Detects terminal size changes, through SIGWINCH where the platform has it and by polling otherwise."""
+import os
+import signal
+
+
+class ResizeWatcher:
+    """Watch the terminal for size changes and report them once per check."""
+
+    def __init__(self, on_resize: callable = None, min_size: tuple[int, int] = (1, 1)) -> None:
+        """Initialize the ResizeWatcher object.
+
+        Args:
+            on_resize (callable, optional):
+                Called with the new size (y, x) whenever check() finds the terminal has been resized.
+                Defaults to None.
+            min_size (tuple[int, int], optional):
+                The smallest size (y, x) that will be reported.
+                Defaults to (1, 1).
+        """
+        self.on_resize = on_resize
+        self.min_size = min_size
+        self.size = self.detect_size()
+
+        # The signal handler only raises this flag; the actual resizing happens in check() on the main loop.
+        self.pending = False
+        self.uses_signal = False
+        self.previous_handler = None
+
+        if hasattr(signal, "SIGWINCH"):
+            try:
+                self.previous_handler = signal.signal(signal.SIGWINCH, self._handle_signal)
+                self.uses_signal = True
+            except ValueError:
+                # Signal handlers can only be installed from the main thread, so fall back to polling.
+                pass
+
+    def detect_size(self) -> tuple[int, int] | None:
+        """Ask the terminal for its size.
+
+        Returns:
+            tuple[int, int] | None: The size (y, x), or None if the output isn't a terminal.
+        """
+        try:
+            columns, lines = os.get_terminal_size()
+        except OSError:
+            return None
+        return max(lines, self.min_size[0]), max(columns, self.min_size[1])
+
+    def _handle_signal(self, signum, frame) -> None:
+        """Flag that the terminal was resized and pass the signal on to any previous handler."""
+        self.pending = True
+        if callable(self.previous_handler):
+            self.previous_handler(signum, frame)
+
+    def check(self) -> tuple[int, int] | None:
+        """Check whether the terminal has been resized since the last check. Designed to be run every frame.
+        Several resize signals in a row are handled as one, so dragging a window only reflows once per frame.
+
+        Returns:
+            tuple[int, int] | None: The new size (y, x) if it changed, None otherwise.
+        """
+        if self.uses_signal and not self.pending:
+            return None
+        self.pending = False
+
+        new_size = self.detect_size()
+        if new_size is None or new_size == self.size:
+            return None
+
+        self.size = new_size
+        if self.on_resize is not None:
+            self.on_resize(new_size)
+        return new_size
+
+    def stop(self) -> None:
+        """Stop watching and restore the previous SIGWINCH handler."""
+        if self.uses_signal:
+            signal.signal(signal.SIGWINCH, self.previous_handler if self.previous_handler is not None
+                          else signal.SIG_DFL)
+            self.uses_signal = False
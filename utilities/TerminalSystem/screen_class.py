@@ -12,6 +12,26 @@ class Screen:
         self.screen_size = screen_size
         self.display_array = [[[" ", [color.BACKGROUND_BLACK]] for _ in range(self.screen_size[1])] for _ in range(self.screen_size[0])]
         self.should_refresh = True
+        # Objects are cut off at the edges instead of raising an IndexError once the screen has been resized.
+        self.clip_objects = False
+        # Bumped every time the display array is rebuilt, so cached frames of this screen can be recognised as stale.
+        self.version = 0
+
+    def resize(self, screen_size: tuple[int, int]) -> None:
+        """Change the size of the screen and reflow the objects that depend on it.
+
+        Args:
+            screen_size (tuple[int, int]):
+                The new screen size (y, x).
+        """
+        self.screen_size = screen_size
+        self.clip_objects = True
+
+        # Only objects with a layout are touched, everything else keeps its contents as they are.
+        for screen_object in self.screen_objects:
+            screen_object.reflow(screen_size)
+
+        self.should_refresh = True
 
     def add_object(self, screen_object: TerminalObject) -> None:
         """Add an object to this screen.
@@ -95,6 +115,17 @@ class Screen:
                 return True
         return False
 
+    def needs_update(self) -> bool:
+        """Return whether the display array is out of date with the screen objects.
+
+        Returns:
+            bool: True if the screen or one of its objects has been changed since the last update_display().
+        """
+        # should_refresh is shadowed by the attribute of the same name, so the flags are read directly.
+        if self.should_refresh is True:
+            return True
+        return any(screen_object.should_refresh is True for screen_object in self.screen_objects)
+
     def update_display(self) -> list[list[list[str | list[str]]]]:
         """Update the screen display array with the contents of the screen objects and return it.
 
@@ -105,19 +136,72 @@ class Screen:
 
         for screen_object in self.screen_objects:
             if screen_object.visible:
-                self.add_to_display(screen_object.get_contents(), screen_object.get_coordinates())
+                self.add_to_display(screen_object.get_contents(), screen_object.get_coordinates(),
+                                    clip=self.clip_objects)
                 screen_object.refreshed()
 
         self.should_refresh = False
+        self.version += 1
 
         return self.display_array
 
+    def update_object(self, object_name: str) -> list[list[list[str | list[str]]]]:
+        """Redraw only the area covered by one object, such as after changing its text.
+        Much cheaper than update_display() for small objects, but doesn't clear where the object used to be if it moved.
+
+        Args:
+            object_name (str):
+                The name of the object.
+
+        Returns:
+            list[list[list[str | list[str]]]]: The updated display array.
+
+        Raises:
+            ValueError: If there is no object with that name on the screen.
+        """
+        changed = next((screen_object for screen_object in self.screen_objects
+                        if screen_object.get_name() == object_name), None)
+        if changed is None:
+            raise ValueError(f"There is no object named {object_name}.")
+        top, left = changed.get_coordinates()
+        bottom = min(top + len(changed.get_contents()), len(self.display_array))
+        right = min(left + len(changed.get_contents()[0]), len(self.display_array[0]))
+        top, left = max(top, 0), max(left, 0)
+
+        for y in range(top, bottom):
+            self.display_array[y][left:right] = [[" ", [color.BACKGROUND_BLACK]] for _ in range(right - left)]
+
+        # Redraw every object overlapping the area, in z order, but only inside the area.
+        for screen_object in self.screen_objects:
+            if not screen_object.visible:
+                continue
+            contents = screen_object.get_contents()
+            object_top, object_left = screen_object.get_coordinates()
+            start_x = max(left, object_left)
+            end_x = min(right, object_left + (len(contents[0]) if contents else 0))
+            if start_x >= end_x:
+                continue
+
+            for y in range(max(top, object_top), min(bottom, object_top + len(contents))):
+                piece = contents[y - object_top][start_x - object_left:end_x - object_left]
+                target = self.display_array[y]
+                if all(column[0] != "" for column in piece):
+                    target[start_x:end_x] = piece
+                    continue
+                for x, column in enumerate(piece, start_x):
+                    if column[0] != "":
+                        target[x] = column
+
+        changed.refreshed()
+        self.version += 1
+        return self.display_array
+
     def clear_display(self) -> None:
         """Clear the display array of all symbols."""
         self.display_array = [[[" ", [color.BACKGROUND_BLACK]] for _ in range(self.screen_size[1])] for _ in range(self.screen_size[0])]
 
     def add_to_display(self, grid_to_add: list[list[list[str | list[str]]]],
-                       coordinates: list[int] | tuple[int, int]) -> None:
+                       coordinates: list[int] | tuple[int, int], clip: bool = False) -> None:
         """Add stuff to the display.
 
         Args:
@@ -125,7 +209,21 @@ class Screen:
                 The grid of characters to add to the display.
             coordinates (list[int] | tuple[int, int]):
                 The coordinates of the top-left slot to add the grid from.
+            clip (bool, optional):
+                If True, the parts of the grid outside the display are dropped instead of raising an IndexError.
+                Defaults to False.
         """
+        if clip:
+            height = len(self.display_array)
+            width = len(self.display_array[0]) if height else 0
+            for y, row in enumerate(grid_to_add):
+                if not 0 <= y + coordinates[0] < height:
+                    continue
+                for x, column in enumerate(row):
+                    if column[0] != "" and 0 <= x + coordinates[1] < width:
+                        self.display_array[y + coordinates[0]][x + coordinates[1]] = column
+            return
+
         if (coordinates[0] + len(grid_to_add) > len(self.display_array)-1 or
                 coordinates[1] + len(grid_to_add[0]) > len(self.display_array[0])-1):
             raise IndexError("Coordinates out of bounds.")
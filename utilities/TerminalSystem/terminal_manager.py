@@ -29,12 +29,13 @@ sys.path.append(import_directory)
 import_directory = os.path.join(import_directory, "TerminalSystem")
 sys.path.append(import_directory)
 
-from time import sleep
+import precise_time
 import color
 import cursor as cursor_manager
 import keyboard_input as kb
 import window_manager
 import terminal_objects as TObj
+from resize_watcher import ResizeWatcher
 
 
 class TerminalManager:
@@ -72,10 +73,14 @@ class TerminalManager:
         # self.cursor.hide()
         # self.cursor.clear_screen()
 
-        # Calibrate the screen size.
-        self.screen_size = self.get_screen_size(screen_size)
-        print(self.screen_size)
-        input()
+        # Detect the screen size, only falling back to calibrating it by hand if the terminal can't report it.
+        self.min_screen_size = screen_size
+        self.resize_watcher = ResizeWatcher(self.on_resize, screen_size)
+        self.screen_size = self.resize_watcher.size
+        if self.screen_size is None:
+            self.screen_size = self.get_screen_size(screen_size)
+            print(self.screen_size)
+            input()
         # self.cursor.set_screen(screen)
 
         # Set up the display.
@@ -84,6 +89,24 @@ class TerminalManager:
         # Set up the color_scheme scheme.
         self.color_scheme = self.default_color_scheme
 
+    def check_resize(self) -> bool:
+        """Check whether the terminal has been resized and reflow everything if so. Designed to be run every frame.
+
+        Returns:
+            bool: True if the terminal was resized.
+        """
+        return self.resize_watcher.check() is not None
+
+    def on_resize(self, screen_size: tuple[int, int]) -> None:
+        """Resize the window manager to match a new terminal size.
+
+        Args:
+            screen_size (tuple[int, int]):
+                The new screen size (y, x).
+        """
+        self.screen_size = screen_size
+        self.window_manager.resize(screen_size)
+
     def get_screen_size(self, min_screen_size: tuple[int, int]) -> tuple[int, int]:
         """Get the screen size.
 
@@ -130,7 +153,7 @@ class TerminalManager:
             print("x: " + str(x) + " y: " + str(y), end="", flush=True)
 
             # Sleep to avoid excessive speed
-            sleep(0.025)
+            precise_time.sleep(0.025)
 
         return y+1, x
 
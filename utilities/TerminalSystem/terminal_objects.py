@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from enum import Enum
 from copy import deepcopy
 import color
@@ -41,6 +42,8 @@ class TerminalObject:
         self.z_index = z_index
         self.visible = visible
         self.should_refresh = True
+        # Optional function of the screen size returning (coordinates, size), for objects that follow the terminal size.
+        self.layout = None
 
         if self.contents is None:
             self.contents = [[["#", []] for _ in range(self.size[1])] for _ in range(self.size[0])]
@@ -177,6 +180,39 @@ class TerminalObject:
         self.visible = visible
         self.should_refresh = True
 
+    def set_layout(self, layout: callable = None) -> None:
+        """Set the function used to place the object when the screen is resized.
+
+        Args:
+            layout (callable, optional):
+                Takes the screen size (y, x) and returns the new (coordinates, size) of the object.
+                Defaults to None, which leaves the object where it is.
+        """
+        self.layout = layout
+
+    def reflow(self, screen_size: tuple[int, int]) -> bool:
+        """Move and resize the object to fit a new screen size, if it has a layout.
+
+        Args:
+            screen_size (tuple[int, int]):
+                The new screen size (y, x).
+
+        Returns:
+            bool: True if the object was changed.
+        """
+        if self.layout is None:
+            return False
+
+        coordinates, size = self.layout(screen_size)
+        changed = False
+        if tuple(coordinates) != tuple(self.coordinates):
+            self.set_coordinates(tuple(coordinates))
+            changed = True
+        if tuple(size) != tuple(self.size):
+            self.set_size(tuple(size))
+            changed = True
+        return changed
+
     def refreshed(self) -> None:
         """Set the object to not need refreshing."""
         self.should_refresh = False
@@ -326,7 +362,8 @@ class Box(TerminalObject):
         # self.contents = [[
         #     ["#", []] for _ in range(col_offset, self.size[1] - col_offset)
         # ] for _ in range(row_offset, self.size[0] - row_offset)]
-        for y in range(row_offset-1, self.size[0] - row_offset):
+        # Starts at the padding row above the text, but never on the top border.
+        for y in range(max(row_offset - self.padding[0], 0), self.size[0] - row_offset):
             for x in range(col_offset, self.size[1] - col_offset):
                 self.contents[y][x] = [" ", [color.BACKGROUND_BLACK]]
 
@@ -334,13 +371,25 @@ class Box(TerminalObject):
         grid_text = to_char_array(self.text, (self.size[0] - 2*row_offset, self.size[1] - 2*col_offset))
         grid_text = apply_color_scheme(self.color_scheme, grid_text)
 
-        # Apply the text to the box.
+        # Apply the text to the box. apply_color_scheme() gives every cell its own list, so there's nothing to copy.
         for y in range(len(grid_text)):
             for x in range(len(grid_text[y])):
-                self.contents[y + row_offset][x + col_offset] = deepcopy(grid_text[y][x])
+                self.contents[y + row_offset][x + col_offset] = grid_text[y][x]
 
         self.should_refresh = True
 
+    def set_size(self, size: tuple[int, int]) -> None:
+        """Set the size of the box and redraw its border and text to fit.
+
+        Args:
+            size (tuple[int, int]):
+                The new size of the box (y, x).
+        """
+        self.size = deepcopy(size)
+        self.contents = [[[" ", [color.BACKGROUND_BLACK]] for _ in range(self.size[1])] for _ in range(self.size[0])]
+        self.apply_border()
+        self.set_text(self.text)
+
     def get_text(self) -> str:
         """Return the text of the box.
 
@@ -372,6 +421,203 @@ class Box(TerminalObject):
                     self.contents[0][i + offset] = [letter, deepcopy(self.title_mods)]
 
 
+class Viewport(TerminalObject):
+    """A scrollable window onto lines of text that are only fetched and laid out while they are visible."""
+
+    def __init__(self, name: str, description: str | None, line_provider: callable,
+                 coordinates: tuple[int, int], size: tuple[int, int], z_index: int = 0,
+                 line_count: int | None = None, mods: list[str] | None = None, cache_size: int = 256,
+                 history_size: int = 10_000) -> None:
+        """Initialize the Viewport object.
+
+        Args:
+            name (str):
+                The name of the viewport.
+            description (str, optional):
+                The description of the viewport.
+                Defaults to None.
+            line_provider (callable | iterable):
+                Either a function taking a line index and returning the line (or None past the end),
+                or an iterable/generator of lines, which is only read as far as has been scrolled.
+                Without a line_count, the end is found from where the function first returns None.
+            coordinates (tuple[int, int]):
+                The coordinates of the viewport (y, x).
+            size (tuple[int, int]):
+                The size of the viewport (y, x).
+            z_index (int, optional):
+                The z-index of the viewport.
+                Defaults to 0.
+            line_count (int | None, optional):
+                The total number of lines, if known. Used to stop scrolling at the end.
+                Defaults to None.
+            mods (list[str] | None, optional):
+                The color mods to apply to the text.
+                Defaults to [color.BACKGROUND_BLACK].
+            cache_size (int, optional):
+                The number of laid-out rows to keep around for scrolling back and forth.
+                Defaults to 256.
+            history_size (int, optional):
+                The most lines read from an iterable that are kept. Lines further back than this behind the
+                furthest one read are forgotten and can't be scrolled back to. Doesn't apply to functions.
+                Defaults to 10_000.
+        """
+        super().__init__(name, description, None, coordinates, size, z_index)
+        self.line_count = line_count
+        self.mods = [color.BACKGROUND_BLACK] if mods is None else deepcopy(mods)
+        self.cache_size = cache_size
+        self.history_size = history_size
+        self.scroll_offset = 0
+
+        # Iterables are wrapped so they can be read lazily but still looked up by index.
+        if callable(line_provider):
+            self.line_provider = line_provider
+            self.read_lines = None
+        else:
+            self.line_provider = self._read_iterable_line
+            self.read_lines = []
+            # The index of read_lines[0]; lines before it have been forgotten.
+            self.read_start = 0
+            self.line_iterator = iter(line_provider)
+
+        self.row_cache: OrderedDict[int, list[list[str | list[str]]]] = OrderedDict()
+        self.contents_outdated = True
+
+    def _read_iterable_line(self, index: int) -> str | None:
+        """Return a line from the wrapped iterable, reading it only as far as needed.
+        Lines that have been forgotten come back empty."""
+        while self.read_start + len(self.read_lines) <= index:
+            try:
+                self.read_lines.append(str(next(self.line_iterator)).rstrip("\n"))
+            except StopIteration:
+                self.line_count = self.read_start + len(self.read_lines)
+                return None
+
+        # Forget the oldest lines, a batch at a time so it isn't done on every line.
+        excess = len(self.read_lines) - self.history_size
+        if excess > self.history_size // 8:
+            del self.read_lines[:excess]
+            self.read_start += excess
+
+        if index < self.read_start:
+            return ""
+        return self.read_lines[index - self.read_start]
+
+    def _find_end(self, past_end: int) -> None:
+        """Find the number of lines from a function provider, given an index it returns None for.
+        Assumes every line before the end exists, and searches for the first missing one."""
+        low, high = 0, past_end
+        while low < high:
+            middle = (low + high) // 2
+            if self.line_provider(middle) is None:
+                high = middle
+            else:
+                low = middle + 1
+        self.line_count = low
+
+    def get_row(self, index: int) -> list[list[str | list[str]]]:
+        """Return a line laid out as a row of the viewport, using the cache if possible.
+
+        Args:
+            index (int):
+                The index of the line.
+
+        Returns:
+            list[list[str | list[str]]]: The row in terminal display format.
+        """
+        row = self.row_cache.get(index)
+        if row is not None:
+            self.row_cache.move_to_end(index)
+            return row
+
+        line = self.line_provider(index)
+        if line is None:
+            line = ""
+        width = self.size[1]
+        row = [[letter, self.mods] for letter in line.expandtabs(4)[:width].ljust(width)]
+
+        self.row_cache[index] = row
+        if len(self.row_cache) > self.cache_size:
+            self.row_cache.popitem(last=False)
+        return row
+
+    def get_contents(self) -> list[list[list[str | list[str]]]]:
+        """Return the contents of the viewport, laying out only the visible lines.
+
+        Returns:
+            list[list[list[str | list[str]]]]: The contents of the viewport.
+        """
+        if self.contents_outdated:
+            self.contents = [self.get_row(self.scroll_offset + y) for y in range(self.size[0])]
+            self.contents_outdated = False
+        return self.contents
+
+    def get_scroll_offset(self) -> int:
+        """Return the index of the first visible line.
+
+        Returns:
+            int: The scroll offset.
+        """
+        return self.scroll_offset
+
+    def scroll_to(self, offset: int) -> None:
+        """Scroll so that the given line is the first visible one, stopping at the start and end of the lines.
+
+        Args:
+            offset (int):
+                The index of the line to show at the top.
+        """
+        # Lines forgotten from an iterable can't be scrolled back to.
+        offset = max(offset, 0 if self.read_lines is None else self.read_start)
+        if self.line_count is None:
+            # Reading the last line that would be shown finds the end of an iterable if it's near.
+            last_line = offset + self.size[0] - 1
+            if self.line_provider(last_line) is None and self.read_lines is None:
+                self._find_end(last_line)
+        if self.line_count is not None:
+            offset = min(offset, max(self.line_count - self.size[0], 0))
+
+        if offset != self.scroll_offset:
+            self.scroll_offset = offset
+            self.contents_outdated = True
+            self.should_refresh = True
+
+    def scroll_by(self, lines: int) -> None:
+        """Scroll a number of lines.
+
+        Args:
+            lines (int):
+                The number of lines to scroll, positive to move further down the text.
+        """
+        self.scroll_to(self.scroll_offset + lines)
+
+    def set_line_count(self, line_count: int | None) -> None:
+        """Set the total number of lines, such as after more have been added.
+
+        Args:
+            line_count (int | None):
+                The total number of lines, or None if unknown.
+        """
+        self.line_count = line_count
+        self.scroll_to(self.scroll_offset)
+
+    def invalidate(self) -> None:
+        """Forget every laid-out row. Needed when the lines behind the viewport have changed."""
+        self.row_cache.clear()
+        self.contents_outdated = True
+        self.should_refresh = True
+
+    def set_size(self, size: tuple[int, int]) -> None:
+        """Set the size of the viewport and lay the lines out again to fit.
+
+        Args:
+            size (tuple[int, int]):
+                The new size of the viewport (y, x).
+        """
+        self.size = deepcopy(size)
+        self.invalidate()
+
+
 class Objects(Enum):
     TERMINAL_OBJECT = TerminalObject
     BOX = Box
+    VIEWPORT = Viewport
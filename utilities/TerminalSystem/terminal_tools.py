@@ -1,3 +1,5 @@
+from operator import is_
+
 import color
 
 
@@ -197,3 +199,111 @@ def apply_color_scheme(color_scheme: list[str] | None, grid_text: list[list[list
         for x, column in enumerate(row):
             grid_text[y][x][1] = color_scheme + grid_text[y][x][1]
     return grid_text
+
+
+def render_rows(display_array: list[list[list[str | list[str]]]],
+                previous_array: list[list[list[str | list[str]]]] | None = None,
+                previous_rows: tuple[tuple[str, ...], ...] | None = None) -> tuple[tuple[str, ...], ...]:
+    """Render every cell of a display array into its final escape string.
+    The result is immutable, so it can be cached and compared without being copied.
+
+    Args:
+        display_array (list[list[list[str | list[str]]]):
+            The display array to render.
+        previous_array (list[list[list[str | list[str]]]] | None, optional):
+            An earlier display array that previous_rows was rendered from.
+            Rows made of the very same cells are reused from previous_rows instead of being rendered again.
+            Defaults to None.
+        previous_rows (tuple[tuple[str, ...], ...] | None, optional):
+            The rendered rows of previous_array.
+            Defaults to None.
+
+    Returns:
+        tuple[tuple[str, ...], ...]: The rendered cells, [row][column].
+    """
+    if previous_array is None or previous_rows is None or len(previous_array) != len(display_array):
+        return tuple(
+            tuple("".join(column[1]) + column[0] + color.END for column in row)
+            for row in display_array
+        )
+
+    rows = []
+    for row, previous_row, rendered in zip(display_array, previous_array, previous_rows):
+        if len(row) == len(previous_row) and all(map(is_, row, previous_row)):
+            rows.append(rendered)
+        else:
+            rows.append(tuple("".join(column[1]) + column[0] + color.END for column in row))
+    return tuple(rows)
+
+
+def assemble_diff_string(previous_rows: tuple[tuple[str, ...], ...],
+                         new_rows: tuple[tuple[str, ...], ...]) -> str:
+    """Assemble the string needed to turn one rendered display into another.
+    Each run of changed cells on a row is written after a single cursor jump.
+
+    Args:
+        previous_rows (tuple[tuple[str, ...], ...]):
+            The rendered rows currently on the terminal (see render_rows()).
+        new_rows (tuple[tuple[str, ...], ...]):
+            The rendered rows that should be on the terminal.
+
+    Returns:
+        str: The string to print. Empty if nothing changed.
+    """
+    pieces = []
+    for y, new_row in enumerate(new_rows):
+        old_row = previous_rows[y] if y < len(previous_rows) else ()
+        # Rows are tuples, so an unchanged row is skipped with a single comparison.
+        if new_row == old_row:
+            continue
+
+        x = 0
+        while x < len(new_row):
+            if x < len(old_row) and new_row[x] == old_row[x]:
+                x += 1
+                continue
+            # Found a changed cell, so collect the whole run of changes.
+            start = x
+            while x < len(new_row) and (x >= len(old_row) or new_row[x] != old_row[x]):
+                x += 1
+            pieces.append(f"\033[{y+1};{start+1}H" + "".join(new_row[start:x]))
+
+    return "".join(pieces)
+
+
+def find_vertical_shift(previous_rows: list | tuple, new_rows: list | tuple, max_shift: int | None = None) -> int:
+    """Find how far the rows of a region have moved vertically.
+
+    Args:
+        previous_rows (list | tuple):
+            The rows of the region as they were.
+        new_rows (list | tuple):
+            The rows of the region as they are now.
+        max_shift (int | None, optional):
+            The largest shift to look for in either direction.
+            Defaults to None, the height of the region.
+
+    Returns:
+        int: The shift that makes the most rows match, positive if the contents moved up. 0 if no shift beats
+            leaving the rows where they are.
+    """
+    height = min(len(previous_rows), len(new_rows))
+    if max_shift is None:
+        max_shift = height - 1
+
+    best_shift = 0
+    best_matches = sum(1 for y in range(height) if new_rows[y] == previous_rows[y])
+
+    for shift in range(-max_shift, max_shift + 1):
+        if shift == 0:
+            continue
+        # Not enough rows left over to beat the best so far.
+        if height - abs(shift) <= best_matches:
+            continue
+        matches = sum(1 for y in range(max(0, -shift), min(height, height - shift))
+                      if new_rows[y] == previous_rows[y + shift])
+        if matches > best_matches:
+            best_shift = shift
+            best_matches = matches
+
+    return best_shift
@@ -2,6 +2,7 @@
 import pickle
 
 import color
+from compositor import Compositor
 from display import Display
 from screen_class import Screen
 
@@ -18,9 +19,11 @@ class WindowManager:
         self.screen_size: tuple[int, int] = screen_size
         self.screens: list[Screen] = []
         self.current_screen: Screen | None = None
+        self.overlays: list[Screen] = []
 
         # Set up the display.
         self.display: Display = Display(screen_size)
+        self.compositor: Compositor = Compositor(self.display)
 
         self.default_color_scheme = {
             "status": [color.WHITE, color.BACKGROUND_BLACK],
@@ -53,6 +56,7 @@ class WindowManager:
                 The name of the screen.
         """
         self.screens = [screen for screen in self.screens if screen.get_name() != screen_name]
+        self.overlays = [screen for screen in self.overlays if screen.get_name() != screen_name]
 
     def load_screen_from_file(self, screen_name: str, file_path: str) -> None:
         """Load a screen from a file and add it to the WindowManager.
@@ -109,7 +113,82 @@ class WindowManager:
         """
         return self.current_screen
 
+    def resize(self, screen_size: tuple[int, int]) -> None:
+        """Resize the display and every screen, then repaint the current screen in place.
+
+        Args:
+            screen_size (tuple[int, int]):
+                The new screen size (y, x).
+        """
+        self.screen_size = screen_size
+        for screen in self.screens:
+            screen.resize(screen_size)
+
+        self.display.resize(screen_size)
+        # Every cached frame has the old size.
+        self.compositor.invalidate()
+
+        if self.current_screen is not None:
+            self.refresh_screen()
+
+    def push_overlay(self, screen_name: str) -> None:
+        """Draw a screen on top of the current screen, such as a popup. Only its objects cover the screen below.
+
+        Args:
+            screen_name (str):
+                The name of the screen.
+        """
+        screen = self.get_screen(screen_name)
+        if screen is None:
+            raise ValueError(f"There is no screen named {screen_name}.")
+        self.overlays.append(screen)
+        self.refresh_screen()
+
+    def pop_overlay(self, screen_name: str | None = None) -> Screen | None:
+        """Remove an overlay and update the display.
+
+        Args:
+            screen_name (str | None, optional):
+                The name of the overlay to remove.
+                Defaults to None, the topmost overlay.
+
+        Returns:
+            Screen | None: The removed overlay, or None if there was nothing to remove.
+        """
+        removed = None
+        if screen_name is None:
+            if self.overlays:
+                removed = self.overlays.pop()
+        else:
+            for screen in self.overlays:
+                if screen.get_name() == screen_name:
+                    removed = screen
+            self.overlays = [screen for screen in self.overlays if screen is not removed]
+
+        if removed is not None:
+            self.refresh_screen()
+        return removed
+
+    def get_overlays(self) -> list[Screen]:
+        """Return the overlays drawn on top of the current screen.
+
+        Returns:
+            list[Screen]: The overlays, lowest first.
+        """
+        return self.overlays
+
+    def precompute_transition(self, first_screen_name: str, second_screen_name: str) -> None:
+        """Cache the diffs between two screens ahead of time so switching between them only prints the difference.
+
+        Args:
+            first_screen_name (str):
+                The name of the first screen.
+            second_screen_name (str):
+                The name of the second screen.
+        """
+        self.compositor.precompute((self.get_screen(first_screen_name), self.overlays),
+                                   (self.get_screen(second_screen_name), self.overlays))
+
     def refresh_screen(self) -> None:
         """Refresh the screen array and display it."""
-        self.display.set_display(self.current_screen.update_display())
-        self.display.antiflash_refresh_display()
+        self.compositor.show(self.current_screen, self.overlays)
@@ -0,0 +1,134 @@
+"""Factorials and counting functions for exact dice probabilities, fast and cached even for big numbers.
+
+    factorial(): n!, by binary splitting, remembering earlier results.
+    comb(): The number of ways to choose k of n things, ignoring order.
+    perm(): The number of ways to choose k of n things in order.
+    multinomial(): The number of ways to split things into groups of given sizes.
+"""
+from bisect import bisect_right, insort
+from functools import lru_cache
+
+
+# How many factorials to remember. Each one can be reused as the start of any bigger factorial.
+MAX_REMEMBERED = 256
+
+# Ranges shorter than this are multiplied in a simple loop; splitting them further doesn't pay off.
+_SPLIT_SIZE = 16
+
+_factorials: dict[int, int] = {0: 1}
+_remembered = [0]
+
+
+def _product(low: int, high: int) -> int:
+    """Return low * (low + 1) * ... * high, or 1 if the range is empty.
+
+    Splits the range in half and multiplies the halves, so the big multiplications are between numbers of
+    similar size, which Python multiplies much faster than a huge number by a small one over and over.
+    """
+    if high - low < _SPLIT_SIZE:
+        result = 1
+        for number in range(low, high + 1):
+            result *= number
+        return result
+    middle = (low + high) // 2
+    return _product(low, middle) * _product(middle + 1, high)
+
+
+def factorial(number: int) -> int:
+    """Return number! (factorial(5) = 1*2*3*4*5 = 120).
+
+    Starts from the biggest remembered factorial below the number, so asking for close factorials
+    again and again only multiplies the difference.
+
+    Args:
+        number (int):
+            The number. Must not be negative.
+
+    Returns:
+        int: The factorial.
+
+    Raises:
+        ValueError: If number is negative.
+    """
+    if number < 0:
+        raise ValueError(f"Can't take the factorial of {number}.")
+    result = _factorials.get(number)
+    if result is not None:
+        return result
+
+    start = _remembered[bisect_right(_remembered, number) - 1]
+    result = _factorials[start] * _product(start + 1, number)
+    if len(_remembered) < MAX_REMEMBERED:
+        _factorials[number] = result
+        insort(_remembered, number)
+    return result
+
+
+@lru_cache(maxsize=4096)
+def perm(total: int, chosen: int) -> int:
+    """Return the number of ways to choose some things out of a total, in order. (total! / (total - chosen)!)
+
+    Args:
+        total (int):
+            The number of things to choose from.
+        chosen (int):
+            How many are chosen.
+
+    Returns:
+        int: The number of ways, or 0 if chosen is more than total.
+
+    Raises:
+        ValueError: If either number is negative.
+    """
+    if total < 0 or chosen < 0:
+        raise ValueError(f"Can't choose {chosen} of {total}.")
+    if chosen > total:
+        return 0
+    return _product(total - chosen + 1, total)
+
+
+@lru_cache(maxsize=4096)
+def comb(total: int, chosen: int) -> int:
+    """Return the number of ways to choose some things out of a total, ignoring order. (total choose chosen)
+
+    Args:
+        total (int):
+            The number of things to choose from.
+        chosen (int):
+            How many are chosen.
+
+    Returns:
+        int: The number of ways, or 0 if chosen is more than total.
+
+    Raises:
+        ValueError: If either number is negative.
+    """
+    if total < 0 or chosen < 0:
+        raise ValueError(f"Can't choose {chosen} of {total}.")
+    if chosen > total:
+        return 0
+    # Choosing k is the same as leaving out total - k, and the smaller one is less work.
+    chosen = min(chosen, total - chosen)
+    return perm(total, chosen) // factorial(chosen)
+
+
+def multinomial(*counts: int) -> int:
+    """Return the number of ways to split things into groups of the given sizes,
+    such as the ways 5 dice can show two 1s, two 3s and a 6 (multinomial(2, 2, 1) = 30).
+
+    Args:
+        *counts (int):
+            The size of each group.
+
+    Returns:
+        int: The number of ways.
+
+    Raises:
+        ValueError: If a count is negative.
+    """
+    result = 1
+    total = 0
+    for count in counts:
+        total += count
+        result *= comb(total, count)
+    return result
@@ -18,6 +18,11 @@
     replace_current(): Identical to clear_line() but with a different name.
     replace_previous(): Move the curser to the previous line and clears it to allow overwriting.
 
+    set_scroll_region(): Limit scrolling to the lines between a top and bottom line.
+    reset_scroll_region(): Let the whole screen scroll again.
+    scroll_up(): Scroll the contents of the scroll region up a given number of lines (Default: 1).
+    scroll_down(): Scroll the contents of the scroll region down a given number of lines (Default: 1).
+
     save(): Save the current position of the cursor. Can be loaded again using load().
     load(): Load the previously saved cursor position. Position can be saved with save().
     get_saved_pos(): Get the saved cursor position.
@@ -144,6 +149,45 @@ class Cursor:
         print("\033[2J", end="")
         self.set_pos()
 
+    # Scroll regions
+
+    def set_scroll_region(self, top: int, bottom: int) -> None:
+        """Limit scrolling to the lines from top to bottom, inclusive. Moves the cursor to the top-left corner.
+
+        Args:
+            top (int):
+                The first line of the region.
+            bottom (int):
+                The last line of the region.
+        """
+        print(f"\033[{top+1};{bottom+1}r", end="")
+        self.cursor_pos = [0, 0]
+
+    def reset_scroll_region(self) -> None:
+        """Let the whole screen scroll again. Moves the cursor to the top-left corner."""
+        print("\033[r", end="")
+        self.cursor_pos = [0, 0]
+
+    def scroll_up(self, num: int = 1) -> None:
+        """Scroll the contents of the scroll region up, adding blank lines at the bottom.
+
+        Args:
+            num (int, optional):
+                The number of lines to scroll.
+                Defaults to 1.
+        """
+        print(f"\033[{num}S", end="")
+
+    def scroll_down(self, num: int = 1) -> None:
+        """Scroll the contents of the scroll region down, adding blank lines at the top.
+
+        Args:
+            num (int, optional):
+                The number of lines to scroll.
+                Defaults to 1.
+        """
+        print(f"\033[{num}T", end="")
+
     # Prep to replace previous text
 
     def replace_current(self) -> None:
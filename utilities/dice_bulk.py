@@ -0,0 +1,195 @@
+"""Roll dice in bulk with NumPy, for Monte Carlo testing of encounters.
+
+    roll_pool(): Roll one dice pool (like 4d6 drop lowest) many times at once.
+    roll_expression(): Roll a dice expression (like "4d6dl1 + 2" or "1d20 adv + 5") many times at once.
+    roll_expressions(): Roll several dice expressions many times each.
+    summarize(): Summary statistics of a set of results.
+    get_generator(): The NumPy generator used for the rolls.
+    seed(): Reseed the generator, to repeat the same rolls.
+"""
+# Disables annoying and usually incorrect warnings.
+# pylint: disable=wrong-import-position
+# pylint: disable=import-error
+
+# Make sure the dependency is installed.
+import dependency_installer
+dependency_installer.install_dependency("numpy")
+
+import numpy as np
+
+from dice_expression import MAX_EXPLOSIONS, compile_expression
+
+
+_generator = np.random.default_rng()
+
+
+def get_generator() -> np.random.Generator:
+    """Return the generator used for bulk rolls.
+
+    Returns:
+        np.random.Generator: The generator.
+    """
+    return _generator
+
+
+def seed(seed_value: int | None = None) -> None:
+    """Reseed the generator used for bulk rolls, so the same seed repeats the same rolls.
+
+    Args:
+        seed_value (int | None, optional):
+            The seed.
+            Defaults to None, seeded from the system.
+    """
+    global _generator
+    _generator = np.random.default_rng(seed_value)
+
+
+def _dice_dtype(sides: int) -> type:
+    """Return the smallest integer type that holds one die's result, to keep big arrays small and fast."""
+    if sides <= np.iinfo(np.uint8).max:
+        return np.uint8
+    if sides <= np.iinfo(np.uint16).max:
+        return np.uint16
+    return np.int64
+
+
+def roll_pool(count: int, dice: int, sides: int, drop_lowest: int = 0, drop_highest: int = 0,
+              modifier: int = 0, explode: bool = False, generator: np.random.Generator | None = None) -> np.ndarray:
+    """Roll a pool of dice many times at once, optionally dropping the lowest or highest dice of each roll.
+
+    Args:
+        count (int):
+            How many times to roll the pool.
+        dice (int):
+            The number of dice in the pool.
+        sides (int):
+            The number of sides on each die.
+        drop_lowest (int, optional):
+            How many of the lowest dice to drop from each roll. 4d6 drop lowest is drop_lowest=1.
+            Defaults to 0.
+        drop_highest (int, optional):
+            How many of the highest dice to drop from each roll.
+            Defaults to 0.
+        modifier (int, optional):
+            Added to each total.
+            Defaults to 0.
+        explode (bool, optional):
+            Whether dice that roll their highest side are rolled again and added, before any are dropped.
+            Defaults to False.
+        generator (np.random.Generator | None, optional):
+            The generator to use.
+            Defaults to None, the module's generator.
+
+    Returns:
+        np.ndarray: The total of each roll, as 64-bit integers.
+
+    Raises:
+        ValueError: If more dice are dropped than are rolled.
+    """
+    if drop_lowest + drop_highest > dice:
+        raise ValueError(f"Can't drop {drop_lowest + drop_highest} of {dice} dice.")
+    generator = _generator if generator is None else generator
+
+    rolls = generator.integers(1, sides, size=(count, dice), dtype=_dice_dtype(sides), endpoint=True)
+    if explode and sides > 1:
+        # Only the dice that rolled their highest side are rolled again, round after round.
+        rolls = rolls.astype(np.int64)
+        exploding = np.flatnonzero(rolls == sides)
+        for _ in range(MAX_EXPLOSIONS):
+            if exploding.size == 0:
+                break
+            extra = generator.integers(1, sides, size=exploding.size, endpoint=True)
+            rolls.flat[exploding] += extra
+            exploding = exploding[extra == sides]
+    if drop_lowest + drop_highest == 1:
+        # The common single drop (4d6 drop lowest, advantage) only needs each row's minimum or maximum.
+        dropped = rolls.min(axis=1) if drop_lowest else rolls.max(axis=1)
+        return rolls.sum(axis=1, dtype=np.int64) - dropped + modifier
+    if drop_lowest or drop_highest:
+        # Sorting each row puts the dice to drop at the ends.
+        rolls.sort(axis=1)
+        rolls = rolls[:, drop_lowest:dice - drop_highest]
+    return rolls.sum(axis=1, dtype=np.int64) + modifier
+
+
+def roll_expression(expression: str, count: int, generator: np.random.Generator | None = None) -> np.ndarray:
+    """Roll a dice expression many times at once. Each group of dice in it is rolled as one array.
+
+    Args:
+        expression (str):
+            The expression, such as "4d6dl1", "2d20kh1 + 5" or "1d20 adv + 1d4 - 1". See dice_expression.
+        count (int):
+            How many times to roll it.
+        generator (np.random.Generator | None, optional):
+            The generator to use.
+            Defaults to None, the module's generator.
+
+    Returns:
+        np.ndarray: The result of each roll.
+
+    Raises:
+        ValueError: If the expression can't be parsed.
+    """
+    # Parsed once and cached, the same as single rolls.
+    compiled = compile_expression(expression)
+    results = np.full(count, compiled.constant, dtype=np.int64)
+    for sign, term in compiled.terms:
+        pool = roll_pool(count, term.count, term.sides, term.drop_lowest, term.drop_highest,
+                         explode=term.explode, generator=generator)
+        if sign < 0:
+            results -= pool
+        else:
+            results += pool
+    return results
+
+
+def roll_expressions(expressions: list[str], count: int,
+                     generator: np.random.Generator | None = None) -> dict[str, np.ndarray]:
+    """Roll several dice expressions many times each.
+
+    Args:
+        expressions (list[str]):
+            The expressions.
+        count (int):
+            How many times to roll each one.
+        generator (np.random.Generator | None, optional):
+            The generator to use.
+            Defaults to None, the module's generator.
+
+    Returns:
+        dict[str, np.ndarray]: The results of each expression.
+    """
+    return {expression: roll_expression(expression, count, generator) for expression in expressions}
+
+
+def summarize(results: np.ndarray, percentiles: tuple[float, ...] = (5, 25, 50, 75, 95)) -> dict:
+    """Work out summary statistics of a set of results.
+
+    Args:
+        results (np.ndarray):
+            The results, such as from roll_expression().
+        percentiles (tuple[float, ...], optional):
+            The percentiles to include.
+            Defaults to (5, 25, 50, 75, 95).
+
+    Returns:
+        dict: The count, mean, standard deviation, minimum, maximum, the requested percentiles,
+            and the frequency of each result ("frequencies", as {result: fraction}).
+    """
+    results = np.asarray(results)
+    if results.size == 0:
+        return {"count": 0}
+
+    minimum = int(results.min())
+    counts = np.bincount(results - minimum)
+    return {
+        "count": int(results.size),
+        "mean": float(results.mean()),
+        "std": float(results.std()),
+        "min": minimum,
+        "max": int(results.max()),
+        "percentiles": {percentile: float(value)
+                        for percentile, value in zip(percentiles, np.percentile(results, percentiles))},
+        "frequencies": {minimum + int(value): float(frequency) / results.size
+                        for value, frequency in enumerate(counts) if frequency},
+    }
@@ -0,0 +1,285 @@
+"""Work out the exact probabilities of dice expressions, instead of simulating them.
+
+    distribution(): The Distribution of a dice expression, like "4d6dl1" or "1d20 adv + 5". Cached.
+    term_distribution(): The Distribution of a single group of dice. Cached.
+    Distribution: Probabilities of each total, with the mean, percentiles and so on.
+
+Sums of dice are found by convolving their probabilities (with an FFT once the pools get big),
+and the sums of smaller pools are remembered so bigger pools can be built out of them.
+"""
+# Disables annoying and usually incorrect warnings.
+# pylint: disable=wrong-import-position
+# pylint: disable=import-error
+from functools import lru_cache
+
+# Make sure the dependency is installed.
+import dependency_installer
+dependency_installer.install_dependency("numpy")
+
+import numpy as np
+
+from combinatorics import comb
+from dice_expression import MAX_EXPLOSIONS, DiceTerm, compile_expression
+
+
+# Above this many multiplications, convolving with an FFT is faster than directly.
+FFT_THRESHOLD = 50_000
+
+# Exploding dice can go on (almost) forever; chances smaller than this are left out.
+NEGLIGIBLE = 1e-15
+
+
+class Distribution:
+    """The probability of every possible total of a roll."""
+
+    def __init__(self, offset: int, probabilities: np.ndarray) -> None:
+        """Initialize the Distribution object.
+
+        Args:
+            offset (int):
+                The lowest possible total.
+            probabilities (np.ndarray):
+                The probability of each total, starting from offset.
+        """
+        self.offset = offset
+        self.probabilities = probabilities
+        self.probabilities.flags.writeable = False
+
+    @property
+    def minimum(self) -> int:
+        """The lowest possible total."""
+        return self.offset
+
+    @property
+    def maximum(self) -> int:
+        """The highest possible total."""
+        return self.offset + len(self.probabilities) - 1
+
+    def values(self) -> np.ndarray:
+        """Return every possible total, lowest first.
+
+        Returns:
+            np.ndarray: The totals, in the same order as the probabilities.
+        """
+        return np.arange(self.offset, self.offset + len(self.probabilities))
+
+    def mean(self) -> float:
+        """Return the average total.
+
+        Returns:
+            float: The expected value.
+        """
+        return float(np.dot(self.values(), self.probabilities))
+
+    def variance(self) -> float:
+        """Return the variance of the total.
+
+        Returns:
+            float: The variance.
+        """
+        deviations = self.values() - self.mean()
+        return float(np.dot(deviations * deviations, self.probabilities))
+
+    def std(self) -> float:
+        """Return the standard deviation of the total.
+
+        Returns:
+            float: The standard deviation.
+        """
+        return self.variance() ** 0.5
+
+    def probability(self, total: int) -> float:
+        """Return the chance of rolling exactly a total.
+
+        Args:
+            total (int):
+                The total.
+
+        Returns:
+            float: The chance, from 0 to 1.
+        """
+        index = total - self.offset
+        return float(self.probabilities[index]) if 0 <= index < len(self.probabilities) else 0.0
+
+    def at_least(self, total: int) -> float:
+        """Return the chance of rolling a total or higher, such as the chance to hit a given AC.
+
+        Args:
+            total (int):
+                The total.
+
+        Returns:
+            float: The chance, from 0 to 1.
+        """
+        index = min(max(total - self.offset, 0), len(self.probabilities))
+        return float(self.probabilities[index:].sum())
+
+    def at_most(self, total: int) -> float:
+        """Return the chance of rolling a total or lower.
+
+        Args:
+            total (int):
+                The total.
+
+        Returns:
+            float: The chance, from 0 to 1.
+        """
+        return 1.0 - self.at_least(total + 1)
+
+    def percentile(self, percent: float) -> int:
+        """Return the lowest total that at least the given percent of rolls come in at or under.
+
+        Args:
+            percent (float):
+                The percent, from 0 to 100. 50 is the median.
+
+        Returns:
+            int: The total.
+        """
+        cumulative = np.cumsum(self.probabilities)
+        # A tiny allowance keeps rounding error from pushing, say, the 100th percentile off the end.
+        index = int(np.searchsorted(cumulative, percent / 100 - 1e-12))
+        return self.offset + min(index, len(self.probabilities) - 1)
+
+    def as_dict(self) -> dict[int, float]:
+        """Return the chance of each total that can be rolled.
+
+        Returns:
+            dict[int, float]: The chances, by total.
+        """
+        return {self.offset + i: float(chance) for i, chance in enumerate(self.probabilities) if chance > 0}
+
+    def __add__(self, other: "Distribution") -> "Distribution":
+        return Distribution(self.offset + other.offset, _convolve(self.probabilities, other.probabilities))
+
+    def __neg__(self) -> "Distribution":
+        return Distribution(-self.maximum, self.probabilities[::-1].copy())
+
+    def __sub__(self, other: "Distribution") -> "Distribution":
+        return self + -other
+
+    def __repr__(self) -> str:
+        return f"Distribution({self.minimum}..{self.maximum}, mean={self.mean():.3f})"
+
+
+def _convolve(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Return the probabilities of the sum of two independent totals."""
+    if len(first) * len(second) < FFT_THRESHOLD:
+        return np.convolve(first, second)
+
+    length = len(first) + len(second) - 1
+    size = 1 << (length - 1).bit_length()
+    result = np.fft.irfft(np.fft.rfft(first, size) * np.fft.rfft(second, size), size)[:length]
+    # The FFT leaves tiny rounding errors, including slightly negative chances.
+    np.clip(result, 0, None, out=result)
+    return result / result.sum()
+
+
+@lru_cache(maxsize=256)
+def _die(sides: int, explode: bool) -> Distribution:
+    """Return the distribution of a single die."""
+    if not explode or sides == 1:
+        return Distribution(1, np.full(sides, 1 / sides))
+
+    # Each explosion adds another roll of the die, so k explosions give k * sides plus a final non-maximum roll.
+    levels = 1
+    while levels < MAX_EXPLOSIONS and sides ** -levels > NEGLIGIBLE:
+        levels += 1
+    probabilities = np.zeros(levels * sides + (sides if levels == MAX_EXPLOSIONS else 0))
+    for level in range(levels):
+        start = level * sides
+        probabilities[start:start + sides - 1] = sides ** -(level + 1)
+    if levels == MAX_EXPLOSIONS:
+        # The last allowed explosion can't explode again, so its maximum stays.
+        probabilities[levels * sides:] = sides ** -(levels + 1)
+    return Distribution(1, probabilities / probabilities.sum())
+
+
+@lru_cache(maxsize=1024)
+def _pool(sides: int, explode: bool, count: int) -> Distribution:
+    """Return the distribution of the sum of a pool of dice, built by doubling from smaller pools."""
+    if count == 1:
+        return _die(sides, explode)
+    half = _pool(sides, explode, count // 2)
+    result = half + half
+    if count % 2:
+        result = result + _die(sides, explode)
+    return result
+
+
+def _kept_pool(sides: int, explode: bool, count: int, drop_lowest: int, drop_highest: int) -> Distribution:
+    """Return the distribution of a pool with some of its highest and lowest dice left out.
+
+    Goes through the faces from highest to lowest, tracking how many dice have been placed so far and the total of
+    the ones kept. The dice ranked drop_highest up to count - drop_lowest (highest first) are the kept ones.
+    """
+    die = _die(sides, explode)
+    kept_from, kept_to = drop_highest, count - drop_lowest
+    max_total = die.maximum * (kept_to - kept_from)
+
+    # states[placed] = chance of each kept total so far.
+    states = np.zeros((count + 1, max_total + 1))
+    states[0, 0] = 1.0
+    for value in range(die.maximum, die.minimum - 1, -1):
+        chance = die.probability(value)
+        if chance == 0:
+            continue
+        new_states = states.copy()
+        for placed in range(count):
+            if not states[placed].any():
+                continue
+            for ties in range(1, count - placed + 1):
+                # The `ties` dice showing this value take the next ranks; some of those ranks may be kept.
+                kept = max(0, min(placed + ties, kept_to) - max(placed, kept_from))
+                weight = comb(count - placed, ties) * chance ** ties
+                shift = kept * value
+                new_states[placed + ties, shift:] += weight * states[placed, :max_total + 1 - shift]
+        states = new_states
+
+    totals = states[count]
+    # The lowest possible kept total is every kept die showing the die's minimum.
+    offset = die.minimum * (kept_to - kept_from)
+    return Distribution(offset, totals[offset:] / totals.sum())
+
+
+@lru_cache(maxsize=256)
+def _term_distribution(count: int, sides: int, drop_lowest: int, drop_highest: int, explode: bool) -> Distribution:
+    """Cached body of term_distribution()."""
+    if drop_lowest or drop_highest:
+        return _kept_pool(sides, explode, count, drop_lowest, drop_highest)
+    return _pool(sides, explode, count)
+
+
+def term_distribution(term: DiceTerm) -> Distribution:
+    """Return the distribution of one group of dice, such as 4d6dl1.
+
+    Args:
+        term (DiceTerm):
+            The dice.
+
+    Returns:
+        Distribution: The distribution.
+    """
+    return _term_distribution(term.count, term.sides, term.drop_lowest, term.drop_highest, term.explode)
+
+
+@lru_cache(maxsize=256)
+def distribution(expression: str) -> Distribution:
+    """Return the exact distribution of a dice expression.
+
+    Args:
+        expression (str):
+            The expression, such as "4d6dl1", "1d20 adv + 5" or "8d6 - 1d4". See dice_expression.
+
+    Returns:
+        Distribution: The distribution.
+
+    Raises:
+        ValueError: If the expression can't be parsed.
+    """
+    compiled = compile_expression(expression)
+    result = Distribution(compiled.constant, np.ones(1))
+    for sign, term in compiled.terms:
+        term_result = term_distribution(term)
+        result = result + term_result if sign > 0 else result - term_result
+    return result
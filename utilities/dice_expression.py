@@ -0,0 +1,298 @@
+"""Compile dice expressions like "2d20kh1 + 1d4! - 2" once and roll them as often as needed.
+
+    compile_expression(): Parse an expression into a DiceExpression, cached by the expression string.
+    roll_expression(): Compile (or reuse) an expression and roll it once.
+    DiceExpression: A compiled expression. Call roll() to roll it.
+    DiceTerm: One group of dice in an expression, like 4d6dl1.
+
+    Expression format:
+        NdM: N dice with M sides. N can be left out for 1, and d% is a d100.
+        khX / kX, klX: Keep the highest or lowest X dice.
+        dhX, dlX: Drop the highest or lowest X dice.
+        !: Exploding dice. A die that rolls its highest side is rolled again and added.
+        adv, dis: Advantage or disadvantage. Rolls the die twice and keeps the higher or lower.
+        Terms and whole numbers are joined with + and -, and any of them can be negative.
+"""
+import re
+from functools import lru_cache
+
+import rng_engine
+
+
+# The most times a single exploding die can explode, so a d1! can't roll forever.
+MAX_EXPLOSIONS = 100
+
+_TOKEN = re.compile(r"\s*(?:(\d+)|(kh|kl|dh|dl|k|advantage|adv|disadvantage|dis|d|%|!|\+|-))", re.I)
+
+
+class DiceTerm:
+    """One group of dice, such as 4d6dl1 or 1d20 with advantage."""
+
+    __slots__ = ("count", "sides", "drop_lowest", "drop_highest", "explode")
+
+    def __init__(self, count: int, sides: int, drop_lowest: int = 0, drop_highest: int = 0,
+                 explode: bool = False) -> None:
+        """Initialize the DiceTerm object.
+
+        Args:
+            count (int):
+                The number of dice.
+            sides (int):
+                The number of sides on each die.
+            drop_lowest (int, optional):
+                How many of the lowest dice to leave out of the total.
+                Defaults to 0.
+            drop_highest (int, optional):
+                How many of the highest dice to leave out of the total.
+                Defaults to 0.
+            explode (bool, optional):
+                Whether dice that roll their highest side are rolled again and added.
+                Defaults to False.
+
+        Raises:
+            ValueError: If the dice don't make sense, such as a d0 or dropping more dice than are rolled.
+        """
+        if count < 1 or sides < 1:
+            raise ValueError(f"Can't roll {count}d{sides}.")
+        if drop_lowest < 0 or drop_highest < 0 or drop_lowest + drop_highest >= count:
+            raise ValueError(f"Can't keep {count - drop_lowest - drop_highest} of {count} dice.")
+        self.count = count
+        self.sides = sides
+        self.drop_lowest = drop_lowest
+        self.drop_highest = drop_highest
+        self.explode = explode
+
+    def compile(self) -> callable:
+        """Build the fastest function that rolls this term, choosing it once instead of on every roll.
+
+        Returns:
+            callable: A function taking a RandomEngine and returning the term's total.
+        """
+        count, sides = self.count, self.sides
+        low, high = self.drop_lowest, self.drop_highest
+
+        if self.explode:
+            def roll_dice(engine):
+                dice = engine.roll(count, sides)
+                for i, die in enumerate(dice):
+                    explosions = 0
+                    while die == sides > 1 and explosions < MAX_EXPLOSIONS:
+                        die = engine.random_below(sides) + 1
+                        dice[i] += die
+                        explosions += 1
+                return dice
+        else:
+            def roll_dice(engine):
+                return engine.roll(count, sides)
+
+        if low == 0 and high == 0:
+            if count == 1 and not self.explode:
+                return lambda engine: engine.random_below(sides) + 1
+            return lambda engine: sum(roll_dice(engine))
+        if low + high == count - 1 and low == 0:
+            return lambda engine: min(roll_dice(engine))
+        if low + high == count - 1 and high == 0:
+            return lambda engine: max(roll_dice(engine))
+        return lambda engine: sum(sorted(roll_dice(engine))[low:count - high])
+
+    def __str__(self) -> str:
+        text = f"{self.count}d{self.sides}"
+        if self.explode:
+            text += "!"
+        if self.drop_lowest:
+            text += f"dl{self.drop_lowest}"
+        if self.drop_highest:
+            text += f"dh{self.drop_highest}"
+        return text
+
+    def __repr__(self) -> str:
+        return f"DiceTerm({self})"
+
+
+class DiceExpression:
+    """A compiled dice expression: some signed dice terms plus a constant."""
+
+    def __init__(self, expression: str, terms: list[tuple[int, DiceTerm]], constant: int) -> None:
+        """Initialize the DiceExpression object. Use compile_expression() rather than making these directly.
+
+        Args:
+            expression (str):
+                The expression it was compiled from.
+            terms (list[tuple[int, DiceTerm]]):
+                The sign (1 or -1) and dice of each dice term.
+            constant (int):
+                The sum of the whole numbers in the expression.
+        """
+        self.expression = expression
+        self.terms = tuple(terms)
+        self.constant = constant
+
+        rollers = tuple((sign, term.compile()) for sign, term in self.terms)
+        # Pick the simplest roller for the shape of the expression, so rolling does as little as possible.
+        if not rollers:
+            self._roll = lambda engine: constant
+        elif len(rollers) == 1 and rollers[0][0] == 1:
+            roller = rollers[0][1]
+            self._roll = lambda engine: roller(engine) + constant
+        else:
+            self._roll = lambda engine: constant + sum(sign * roller(engine) for sign, roller in rollers)
+
+    def roll(self, engine: rng_engine.RandomEngine | None = None) -> int:
+        """Roll the expression.
+
+        Args:
+            engine (rng_engine.RandomEngine | None, optional):
+                The engine to roll with.
+                Defaults to None, the current engine.
+
+        Returns:
+            int: The total.
+        """
+        return self._roll(rng_engine.get_engine() if engine is None else engine)
+
+    def roll_dice_only(self, engine: rng_engine.RandomEngine | None = None) -> int:
+        """Roll the expression without its constant.
+
+        Args:
+            engine (rng_engine.RandomEngine | None, optional):
+                The engine to roll with.
+                Defaults to None, the current engine.
+
+        Returns:
+            int: The total of the dice.
+        """
+        return self.roll(engine) - self.constant
+
+    def __call__(self, engine: rng_engine.RandomEngine | None = None) -> int:
+        return self.roll(engine)
+
+    def __str__(self) -> str:
+        parts = [("-" if sign < 0 else "+") + str(term) for sign, term in self.terms]
+        if self.constant or not parts:
+            parts.append(f"{self.constant:+d}")
+        return " ".join(parts).lstrip("+")
+
+    def __repr__(self) -> str:
+        return f"DiceExpression({self.expression!r})"
+
+
+def _tokenize(expression: str) -> list[str | int]:
+    """Split an expression into numbers and lowercase symbols."""
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None:
+            raise ValueError(f"Didn't understand {expression[position:].strip()!r} in {expression!r}.")
+        number, symbol = match.groups()
+        tokens.append(int(number) if number is not None else symbol.lower())
+        position = match.end()
+    return tokens
+
+
+def _parse(expression: str) -> DiceExpression:
+    """Parse an expression into its terms."""
+    tokens = _tokenize(expression)
+    terms = []
+    constant = 0
+    i = 0
+
+    def take_number(what: str) -> int:
+        nonlocal i
+        if i >= len(tokens) or not isinstance(tokens[i], int):
+            raise ValueError(f"Expected {what} in {expression!r}.")
+        i += 1
+        return tokens[i - 1]
+
+    while True:
+        # Any run of signs in front of a term, so "1d4 + -2" and "-1d6" work.
+        sign = 1
+        while i < len(tokens) and tokens[i] in ("+", "-"):
+            if tokens[i] == "-":
+                sign = -sign
+            i += 1
+        if i >= len(tokens):
+            raise ValueError(f"{expression!r} ends without a number or dice.")
+
+        count = tokens[i] if isinstance(tokens[i], int) else None
+        if count is not None:
+            i += 1
+        if i < len(tokens) and tokens[i] == "d":
+            i += 1
+            if i < len(tokens) and tokens[i] == "%":
+                sides = 100
+                i += 1
+            else:
+                sides = take_number("a number of sides")
+            count = 1 if count is None else count
+            drop_lowest = drop_highest = 0
+            explode = False
+
+            while i < len(tokens) and tokens[i] not in ("+", "-"):
+                modifier = tokens[i]
+                i += 1
+                if modifier == "!":
+                    explode = True
+                elif modifier in ("kh", "k"):
+                    drop_lowest = count - take_number("how many dice to keep")
+                elif modifier == "kl":
+                    drop_highest = count - take_number("how many dice to keep")
+                elif modifier == "dl":
+                    drop_lowest = take_number("how many dice to drop")
+                elif modifier == "dh":
+                    drop_highest = take_number("how many dice to drop")
+                elif modifier in ("adv", "advantage", "dis", "disadvantage"):
+                    # Advantage rolls each die twice and keeps the better half.
+                    if modifier.startswith("adv"):
+                        drop_lowest = count
+                    else:
+                        drop_highest = count
+                    count *= 2
+                else:
+                    raise ValueError(f"Didn't expect {modifier!r} in {expression!r}.")
+            terms.append((sign, DiceTerm(count, sides, drop_lowest, drop_highest, explode)))
+        elif count is not None:
+            constant += sign * count
+        else:
+            raise ValueError(f"Didn't expect {tokens[i]!r} in {expression!r}.")
+
+        if i >= len(tokens):
+            break
+        if tokens[i] not in ("+", "-"):
+            raise ValueError(f"Expected + or - in {expression!r}.")
+
+    return DiceExpression(expression, terms, constant)
+
+
+@lru_cache(maxsize=512)
+def compile_expression(expression: str) -> DiceExpression:
+    """Compile a dice expression. The result is cached, so compiling the same string again costs a dictionary lookup.
+
+    Args:
+        expression (str):
+            The expression, such as "1d20 adv + 5", "4d6dl1", "2d6! + 1d4 - 1".
+
+    Returns:
+        DiceExpression: The compiled expression.
+
+    Raises:
+        ValueError: If the expression can't be parsed.
+    """
+    return _parse(expression)
+
+
+def roll_expression(expression: str, engine: rng_engine.RandomEngine | None = None) -> int:
+    """Roll a dice expression once, compiling it only the first time it's seen.
+
+    Args:
+        expression (str):
+            The expression, such as "1d20 adv + 5".
+        engine (rng_engine.RandomEngine | None, optional):
+            The engine to roll with.
+            Defaults to None, the current engine.
+
+    Returns:
+        int: The total.
+    """
+    return compile_expression(expression).roll(engine)
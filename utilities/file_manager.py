@@ -1,4 +1,123 @@
 """Does file-related stuff"""
+import mmap
+import os
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Iterator
+
+
+# Parsed dictionaries by (path, parse settings), with the (mtime, size) of the file they were parsed from.
+_dict_cache: OrderedDict[tuple, tuple[int, int, MappingProxyType]] = OrderedDict()
+_dict_cache_size = 128
+
+
+def _raw_lines(file_path: str, use_mmap: bool) -> Iterator[str]:
+    """Yield the lines of a file one at a time, closing it as soon as the caller stops reading.
+
+    Args:
+        file_path (str):
+            The path to the file.
+        use_mmap (bool):
+            Read through a memory map instead of a buffered file.
+
+    Yields:
+        str: Each line, including its line ending. Windows line endings come out as "\n" either way.
+    """
+    if not use_mmap:
+        with open(file_path, "r", encoding="UTF-8") as file:
+            yield from file
+        return
+
+    with open(file_path, "rb") as file:
+        # Empty files can't be mapped.
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return
+        with mapped:
+            for line in iter(mapped.readline, b""):
+                # Match text mode, which turns "\r\n" into "\n".
+                yield line.decode("UTF-8").replace("\r\n", "\n")
+
+
+def iter_lines(file_path: str, comment: str | None = None, end_read: str | None = None,
+               line_count: int = -1, strip: bool = False, use_mmap: bool = False) -> Iterator[str]:
+    """Read the lines of a file lazily, without loading the whole file.
+
+    Args:
+        file_path (str):
+            The path to the file you want to read.
+        comment (str | None, optional):
+            The character(s) used to start ignored comment lines in the file.
+            Defaults to None, no comments.
+        end_read (str | None, optional):
+            The character(s) used to indicate that the text to be read stops here.
+            Defaults to None, read until the end.
+        line_count (int, optional):
+            The number of lines to read if above 0, otherwise until the end. Includes comments.
+            Defaults to -1.
+        strip (bool, optional):
+            Strip surrounding whitespace, including the line ending, from each line.
+            Defaults to False.
+        use_mmap (bool, optional):
+            Read through a memory map, which avoids copying large files into buffers.
+            Defaults to False.
+
+    Yields:
+        str: Each line that isn't a comment.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist, upon the first read.
+    """
+    lines = _raw_lines(file_path, use_mmap)
+    try:
+        for number, line in enumerate(lines):
+            if 0 < line_count <= number:
+                break
+            if comment is not None and line.startswith(comment):
+                continue
+            if end_read is not None and line.startswith(end_read):
+                break
+            yield line.strip() if strip else line
+    finally:
+        # Stopping early (line_count, end_read, or the caller giving up) closes the file right away.
+        lines.close()
+
+
+def iter_key_values(file_path: str, splitter: str = "=", comment: str = "#", end_read: str = "|",
+                    line_count: int = -1, use_mmap: bool = False) -> Iterator[tuple[str, str]]:
+    """Read the key and value pairs of a file lazily. Lines without the splitter are skipped.
+
+    Args:
+        file_path (str):
+            The path to the file you want to read.
+        splitter (str, optional):
+            The character(s) that indicate the split between key and contents.
+            Defaults to "=".
+        comment (str, optional):
+            The character(s) used to start ignored comment lines in the file.
+            Defaults to "#".
+        end_read (str, optional):
+            The character(s) used to indicate that the text to be read stops here.
+            Defaults to "|".
+        line_count (int, optional):
+            The number of lines to read if above 0, otherwise until the end. Includes comments.
+            Defaults to -1.
+        use_mmap (bool, optional):
+            Read through a memory map, which avoids copying large files into buffers.
+            Defaults to False.
+
+    Yields:
+        tuple[str, str]: Each key and its value, stripped of surrounding whitespace.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist, upon the first read.
+    """
+    for line in iter_lines(file_path, comment, end_read, line_count, use_mmap=use_mmap):
+        if splitter not in line:
+            continue
+        key, value = line.split(splitter, 1)
+        yield key.strip(), value.strip()
 
 
 def file_to_dict(file_path: str, splitter: str = "=", comment: str = "#",
@@ -24,37 +143,11 @@ def file_to_dict(file_path: str, splitter: str = "=", comment: str = "#",
     Returns:
         dict | None: The dictionary from the file or None if the file doesn't open.
     """
-    dictionary = {}
-
     try:
-        file = open(file_path, "r", encoding="UTF-8")
+        return dict(iter_key_values(file_path, splitter, comment, end_read, line_count))
     except FileNotFoundError:
         return None
 
-    line_arr = file.readlines[:]
-
-    if line_count > 0:
-
-        for line in line_arr[range(line_count)]:
-            if line.startswith(comment):
-                continue
-            if line.startswith(end_read):
-                break
-            words = line.split(splitter)
-            dictionary[words[0].strip()] = words[1].strip()
-
-        return dictionary
-
-    for line in line_arr:
-        if line.startswith(comment):
-            continue
-        if line.startswith(end_read):
-            break
-        words = line.split(splitter)
-        dictionary[words[0]] = words[1]
-
-    return dictionary
-
 
 def file_to_list(path: str) -> list:
     """Convert the contents of a file into a list of its lines.
@@ -68,8 +161,113 @@ def file_to_list(path: str) -> list:
             An array of the lines in the file
     """
     try:
-        file = open(path, "r", encoding="UTF-8")
+        return list(iter_lines(path))
+    except FileNotFoundError:
+        return None
+
+
+def cached_file_to_dict(file_path: str, splitter: str = "=", comment: str = "#",
+                        end_read: str = "|", line_count: int = -1) -> MappingProxyType | None:
+    """Same as file_to_dict(), but only parses the file again if it has changed since the last call.
+    The result is shared between callers, so it is read-only.
+
+    Args:
+        file_path (str):
+            The path to the file you want to open.
+        splitter (str, optional):
+            The character(s) that indicate the split between key and contents.
+            Defaults to "=".
+        comment (str, optional):
+            The character(s) used to start ignored comment lines in the file.
+            Defaults to "#".
+        end_read (str, optional):
+            The character(s) used to indicate that the text to be read stops here.
+            Defaults to "|".
+        line_count (int, optional):
+            The number of lines to read if above 0, otherwise until the end. Includes comments.
+            Defaults to -1.
+
+    Returns:
+        MappingProxyType | None: The read-only dictionary from the file or None if the file doesn't open.
+    """
+    key = (os.path.abspath(file_path), splitter, comment, end_read, line_count)
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        _dict_cache.pop(key, None)
+        return None
+    return _cached_parse(key, stat, file_path)
+
+
+def _cached_parse(key: tuple, stat: os.stat_result, file_path: str) -> MappingProxyType | None:
+    """Return the cached dictionary for a key if the file is unchanged, otherwise parse and cache it."""
+    cached = _dict_cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        _dict_cache.move_to_end(key)
+        return cached[2]
+
+    try:
+        dictionary = MappingProxyType(dict(iter_key_values(file_path, *key[1:])))
     except FileNotFoundError:
+        _dict_cache.pop(key, None)
         return None
-    
-    return file.readlines()[:]
+
+    _dict_cache[key] = (stat.st_mtime_ns, stat.st_size, dictionary)
+    _dict_cache.move_to_end(key)
+    while len(_dict_cache) > _dict_cache_size:
+        _dict_cache.popitem(last=False)
+    return dictionary
+
+
+def directory_to_dicts(directory: str, extension: str = ".txt", splitter: str = "=", comment: str = "#",
+                       end_read: str = "|") -> MappingProxyType:
+    """Load every key and value file in a directory, reusing the cached ones that haven't changed.
+
+    Args:
+        directory (str):
+            The path to the directory.
+        extension (str, optional):
+            Only files ending with this are loaded.
+            Defaults to ".txt".
+        splitter (str, optional):
+            The character(s) that indicate the split between key and contents.
+            Defaults to "=".
+        comment (str, optional):
+            The character(s) used to start ignored comment lines in the files.
+            Defaults to "#".
+        end_read (str, optional):
+            The character(s) used to indicate that the text to be read stops here.
+            Defaults to "|".
+
+    Returns:
+        MappingProxyType: A read-only dictionary of the file names (without the extension) to their dictionaries.
+    """
+    dictionaries = {}
+    # One directory listing gives both the names and the stats, so there is no separate os.stat() per file.
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(extension) or not entry.is_file():
+                continue
+            key = (os.path.abspath(entry.path), splitter, comment, end_read, -1)
+            dictionary = _cached_parse(key, entry.stat(), entry.path)
+            if dictionary is not None:
+                dictionaries[entry.name[:len(entry.name) - len(extension)]] = dictionary
+    return MappingProxyType(dictionaries)
+
+
+def set_dict_cache_size(size: int) -> None:
+    """Set how many parsed files are kept cached, dropping the least recently used ones if needed.
+
+    Args:
+        size (int):
+            The number of files.
+    """
+    global _dict_cache_size
+    _dict_cache_size = size
+    while len(_dict_cache) > _dict_cache_size:
+        _dict_cache.popitem(last=False)
+
+
+def clear_dict_cache() -> None:
+    """Forget every cached dictionary."""
+    _dict_cache.clear()
@@ -1,4 +1,5 @@
 """Work with keyboard inputs."""
+import queue
 import time
 
 # Disables annoying and usually incorrect warnings.
@@ -21,6 +22,35 @@ class KeyboardInput:
         self.keys = {}
         self.hold_delay = 0.25
 
+        # Keys typed since the last get_typed_keys(), filled by a hook while typing is captured.
+        self.typed_keys = queue.SimpleQueue()
+        self.typing_hook = None
+
+    def start_typing(self) -> None:
+        """Start recording every key press, in order, so none are missed between frames like with polling."""
+        if self.typing_hook is None:
+            self.typing_hook = keyboard.on_press(lambda event: self.typed_keys.put(event.name))
+
+    def stop_typing(self) -> None:
+        """Stop recording key presses and forget any that haven't been read."""
+        if self.typing_hook is not None:
+            keyboard.unhook(self.typing_hook)
+            self.typing_hook = None
+        self.typed_keys = queue.SimpleQueue()
+
+    def get_typed_keys(self) -> list[str]:
+        """Return the keys pressed since the last call, oldest first. Requires start_typing().
+
+        Returns:
+            list[str]: The names of the keys, such as "a", "space" or "backspace".
+        """
+        keys = []
+        while True:
+            try:
+                keys.append(self.typed_keys.get_nowait())
+            except queue.Empty:
+                return keys
+
     def is_newly_pressed(self, key: str, function: callable or None = None) -> bool:
         """Detect if a key is pressed and return True if
         it wasn't pressed the last time this function was called.
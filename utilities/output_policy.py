@@ -0,0 +1,177 @@
+"""Process-wide settings for how text(), error(), intext() and the 'put() functions talk to the user.
+
+    OutputPolicy: Whether output is typed out or instant, flushed or buffered, and where input comes from.
+    get_policy(): The policy currently in use.
+    set_policy(): Change the policy in use.
+    override(): Context manager that changes parts of the policy for a block of code.
+    fast_output(): Context manager for instant, buffered output, optionally with scripted input.
+    read_line(): input() alternative that follows the policy.
+
+    Environment variables, read when the module is first imported:
+        DND_FAST_OUTPUT: Set to 1 (or true/yes) for instant, buffered output.
+        DND_INPUT_SCRIPT: A file to read input from, one answer per line, instead of the keyboard.
+"""
+import io
+import os
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+
+class OutputPolicy:
+    """How the I/O helpers output text and read input."""
+
+    def __init__(self, instant: bool = False, buffered: bool = False, script: TextIO | None = None,
+                 echo_script: bool = True) -> None:
+        """Initialize the OutputPolicy object.
+
+        Args:
+            instant (bool, optional):
+                Whether messages are written all at once instead of typed out a letter at a time.
+                Defaults to False.
+            buffered (bool, optional):
+                Whether output is left in the buffer instead of flushed after every write.
+                input() still flushes before it waits.
+                Defaults to False.
+            script (TextIO | None, optional):
+                Where to read input from, one answer per line.
+                Defaults to None, the keyboard.
+            echo_script (bool, optional):
+                Whether answers read from the script are printed, so the output reads like a real session.
+                Defaults to True.
+        """
+        self.instant = instant
+        self.buffered = buffered
+        self.script = script
+        self.echo_script = echo_script
+
+    def copy(self, **changes) -> "OutputPolicy":
+        """Return a copy of the policy with some settings changed.
+
+        Args:
+            **changes:
+                The settings to change, by name.
+
+        Returns:
+            OutputPolicy: The copy.
+        """
+        settings = {"instant": self.instant, "buffered": self.buffered,
+                    "script": self.script, "echo_script": self.echo_script}
+        settings.update(changes)
+        return OutputPolicy(**settings)
+
+    def __repr__(self) -> str:
+        return (f"OutputPolicy(instant={self.instant}, buffered={self.buffered}, "
+                f"scripted={self.script is not None})")
+
+
+def _policy_from_environment() -> OutputPolicy:
+    """Build the starting policy from the environment variables."""
+    fast = os.environ.get("DND_FAST_OUTPUT", "").strip().lower() in ("1", "true", "yes", "on")
+    script_path = os.environ.get("DND_INPUT_SCRIPT")
+    # pylint: disable=consider-using-with
+    script = open(script_path, "r", encoding="utf-8") if script_path else None
+    return OutputPolicy(instant=fast, buffered=fast, script=script)
+
+
+_policy = _policy_from_environment()
+
+
+def get_policy() -> OutputPolicy:
+    """Return the policy currently in use.
+
+    Returns:
+        OutputPolicy: The policy.
+    """
+    return _policy
+
+
+def set_policy(policy: OutputPolicy) -> None:
+    """Change the policy used by the I/O helpers.
+
+    Args:
+        policy (OutputPolicy):
+            The new policy.
+    """
+    global _policy
+    _policy = policy
+
+
+def _as_stream(script: TextIO | str | list[str]) -> TextIO:
+    """Turn a script given as text or a list of answers into something to read lines from."""
+    if isinstance(script, str):
+        return io.StringIO(script)
+    if isinstance(script, (list, tuple)):
+        return io.StringIO("".join(f"{answer}\n" for answer in script))
+    return script
+
+
+@contextmanager
+def override(instant: bool | None = None, buffered: bool | None = None,
+             script: TextIO | str | list[str] | None = None) -> Iterator[OutputPolicy]:
+    """Change parts of the policy for a block of code, then change them back.
+
+    Args:
+        instant (bool | None, optional):
+            Whether messages are written all at once.
+            Defaults to None, unchanged.
+        buffered (bool | None, optional):
+            Whether output is left unflushed.
+            Defaults to None, unchanged.
+        script (TextIO | str | list[str] | None, optional):
+            Input to read instead of the keyboard: a file-like object, text with one answer per line,
+            or a list of answers.
+            Defaults to None, unchanged.
+
+    Yields:
+        OutputPolicy: The policy in use inside the block.
+    """
+    changes = {}
+    if instant is not None:
+        changes["instant"] = instant
+    if buffered is not None:
+        changes["buffered"] = buffered
+    if script is not None:
+        changes["script"] = _as_stream(script)
+
+    previous = _policy
+    set_policy(previous.copy(**changes))
+    try:
+        yield _policy
+    finally:
+        set_policy(previous)
+
+
+def fast_output(script: TextIO | str | list[str] | None = None):
+    """Instant, buffered output for a block of code, such as an automated run.
+
+    Args:
+        script (TextIO | str | list[str] | None, optional):
+            Input to read instead of the keyboard. See override().
+            Defaults to None, unchanged.
+
+    Returns:
+        A context manager, for use with a with statement.
+    """
+    return override(instant=True, buffered=True, script=script)
+
+
+def read_line() -> str:
+    """Read a line of input from the keyboard, or from the script if there is one.
+
+    Returns:
+        str: The line, without its line break.
+
+    Raises:
+        EOFError: If the script has run out of lines.
+    """
+    policy = _policy
+    if policy.script is None:
+        return input()
+
+    line = policy.script.readline()
+    if not line:
+        raise EOFError("The input script ran out of answers.")
+    line = line.rstrip("\r\n")
+    if policy.echo_script:
+        print(line, flush=not policy.buffered)
+    return line
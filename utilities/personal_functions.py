@@ -7,18 +7,25 @@
     boolput(): Boolean-specific, error-catching input() alternative using intext().
             Catches a string input and detects if it is positive ('yes') or negative ('no')
     rounder(): round() alternative.
-    rand(): random.randrange() alternative using os.urandom().
+    rand(): random.randrange() alternative using the current rng_engine (os.urandom() by default).
     rand_choice(): Returns a random item from a given list using rand(). Use of a die is possible.
-    die_parser(): Runs roll, but for as string input in the format of '1d4 + 5' or '2d8-2'.
+    die_parser(): Runs roll, but for as string input in the format of '1d4 + 5', '2d8-2' or '4d6dl1'.
+    die_odds(): The exact chances of every result of a die_parser command, with its mean and percentiles.
     roll(): Rolls a number of dice and returns the result.
     intvert(): int() alternative but catches failures and optionally returnes a failure value.
     bound(): Combines min() and max() to make sure a value is between an upper and lower bound.
     merge(): Reverses split().
+    merge_to(): merge(), but written straight to a file or buffer a chunk at a time.
+    shuffle_in_place(): Shuffles a list in place, with every order equally likely.
+    shuffled(): Returns a shuffled copy of a list.
+    sample(): Returns a number of different random items from a list.
+
+    The I/O helpers follow output_policy, which can make output instant and buffered
+    and read answers from a script instead of the keyboard.
 """
-import sys
-import os
-from time import sleep
-import time
+from collections.abc import Iterable
+from itertools import islice
+from typing import TextIO
 
 # Gets rid of an annoying and irrelevant error message
 
@@ -27,11 +34,50 @@ import time
 
 import color
 import keyboard_input as keybd
+import rng_engine
+import dice_expression
+import precise_time
+import combinatorics
+import output_policy
 
 
 # Input / Output
 
 
+def _type_out(message: tuple | list, letter_time: float, line_delay: float, sep: str, flush: bool) -> None:
+    """Write a message for text() and error(): a letter at a time, or all at once under a fast output_policy."""
+    policy = output_policy.get_policy()
+    flush = flush and not policy.buffered
+    if policy.instant:
+        print(sep.join(map(str, message)), end="", flush=flush)
+        return
+
+    # The speed multiplier. Added fow using esc to speed up outputs.
+    speed = 1
+
+    # Cycles through and prints each letter with delay.
+    for j, i in enumerate(message):
+
+        if not j == 0:
+            for letter in sep:
+
+                if keybd.is_currently_pressed("esc"):
+                    speed = 0
+
+                print(letter, end='', flush=flush)
+                precise_time.sleep(letter_time * speed)
+        for letter in str(i):
+
+            if keybd.is_currently_pressed("esc"):
+                speed = 0
+
+            print(letter, end='', flush=flush)
+            precise_time.sleep(letter_time * speed)
+
+    # Cleans up and optionally waits at the end.
+    precise_time.sleep(line_delay * speed)
+
+
 def text(*message: object, letter_time: float = .025, line_delay: float = 0,
          sep: str = " ", end: str = "\n", mods: list = None, flush: bool = True) -> None:
     """Mimic print() but with more functionality and a default time delay.
@@ -73,30 +119,7 @@ def text(*message: object, letter_time: float = .025, line_delay: float = 0,
         if isinstance(message[0], (tuple, list)):
             message = message[0]
 
-    # The speed multiplier. Added fow using esc to speed up outputs.
-    speed = 1
-
-    # Cycles through and prints each letter with delay.
-    for j, i in enumerate(message):
-
-        if not j == 0:
-            for letter in sep:
-
-                if keybd.is_currently_pressed("esc"):
-                    speed = 0
-
-                print(letter, end='', flush=flush)
-                sleep(letter_time * speed)
-        for letter in str(i):
-
-            if keybd.is_currently_pressed("esc"):
-                speed = 0
-
-            print(letter, end='', flush=flush)
-            sleep(letter_time * speed)
-
-    # Cleans up and optionally waits at the end.
-    sleep(line_delay * speed)
+    _type_out(message, letter_time, line_delay, sep, flush)
     if not mods is None:
         print(color.END, end="")
     print(end=end)
@@ -188,30 +211,7 @@ def error(*message: object, letter_time: float = .025, line_delay: float = 0,
         if isinstance(message[0], (tuple, list)):
             message = message[0]
 
-    # The speed multiplier. Added fow using esc to speed up outputs.
-    speed = 1
-
-    # Cycles through and prints each letter with delay.
-    for j, i in enumerate(message):
-
-        if not j == 0:
-            for letter in sep:
-
-                if keybd.is_currently_pressed("esc"):
-                    speed = 0
-
-                print(letter, end='', flush=flush)
-                sleep(letter_time * speed)
-        for letter in str(i):
-
-            if keybd.is_currently_pressed("esc"):
-                speed = 0
-
-            print(letter, end='', flush=flush)
-            sleep(letter_time * speed)
-
-    # Cleans up and optionally waits at the end.
-    sleep(line_delay * speed)
+    _type_out(message, letter_time, line_delay, sep, flush)
     print(" " + color.WARN + color.END, end="")
     print(end=end)
 
@@ -251,7 +251,8 @@ def intext(*message: object, letter_time: float = .025, line_delay: float = 0,
     # Passes through the arguments to text() and returns the input.
     text(message, letter_time=letter_time, sep=sep,
          line_delay=line_delay, end=end, mods=mods)
-    return input()
+    # Reads from the keyboard, or from the output_policy's script in non-interactive runs.
+    return output_policy.read_line()
 
 
 def intput(*message: object, letter_time: int = .025, line_delay: int = 0,
@@ -466,12 +467,11 @@ def rand(num1: int, num2: int = None) -> int:
     Returns:
         int: A random number within the given range.
     """
-    # Generates a 128 bit number, then depending on the number of inputs,
-    # finds a number in the given range.
-    random = int.from_bytes(os.urandom(128), sys.byteorder)
+    # The engine draws just enough bits for the range and redraws the ones past it,
+    # so every number is equally likely (a remainder of one big number isn't).
     if num2 is None:
-        return random % num1
-    return random % (num2 - num1) + num1
+        return rng_engine.get_engine().random_below(num1)
+    return rng_engine.get_engine().random_range(num1, num2)
 
 
 def rand_choice(options: list, die: str | None = None) -> object | None:
@@ -508,48 +508,47 @@ def die_parser(command: str, option_chooser: bool = False) -> int | None:
 
     Args:
         command (str):
-            The die to be parsed and rolled. Format: '1d4 + 2', '2d8-4', or '3d36'
+            The die to be parsed and rolled. Format: '1d4 + 2', '2d8-4', '3d36', '4d6dl1', '1d20 adv + 5' or '2d6! - 1d4'.
+            See dice_expression for everything it can do.
         option_chooser (bool, optional):
             This is for a specific function. Should not be used.
 
     Returns:
         int: The result of the rolled die.
     """
+    # Compiled expressions are cached, so rolling the same command again skips the parsing.
     try:
-        # Split off the die number and remainder.
-        arg1, part2 = command.rsplit("d")
-
-        # Split part2 into a die and mod if the mod exists.
-        if "+" in command:
-            arg2 = part2.rsplit("+")[0].strip()
-            arg3 = part2.rsplit("+")[1].strip()
-        elif "-" in command:
-            arg2 = part2.rsplit("-")[0].strip()
-            arg3 = "-" + part2.rsplit("-")[1].strip()
-        else:
-            arg2 = part2.strip()
-            arg3 = "0"
-
-        number = intvert(arg1, "The number of dice is not a number!") if len(
-            arg1) >= 1 else 1
-        die = intvert(arg2, "That's no die type!")
-        mod = intvert(arg3, "That's no mod!")
-
-        if option_chooser:
-            mod = -abs(die)
-
-        result = []
-        num = 0
-        for _ in range(number):
-            result.append(roll(1, die, 0))
-            num += result[-1]
-        num += mod
-
-        return num
-
-    except ValueError:
-        print(f"Pretty sure something in {command} wasn't a number when it should have been... " +
-              "Try again?")
+        expression = dice_expression.compile_expression(command)
+    except ValueError as ex:
+        print(f"Pretty sure something in {command} wasn't right... ({ex}) Try again?")
+        return None
+
+    if option_chooser:
+        # Ignores any mods and counts down from the die size instead.
+        sides = expression.terms[0][1].sides if expression.terms else 0
+        return expression.roll_dice_only() - sides
+
+    return expression.roll()
+
+
+def die_odds(command: str):
+    """Work out the exact chance of every result of a die roll command, without rolling it.
+
+    Args:
+        command (str):
+            The die roll, in the same format as die_parser(), such as '4d6dl1' or '1d20 adv + 5'.
+
+    Returns:
+        dice_distribution.Distribution | None: The chances, with mean(), percentile(), at_least() and so on,
+            or None if the command wasn't right.
+    """
+    # Imported here so NumPy is only needed by programs that use this.
+    import dice_distribution  # pylint: disable=import-outside-toplevel
+
+    try:
+        return dice_distribution.distribution(command)
+    except ValueError as ex:
+        print(f"Pretty sure something in {command} wasn't right... ({ex}) Try again?")
         return None
 
 
@@ -570,10 +569,8 @@ def roll(number=1, die=10, mod=0):
     Returns:
         int: The sum of the rolls.
     """
-    num = 0
-    for _ in range(number):
-        num += rand(0, die) + 1
-    return num + mod
+    # All the dice are drawn from the engine in one go rather than one call each.
+    return sum(rng_engine.get_engine().roll(number, die)) + mod
 
 
 def intvert(string: str, fail_message: str = None,
@@ -636,21 +633,19 @@ def factorial(num: int) -> int:
     Returns:
         int: The factorial.
     """
-    result = 1
-    for i in range(1, num):
-        result *= i + 1
-    return result
+    # Numbers below 1 have always given 1 here, so keep that rather than raising.
+    return combinatorics.factorial(max(num, 0))
 
 
 # Lists
 
 
-def merge(message: list, sep: str = " ") -> str:
+def merge(message: Iterable, sep: str = " ") -> str:
     """Invert the split function. Merge lines of text into a string with a given seperator.
 
     Args:
-        message (list):
-            The list of strings or numbers to merge into a string
+        message (Iterable):
+            The list (or any iterable, such as a generator) of strings or numbers to merge into a string
         sep (str, optional):
             The seperator to place between the elements of the list.
             Defaults to " ".
@@ -658,34 +653,125 @@ def merge(message: list, sep: str = " ") -> str:
     Returns:
         str: The string form of the list with elements seperated by sep.
     """
-    output_message = ""
-    for i, section in enumerate(message):
-        if not i == 0:
-            output_message += sep
-        output_message += str(section)
-    return output_message
+    return sep.join(map(str, message))
 
 
-def shuffle(array: list, depth: int) -> list:
-    """Create a shuffled version of the list.
+def merge_to(message: Iterable, out: TextIO, sep: str = " ", chunk_size: int = 4096) -> int:
+    """Merge lines of text like merge(), but write them to a file or buffer instead of building one big string.
+
+    Args:
+        message (Iterable):
+            The strings or numbers to merge. Can be a generator, which is only read through once.
+        out (TextIO):
+            Where to write, such as an open file or an io.StringIO.
+        sep (str, optional):
+            The seperator to place between the elements.
+            Defaults to " ".
+        chunk_size (int, optional):
+            How many elements to join and write at a time.
+            Defaults to 4096.
+
+    Returns:
+        int: The number of characters written.
+    """
+    items = map(str, message)
+    written = 0
+    between = ""
+    # Joining a chunk at a time keeps the writes few without holding the whole result in memory.
+    while chunk := list(islice(items, chunk_size)):
+        if between:
+            written += out.write(between)
+        written += out.write(sep.join(chunk))
+        between = sep
+    return written
+
+
+def _partial_shuffle(array: list, count: int) -> None:
+    """Fisher-Yates shuffle the first count positions of a list in place, so they hold a uniform random sample.
+
+    Several swaps share each draw from the engine: their ranges are multiplied into one number (up to 64 bits),
+    which is drawn once and split back up with divmod.
+    """
+    engine = rng_engine.get_engine()
+    length = len(array)
+    count = min(count, length - 1)
+    i = 0
+    while i < count:
+        limits = [length - i]
+        product = length - i
+        while i + len(limits) < count and product * (length - i - len(limits)) <= 1 << 64:
+            limits.append(length - i - len(limits))
+            product *= limits[-1]
+
+        number = engine.random_below(product)
+        for limit in limits:
+            number, offset = divmod(number, limit)
+            j = i + offset
+            array[i], array[j] = array[j], array[i]
+            i += 1
+
+
+def shuffle_in_place(array: list) -> None:
+    """Shuffle a list in place, with every order equally likely.
 
     Args:
         array (list):
             The list to shuffle.
-        depth (int):
-            The number of times to move a card.
+    """
+    _partial_shuffle(array, len(array))
+
+
+def shuffled(array: list) -> list:
+    """Create a shuffled copy of a list, with every order equally likely.
+
+    Args:
+        array (list):
+            The list to shuffle. It isn't changed.
 
     Returns:
-        list: A scrambled version o f the inputted list.
+        list: The shuffled copy.
     """
-    second_array = array[:]
+    result = list(array)
+    _partial_shuffle(result, len(result))
+    return result
+
 
-    for _ in range(depth):
-        item = rand_choice(array)
-        second_array.remove(item)
-        second_array.append(item)
+def sample(array: list, count: int) -> list:
+    """Pick a number of different items from a list at random, such as drawing cards from a deck.
+
+    Args:
+        array (list):
+            The list to pick from. It isn't changed.
+        count (int):
+            How many items to pick.
 
-    return second_array
+    Returns:
+        list: The picked items, in random order.
+
+    Raises:
+        ValueError: If count is negative or more than the number of items.
+    """
+    if not 0 <= count <= len(array):
+        raise ValueError(f"Can't pick {count} of {len(array)} items.")
+    result = list(array)
+    _partial_shuffle(result, count)
+    return result[:count]
+
+
+def shuffle(array: list, depth: int = 0) -> list:
+    """Create a shuffled version of the list.
+
+    Args:
+        array (list):
+            The list to shuffle.
+        depth (int, optional):
+            No longer used. The list is always fully shuffled, with every order equally likely.
+            Defaults to 0.
+
+    Returns:
+        list: A scrambled version of the inputted list.
+    """
+    return shuffled(array)
 
 
 def pause_nanoseconds(nanoseconds: int) -> None:
@@ -695,10 +781,8 @@ def pause_nanoseconds(nanoseconds: int) -> None:
         nanoseconds (int):
             The amount of time in billionths of a second to pause.
     """
-    start_time = time.monotonic_ns()
-    end_time = start_time + bound(nanoseconds)
-    while time.monotonic_ns() < end_time:
-        pass
+    # Sleeps most of the time away and only spins for the last fraction of a millisecond.
+    precise_time.sleep_ns(bound(nanoseconds))
 
 
 # Other
@@ -0,0 +1,151 @@
+"""Precise sleeps that don't keep a processor core busy for the whole wait.
+
+    sleep(): time.sleep() alternative, accurate to a few microseconds.
+    sleep_ns(): sleep() in nanoseconds.
+    sleep_until_ns(): Sleep until a time.monotonic_ns() deadline.
+    get_stats(): How far past their deadlines the sleeps have finished.
+    reset_stats(): Start the statistics over.
+
+    Sleeps are done in two parts: a normal time.sleep() that wakes up a little early, then spinning
+    for only the last fraction of a millisecond. How early to wake is learned from how late
+    time.sleep() has actually been waking up on this machine.
+"""
+import threading
+import time
+
+
+# Never spin for longer than this, or less than this, at the end of a sleep.
+MAX_SPIN_NS = 1_000_000
+MIN_SPIN_NS = 50_000
+
+
+class SleepStats:
+    """Measurements of how late sleeps have finished."""
+
+    def __init__(self) -> None:
+        """Initialize the SleepStats object."""
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total_overshoot_ns = 0
+        self.max_overshoot_ns = 0
+        self.spin_ns = 0
+        # How late time.sleep() itself wakes up, as a running average. Sets how early to wake up.
+        self.coarse_lateness_ns = 200_000
+
+    def record(self, overshoot_ns: int, spin_ns: int) -> None:
+        """Add one finished sleep.
+
+        Args:
+            overshoot_ns (int):
+                How long after its deadline the sleep finished.
+            spin_ns (int):
+                How long it spent spinning.
+        """
+        with self.lock:
+            self.count += 1
+            self.total_overshoot_ns += overshoot_ns
+            self.max_overshoot_ns = max(self.max_overshoot_ns, overshoot_ns)
+            self.spin_ns += spin_ns
+
+    def record_coarse(self, lateness_ns: int) -> None:
+        """Add how late a time.sleep() woke up compared to what it was asked for.
+
+        Args:
+            lateness_ns (int):
+                How late it woke up.
+        """
+        with self.lock:
+            self.coarse_lateness_ns += (lateness_ns - self.coarse_lateness_ns) // 8
+
+    def spin_margin_ns(self) -> int:
+        """Return how long before a deadline to stop sleeping and start spinning.
+
+        Returns:
+            int: The margin, in nanoseconds.
+        """
+        return min(max(self.coarse_lateness_ns * 2, MIN_SPIN_NS), MAX_SPIN_NS)
+
+    def summary(self) -> dict:
+        """Return the statistics.
+
+        Returns:
+            dict: The number of sleeps ("count"), the mean and max overshoot and the total time spent
+                spinning (in nanoseconds), and the current spin margin.
+        """
+        with self.lock:
+            return {
+                "count": self.count,
+                "mean_overshoot_ns": self.total_overshoot_ns / self.count if self.count else 0.0,
+                "max_overshoot_ns": self.max_overshoot_ns,
+                "spin_ns": self.spin_ns,
+                "spin_margin_ns": self.spin_margin_ns(),
+            }
+
+
+_stats = SleepStats()
+
+
+def sleep_until_ns(deadline: int) -> None:
+    """Sleep until time.monotonic_ns() reaches a deadline.
+
+    Args:
+        deadline (int):
+            The deadline, from time.monotonic_ns(). Returns straight away if it has passed.
+    """
+    now = time.monotonic_ns()
+    if now >= deadline:
+        return
+
+    # Sleep normally until just before the deadline.
+    coarse = deadline - now - _stats.spin_margin_ns()
+    if coarse > 0:
+        time.sleep(coarse / 1e9)
+        woke = time.monotonic_ns()
+        _stats.record_coarse(woke - now - coarse)
+        now = woke
+
+    # Spin for whatever is left.
+    spin_start = now
+    while now < deadline:
+        now = time.monotonic_ns()
+    _stats.record(now - deadline, now - spin_start)
+
+
+def sleep_ns(nanoseconds: int) -> None:
+    """Sleep for a number of nanoseconds.
+
+    Args:
+        nanoseconds (int):
+            How long to sleep, in billionths of a second.
+    """
+    if nanoseconds > 0:
+        sleep_until_ns(time.monotonic_ns() + nanoseconds)
+
+
+def sleep(seconds: float) -> None:
+    """Sleep for a number of seconds, more precisely than time.sleep().
+
+    Args:
+        seconds (float):
+            How long to sleep.
+    """
+    if seconds > 0:
+        sleep_until_ns(time.monotonic_ns() + int(seconds * 1e9))
+
+
+def get_stats() -> dict:
+    """Return how far past their deadlines sleeps have finished so far.
+
+    Returns:
+        dict: See SleepStats.summary().
+    """
+    return _stats.summary()
+
+
+def reset_stats() -> None:
+    """Start the sleep statistics over. The learned spin margin is kept."""
+    with _stats.lock:
+        _stats.count = 0
+        _stats.total_overshoot_ns = 0
+        _stats.max_overshoot_ns = 0
+        _stats.spin_ns = 0
@@ -0,0 +1,143 @@
+"""Weighted random tables, such as loot or random encounter tables.
+
+    WeightedTable: A table of items with weights. Picking an item takes the same time however big the table is.
+
+    Entries can themselves be WeightedTables, so a "treasure" entry can roll on its own treasure table.
+"""
+from fractions import Fraction
+from math import lcm
+
+import rng_engine
+
+
+class WeightedTable:
+    """A table of items, each picked with a chance proportional to its weight.
+
+    Uses Vose's alias method: the table is split into equal columns, each holding at most two items, so a pick
+    is one random number choosing a column and where in it to land. The weights are kept as exact whole numbers,
+    so the chances are exactly the weights' proportions.
+    """
+
+    def __init__(self, entries: dict | list[tuple[object, int | float | Fraction]]) -> None:
+        """Initialize the WeightedTable object.
+
+        Args:
+            entries (dict | list[tuple[object, int | float | Fraction]]):
+                The items and their weights, as {item: weight} or [(item, weight), ...].
+                An item that is a WeightedTable is rolled on when picked.
+
+        Raises:
+            ValueError: If there are no entries, a weight is negative, or every weight is 0.
+        """
+        pairs = list(entries.items() if isinstance(entries, dict) else entries)
+        if not pairs:
+            raise ValueError("A table needs at least one entry.")
+
+        weights = [Fraction(weight) for _, weight in pairs]
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Weights can't be negative.")
+        # Scale the weights to whole numbers, so building and picking from the table is exact.
+        scale = lcm(*(weight.denominator for weight in weights))
+        weights = [weight.numerator * (scale // weight.denominator) for weight in weights]
+        total = sum(weights)
+        if total == 0:
+            raise ValueError("At least one weight must be above 0.")
+
+        self.items = [item for item, _ in pairs]
+        self.weights = weights
+        self.total = total
+        self.thresholds, self.aliases = self._build_alias(weights, total)
+        # A pick draws one number below this and splits it into a column and a point in that column.
+        self.draw_limit = len(weights) * total
+
+    @staticmethod
+    def _build_alias(weights: list[int], total: int) -> tuple[list[int], list[int]]:
+        """Build Vose's alias table. Each column i keeps item i below thresholds[i] (out of total),
+        and gives the rest of the column to aliases[i]."""
+        count = len(weights)
+        scaled = [weight * count for weight in weights]
+        thresholds = [total] * count
+        aliases = list(range(count))
+        small = [i for i, weight in enumerate(scaled) if weight < total]
+        large = [i for i, weight in enumerate(scaled) if weight >= total]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            thresholds[less] = scaled[less]
+            aliases[less] = more
+            # The larger item fills the rest of the smaller one's column.
+            scaled[more] -= total - scaled[less]
+            (small if scaled[more] < total else large).append(more)
+        # Whatever is left fills its own column exactly.
+        return thresholds, aliases
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def chance(self, item: object) -> float:
+        """Return the chance of an entry being picked from this table (not counting nested tables' entries).
+
+        Args:
+            item (object):
+                The entry.
+
+        Returns:
+            float: The chance, from 0 to 1.
+        """
+        return sum(weight for entry, weight in zip(self.items, self.weights) if entry == item) / self.total
+
+    def _pick_index(self, number: int) -> int:
+        """Turn a number below draw_limit into the index of the picked entry."""
+        column, point = divmod(number, self.total)
+        return column if point < self.thresholds[column] else self.aliases[column]
+
+    def choose(self, engine: rng_engine.RandomEngine | None = None) -> object:
+        """Pick an item at random. If it's a nested table, pick from that instead.
+
+        Args:
+            engine (rng_engine.RandomEngine | None, optional):
+                The engine to use.
+                Defaults to None, the current engine.
+
+        Returns:
+            object: The item.
+        """
+        engine = rng_engine.get_engine() if engine is None else engine
+        table = self
+        while True:
+            item = table.items[table._pick_index(engine.random_below(table.draw_limit))]
+            if not isinstance(item, WeightedTable):
+                return item
+            table = item
+
+    def choose_many(self, count: int, engine: rng_engine.RandomEngine | None = None) -> list:
+        """Pick many items at once, each independently. Nested tables are rolled on in one batch each.
+
+        Args:
+            count (int):
+                How many items to pick.
+            engine (rng_engine.RandomEngine | None, optional):
+                The engine to use.
+                Defaults to None, the current engine.
+
+        Returns:
+            list: The items.
+        """
+        engine = rng_engine.get_engine() if engine is None else engine
+        items = self.items
+        pick_index = self._pick_index
+        results = [items[pick_index(number)] for number in engine.random_below_many(self.draw_limit, count)]
+
+        # Gather the picks that landed on nested tables, and roll each table once for all of them.
+        nested: dict[int, list[int]] = {}
+        for position, item in enumerate(results):
+            if isinstance(item, WeightedTable):
+                nested.setdefault(id(item), []).append(position)
+        for positions in nested.values():
+            table = results[positions[0]]
+            for position, item in zip(positions, table.choose_many(len(positions), engine)):
+                results[position] = item
+        return results
+
+    def __repr__(self) -> str:
+        return f"WeightedTable({len(self)} entries)"
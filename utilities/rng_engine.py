@@ -0,0 +1,304 @@
+"""Random number engines for rand(), roll() and the other dice functions.
+
+    RandomEngine: The base class. Turns random bits into unbiased numbers in a range.
+    UrandomEngine: Cryptographically strong numbers from os.urandom(), read in large buffered blocks.
+    FastEngine: A fast, seedable generator for simulations and replaying the same rolls.
+    get_engine(): The engine currently in use.
+    set_engine(): Change the engine in use.
+    seed(): Switch to a FastEngine with the given seed.
+"""
+import os
+import random
+import threading
+from abc import ABC, abstractmethod
+
+
+class RandomEngine(ABC):
+    """A source of random numbers. Subclasses only need to provide random_bits()."""
+
+    @abstractmethod
+    def random_bits(self, bits: int) -> int:
+        """Return a random non-negative number with the given number of random bits.
+
+        Args:
+            bits (int):
+                The number of bits.
+
+        Returns:
+            int: A number from 0 to 2 ** bits - 1.
+        """
+
+    def random_below(self, limit: int) -> int:
+        """Return a random number from 0 to limit - 1, with every number equally likely.
+
+        Args:
+            limit (int):
+                The upper limit, not included. Must be at least 1.
+
+        Returns:
+            int: The random number.
+
+        Raises:
+            ValueError: If limit is below 1.
+        """
+        if limit < 1:
+            raise ValueError(f"Can't pick a number below {limit}.")
+        # Taking the remainder of a big random number favours small results, so draw just enough bits
+        # to cover the range and try again if the draw lands past it. That's fewer than 2 draws on average.
+        bits = (limit - 1).bit_length()
+        result = self.random_bits(bits)
+        while result >= limit:
+            result = self.random_bits(bits)
+        return result
+
+    def random_range(self, start: int, stop: int) -> int:
+        """Return a random number from start to stop - 1.
+
+        Args:
+            start (int):
+                The lower limit, included.
+            stop (int):
+                The upper limit, not included.
+
+        Returns:
+            int: The random number.
+        """
+        return start + self.random_below(stop - start)
+
+    def random_below_many(self, limit: int, count: int) -> list[int]:
+        """Return many random numbers from 0 to limit - 1 at once.
+
+        Args:
+            limit (int):
+                The upper limit, not included. Must be at least 1.
+            count (int):
+                How many numbers to return.
+
+        Returns:
+            list[int]: The random numbers.
+        """
+        random_below = self.random_below
+        return [random_below(limit) for _ in range(count)]
+
+    def roll(self, number: int, sides: int) -> list[int]:
+        """Roll a number of dice.
+
+        Args:
+            number (int):
+                The number of dice.
+            sides (int):
+                The number of sides on each die.
+
+        Returns:
+            list[int]: Each die's result, from 1 to sides.
+        """
+        return [result + 1 for result in self.random_below_many(sides, number)]
+
+
+class UrandomEngine(RandomEngine):
+    """Cryptographically strong random numbers, read from os.urandom() a large block at a time
+    instead of with one system call per number."""
+
+    def __init__(self, buffer_size: int = 4096) -> None:
+        """Initialize the UrandomEngine object.
+
+        Args:
+            buffer_size (int, optional):
+                How many random bytes to read from the system at once.
+                Defaults to 4096.
+        """
+        self.buffer_size = buffer_size
+        self.buffer = b""
+        self.position = 0
+        self.lock = threading.Lock()
+
+    def random_bytes(self, count: int) -> bytes:
+        """Return random bytes from the buffer, refilling it when it runs out.
+
+        Args:
+            count (int):
+                How many bytes to return.
+
+        Returns:
+            bytes: The random bytes.
+        """
+        with self.lock:
+            if self.position + count > len(self.buffer):
+                # Requests bigger than the buffer are read straight from the system, leaving the buffer alone.
+                if count > self.buffer_size:
+                    return os.urandom(count)
+                self.buffer = self.buffer[self.position:] + os.urandom(self.buffer_size)
+                self.position = 0
+            data = self.buffer[self.position:self.position + count]
+            self.position += count
+            return data
+
+    def random_bits(self, bits: int) -> int:
+        """Return a random non-negative number with the given number of random bits.
+
+        Args:
+            bits (int):
+                The number of bits.
+
+        Returns:
+            int: A number from 0 to 2 ** bits - 1.
+        """
+        number = int.from_bytes(self.random_bytes((bits + 7) // 8), "little")
+        return number >> (-bits % 8)
+
+    def random_below_many(self, limit: int, count: int) -> list[int]:
+        """Return many random numbers from 0 to limit - 1 at once, using one buffer read per batch.
+
+        Args:
+            limit (int):
+                The upper limit, not included. Must be at least 1.
+            count (int):
+                How many numbers to return.
+
+        Returns:
+            list[int]: The random numbers.
+        """
+        if limit < 1:
+            raise ValueError(f"Can't pick a number below {limit}.")
+        if limit > 256:
+            return super().random_below_many(limit, count)
+
+        # Every die up to a d256 fits in a byte: mask each byte down to just enough bits and keep
+        # the ones in range. More than half are always kept, so reading about twice the count is enough.
+        mask = (1 << (limit - 1).bit_length()) - 1
+        results = []
+        while len(results) < count:
+            needed = count - len(results)
+            results.extend(byte & mask for byte in self.random_bytes(needed * 2 + 8) if byte & mask < limit)
+        del results[count:]
+        return results
+
+
+class FastEngine(RandomEngine):
+    """A fast, seedable engine (Mersenne Twister). The same seed always gives the same rolls.
+    Not suitable where the numbers need to be unpredictable."""
+
+    def __init__(self, seed: int | str | None = None) -> None:
+        """Initialize the FastEngine object.
+
+        Args:
+            seed (int | str | None, optional):
+                The seed. Engines with the same seed give the same numbers.
+                Defaults to None, seeded from the system.
+        """
+        self.generator = random.Random(seed)
+
+    def seed(self, seed: int | str | None = None) -> None:
+        """Start the sequence again from a seed.
+
+        Args:
+            seed (int | str | None, optional):
+                The seed.
+                Defaults to None, seeded from the system.
+        """
+        self.generator.seed(seed)
+
+    def get_state(self) -> object:
+        """Return the engine's state, to replay the rolls from this point later with set_state().
+
+        Returns:
+            object: The state.
+        """
+        return self.generator.getstate()
+
+    def set_state(self, state: object) -> None:
+        """Go back to a state from get_state().
+
+        Args:
+            state (object):
+                The state.
+        """
+        self.generator.setstate(state)
+
+    def random_bits(self, bits: int) -> int:
+        """Return a random non-negative number with the given number of random bits.
+
+        Args:
+            bits (int):
+                The number of bits.
+
+        Returns:
+            int: A number from 0 to 2 ** bits - 1.
+        """
+        return self.generator.getrandbits(bits) if bits else 0
+
+    def random_below(self, limit: int) -> int:
+        """Return a random number from 0 to limit - 1, with every number equally likely.
+
+        Args:
+            limit (int):
+                The upper limit, not included. Must be at least 1.
+
+        Returns:
+            int: The random number.
+        """
+        if limit < 1:
+            raise ValueError(f"Can't pick a number below {limit}.")
+        return self.generator.randrange(limit)
+
+    def random_below_many(self, limit: int, count: int) -> list[int]:
+        """Return many random numbers from 0 to limit - 1 at once.
+
+        Args:
+            limit (int):
+                The upper limit, not included. Must be at least 1.
+            count (int):
+                How many numbers to return.
+
+        Returns:
+            list[int]: The random numbers.
+        """
+        if limit < 1:
+            raise ValueError(f"Can't pick a number below {limit}.")
+        # Same rejection method as random_below(), without the method call per number.
+        bits = (limit - 1).bit_length()
+        getrandbits = self.generator.getrandbits
+        results = []
+        while len(results) < count:
+            results.extend(number for number in (getrandbits(bits) for _ in range(count - len(results)))
+                           if number < limit)
+        return results
+
+
+_engine: RandomEngine = UrandomEngine()
+
+
+def get_engine() -> RandomEngine:
+    """Return the engine currently in use.
+
+    Returns:
+        RandomEngine: The engine.
+    """
+    return _engine
+
+
+def set_engine(engine: RandomEngine) -> None:
+    """Change the engine used by rand(), roll() and the other dice functions.
+
+    Args:
+        engine (RandomEngine):
+            The new engine.
+    """
+    global _engine
+    _engine = engine
+
+
+def seed(seed_value: int | str | None = None) -> FastEngine:
+    """Switch to a fast, seeded engine, such as for a simulation or replaying the same rolls.
+
+    Args:
+        seed_value (int | str | None, optional):
+            The seed.
+            Defaults to None, seeded from the system.
+
+    Returns:
+        FastEngine: The new engine.
+    """
+    engine = FastEngine(seed_value)
+    set_engine(engine)
+    return engine